@@ -1,15 +1,20 @@
-from google.cloud import bigquery
-import re
-from config.settings import PROJECT_ID, BQ_DATASET, BQ_TABLE
+from services import metrics
+from services.airports import find_routes
+from services.singleflight import SingleFlight
+from services.snapshot import get_snapshot
+from storage import get_store
 
 class FlightAnalyticsAgent:
     """
-    Agent class to handle flight route trend analytics using BigQuery.
+    Agent class to handle flight route trend analytics using the configured flight store.
     """
 
+    # 🛬 Concurrent questions about the same route share one store query
+    inflight = SingleFlight("route")
+
     def run(self, query: str) -> str:
         """
-        Analyze flight trends based on user input like "DEL to BOM".
+        Analyze flight trends based on user input like "DEL to BOM" or "Delhi to Mumbai".
 
         Parameters:
             query (str): A natural language or semi-structured query containing airport codes.
@@ -17,41 +22,104 @@ class FlightAnalyticsAgent:
         Returns:
             str: Formatted response with airline-wise flight frequency and average duration.
         """
-        # Extract origin and destination IATA codes using regex (e.g., "DEL to BOM")
-        m = re.search(r"\b([A-Z]{3})\s*to\s*([A-Z]{3})\b", query.upper())
-        if not m:
-            return "❓ Please use format like 'DEL to BOM'."
-
-        origin, dest = m.group(1), m.group(2)
-
-        # Create BigQuery client using project ID from config
-        client = bigquery.Client(project=PROJECT_ID)
-        table = f"{PROJECT_ID}.{BQ_DATASET}.{BQ_TABLE}"
-
-        # Query: Count flights and calculate average duration between the two airports in the last 7 days
-        sql = f"""
-        SELECT 
-            airline_name, 
-            COUNT(*) AS flights,
-            AVG(TIMESTAMP_DIFF(scheduled_arrival, scheduled_departure, MINUTE)) AS avg_duration
-        FROM `{table}`
-        WHERE 
-            departure_airport LIKE '%{origin}%' AND
-            arrival_airport LIKE '%{dest}%' AND
-            flight_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 7 DAY)
-        GROUP BY airline_name
-        ORDER BY flights DESC
-        LIMIT 3
+        # Optional window ("DEL to BOM last 30 days"), then origin and destination IATA codes
+        # (e.g., "DEL to BOM"; city and airport names are resolved)
+        from agents.inquiry_router import parse_window
+        days, query_upper = parse_window(query.upper())
+        routes = find_routes(query_upper, query=query)
+        if not routes:
+            return "❓ Please use format like 'DEL to BOM' or 'DEL to BOM last 30 days'."
+        return self.summarize(*routes[0][1], days=days)
+
+    def summarize(self, origin: str, dest: str, days: int = None) -> str:
+        """Trend message for one route given as IATA codes; a full profile when a window in days is given."""
+        if days is not None:
+            return self.profile(origin, dest, days)
+        # Count flights and average duration between the two airports in the last 7 days
+        with metrics.span("agent", agent="analytics"):
+            snapshot = self.snapshot_for(7)
+            if snapshot is not None:
+                return self.format_summary(origin, dest, snapshot.route_summary(origin, dest, days=7, limit=3))
+            rows = self.inflight.do((origin, dest, 7, 3),
+                                    lambda: get_store().route_summary(origin, dest, days=7, limit=3))
+        return self.format_summary(origin, dest, rows)
+
+    def run_many(self, routes: list, days: int = None) -> list:
         """
+        Summarize several (origin, dest) pairs with one grouped store query, or profile
+        each of them over a window of `days` days.
+
+        Returns:
+            list[str]: One formatted response per route, in order.
+        """
+        routes = [tuple(route) for route in routes]
+        if days is not None:
+            return [self.profile(origin, dest, days) for origin, dest in routes]
+        with metrics.span("agent", agent="analytics_batch"):
+            snapshot = self.snapshot_for(7)
+            if snapshot is not None:
+                summaries = snapshot.route_summaries(routes, days=7, limit=3)
+            else:
+                summaries = self.inflight.do((tuple(routes), 7, 3),
+                                             lambda: get_store().route_summaries(routes, days=7, limit=3))
+        return [self.format_summary(origin, dest, summaries.get((origin, dest), [])) for origin, dest in routes]
+
+    @staticmethod
+    def snapshot_for(days: int):
+        """The in-memory snapshot when it is enabled, current and holds the whole window, else None."""
+        snapshot = get_snapshot()
+        if snapshot is not None and snapshot.covers(days):
+            return snapshot
+        return None
 
-        # Execute the query and process results
-        rows = client.query(sql).result()
+    def profile(self, origin: str, dest: str, days: int) -> str:
+        """
+        Route profile over the last `days` days: busiest airlines, scheduled duration percentiles,
+        status mix and the busiest departure hours (UTC) and weekdays. Computed in-process from the
+        columnar cache when it holds the window, else from one route query to the store.
+        """
+        # Imported here so NumPy is only loaded once a windowed question is asked
+        from services.analytics_engine import get_route_analytics
+        with metrics.span("agent", agent="analytics_profile"):
+            profile = get_route_analytics().profile(origin, dest, days)
+        return self.format_profile(origin, dest, profile)
+
+    @staticmethod
+    def describe_window(days: int) -> str:
+        return "today" if days == 0 else "the last day" if days == 1 else f"the last {days} days"
+
+    def format_profile(self, origin: str, dest: str, profile: dict) -> str:
+        """Format a route profile (see `RouteAnalytics.profile`) into a user-friendly message."""
+        window = self.describe_window(profile["days"])
+        if not profile["flights"]:
+            return f"No flights found from {origin} to {dest} in {window}."
+
+        flights = profile["flights"]
+        msg = f"📊 {origin}→{dest} in {window}: {flights} flights\n"
+        airlines = ", ".join(f"{name} {count}" + (f" (avg ≈ {int(avg)} min)" if avg is not None else "")
+                             for name, count, avg in profile["airlines"])
+        msg += f"✈️ Busiest airlines: {airlines}\n"
+        if profile["duration_p50"] is not None:
+            msg += (f"⏱️ Scheduled duration: median {int(profile['duration_p50'])} min, "
+                    f"90th percentile {int(profile['duration_p90'])} min\n")
+        statuses = ", ".join(f"{status or 'unknown'} {round(100 * count / flights)}%"
+                             for status, count in profile["statuses"])
+        msg += f"🚦 Status mix: {statuses}\n"
+        if profile["hours"]:
+            hours = ", ".join(f"{hour:02d}:00 ({count})" for hour, count in profile["hours"])
+            msg += f"🕒 Busiest departure hours (UTC): {hours}\n"
+        weekdays = ", ".join(f"{day} ({count})" for day, count in profile["weekdays"])
+        msg += f"📅 Busiest days: {weekdays}\n"
+        return msg
 
-        if rows.total_rows == 0:
+    def format_summary(self, origin: str, dest: str, rows: list) -> str:
+        """Format the airline rows of one route into a user-friendly message."""
+        if not rows:
             return f"No flights found from {origin} to {dest} in the last 7 days."
 
         # Format the result into a user-friendly message
         msg = f"📊 Trend {origin}→{dest} (last 7 days):\n"
         for row in rows:
-            msg += f"{row.airline_name}: {row.flights} flights, avg duration ≈ {int(row.avg_duration)} min\n"
+            duration = f"{int(row['avg_duration'])} min" if row["avg_duration"] is not None else "N/A"
+            msg += f"{row['airline_name']}: {row['flights']} flights, avg duration ≈ {duration}\n"
         return msg
@@ -1,14 +1,42 @@
 import re
-from google.cloud import bigquery
-from google.cloud.exceptions import NotFound
-from config.settings import API_KEY, PROJECT_ID, BQ_DATASET, BQ_TABLE
-from google.cloud.bigquery import ScalarQueryParameter, QueryJobConfig
+import logging
+from config.settings import STATUS_CACHE_SIZE, STATUS_CACHE_TTL, STATUS_CACHE_NEGATIVE_TTL
+from services.cache import TTLCache, MISSING
+from services.flight_index import get_flight_index
+from services.ingest_marker import current_generation
+from services import metrics
+from services.singleflight import SingleFlight
+from services.snapshot import get_snapshot
+from storage import get_store
+
+logger = logging.getLogger(__name__)
 
 class FlightStatusAgent:
+    # 🧠 Answer cache shared by all instances; invalidated whenever an ingest bumps the generation
+    cache = TTLCache(
+        maxsize=STATUS_CACHE_SIZE,
+        ttl=STATUS_CACHE_TTL,
+        negative_ttl=STATUS_CACHE_NEGATIVE_TTL,
+        generation_fn=current_generation,
+    )
+
+    # 🛬 Concurrent misses for the same flight number share one store lookup
+    inflight = SingleFlight("status")
+
+    @classmethod
+    def cache_stats(cls) -> dict:
+        """Return hit/miss/eviction counters of the shared answer cache."""
+        return cls.cache.stats()
+
+    @classmethod
+    def inflight_stats(cls) -> dict:
+        """Return how many store lookups were coalesced into another caller's."""
+        return cls.inflight.stats()
+
     def run(self, flight_number: str) -> str:
         """
         Main entry point for the FlightStatusAgent.
-        Validates the flight number, fetches flight data from BigQuery,
+        Validates the flight number, fetches flight data from the flight store,
         and returns a formatted status response.
         """
         # Clean and standardize input
@@ -18,19 +46,121 @@ class FlightStatusAgent:
         if not re.match(r'^[A-Z0-9]+$', flight_number):
             return "❌ Please enter a valid flight number (letters and/or digits only)."
 
-        # Attempt to fetch flight data from BigQuery
         try:
-            record = self.fetch_flight_from_bigquery(flight_number)
+            # Numbers ingest has never written cannot be in the store: answer without a query
+            if not self.can_exist(flight_number):
+                metrics.incr("status_short_circuit")
+                return self.not_found(flight_number)
+
+            # Attempt to fetch flight data from the flight store
+            with metrics.span("agent", agent="status"):
+                record = self.fetch_flight_from_bigquery(flight_number)
             if record:
                 return self.format_response(record)
             else:
-                return f"❌ No flight data found for flight number {flight_number} in BigQuery."
+                return self.not_found(flight_number)
         except Exception as e:
+            # The chat still gets a readable answer, but the failure is logged and counted
+            logger.exception("Flight status lookup failed for %s", flight_number)
+            metrics.incr("agent_errors", agent="status", error=type(e).__name__)
             return f"❌ Error while accessing flight data: {str(e)}"
 
+    def run_many(self, flight_numbers: list) -> list:
+        """
+        Answer several (sanitized) flight numbers at once; everything not in the
+        answer cache is looked up in a single store query.
+
+        Returns:
+        - list[str]: One formatted response per flight number, in order.
+        """
+        try:
+            possible = [number for number in flight_numbers if self.can_exist(number)]
+            metrics.incr("status_short_circuit", len(flight_numbers) - len(possible))
+            with metrics.span("agent", agent="status_batch"):
+                records = self.fetch_flights(possible) if possible else {}
+            return [
+                self.format_response(records[number]) if records.get(number) else self.not_found(number)
+                for number in flight_numbers
+            ]
+        except Exception as e:
+            logger.exception("Flight status lookup failed for %s", ", ".join(flight_numbers))
+            metrics.incr("agent_errors", agent="status", error=type(e).__name__)
+            # One answer per number asked, so callers can still zip answers with numbers
+            return [f"❌ Error while accessing flight data: {str(e)}"] * len(flight_numbers)
+
+    def can_exist(self, flight_number: str) -> bool:
+        """Ask the known-number index whether a lookup can find anything; if the index fails, ask the store."""
+        try:
+            return get_flight_index().can_exist(flight_number)
+        except Exception as e:
+            logger.exception("Flight number index unavailable for %s", flight_number)
+            metrics.incr("agent_errors", agent="flight_index", error=type(e).__name__)
+            return True
+
+    def not_found(self, flight_number: str) -> str:
+        """Answer for an unknown flight number, with "did you mean" suggestions when there are close ones."""
+        message = f"❌ No flight data found for flight number {flight_number}."
+        try:
+            suggestions = get_flight_index().suggest(flight_number)
+        except Exception as e:
+            # Hints are optional: the answer stands without them
+            logger.exception("Flight number suggestions failed for %s", flight_number)
+            metrics.incr("agent_errors", agent="flight_index", error=type(e).__name__)
+            suggestions = []
+        if suggestions:
+            message += f" Did you mean {', '.join(suggestions)}?"
+        return message
+
+    def fetch_flights(self, flight_numbers: list) -> dict:
+        """
+        Batched `fetch_flight_from_bigquery`: snapshot and cache hits are served directly
+        and all misses share one `get_flights` query.
+
+        Returns:
+        - dict: Flight number -> record (None when not found).
+        """
+        records, misses, hits = self._from_snapshot(flight_numbers), [], 0
+        for number in flight_numbers:
+            if number in records:
+                continue
+            record = self.cache.get(number)
+            if record is MISSING:
+                misses.append(number)
+            else:
+                records[number] = record
+                hits += 1
+        metrics.incr("status_cache", hits, result="hit")
+        metrics.incr("status_cache", len(misses), result="miss")
+
+        if len(misses) == 1:
+            # Same key as single lookups, so it coalesces with them
+            records[misses[0]] = self.inflight.do(misses[0], lambda: self._load_flight(misses[0]))
+        elif misses:
+            records.update(self.inflight.do(tuple(sorted(misses)), lambda: self._load_flights(misses)))
+        return records
+
+    def _from_snapshot(self, flight_numbers: list) -> dict:
+        """Records the in-memory snapshot holds (when enabled and current); the rest go to the store."""
+        snapshot = get_snapshot()
+        if snapshot is None:
+            return {}
+        records = snapshot.get_flights(flight_numbers)
+        metrics.incr("snapshot_lookup", len(records), result="hit")
+        metrics.incr("snapshot_lookup", len(flight_numbers) - len(records), result="miss")
+        return records
+
+    def _load_flights(self, flight_numbers: list) -> dict:
+        """Query the store once for several flight numbers and cache every answer, misses included."""
+        found = get_store().get_flights(flight_numbers)
+        records = {number: found.get(number) for number in flight_numbers}
+        for number, record in records.items():
+            self.cache.set(number, record)
+        return records
+
     def fetch_flight_from_bigquery(self, flight_number: str) -> dict:
         """
-        Queries BigQuery to fetch flight information matching the given flight number.
+        Returns flight information for the given flight number, served from the
+        in-memory snapshot or the answer cache when possible. Misses are cached too (as None).
 
         Parameters:
         - flight_number (str): The sanitized flight number to query.
@@ -38,41 +168,47 @@ class FlightStatusAgent:
         Returns:
         - dict: Dictionary of flight details if found, else None.
         """
-        # Initialize BigQuery client
-        client = bigquery.Client()
+        record = self._from_snapshot([flight_number]).get(flight_number)
+        if record:
+            return record
 
-        # Fully-qualified table reference: project.dataset.table
-        full_table_id = f"{PROJECT_ID}.{BQ_DATASET}.{BQ_TABLE}"
+        record = self.cache.get(flight_number)
+        if record is not MISSING:
+            metrics.incr("status_cache", result="hit")
+            return record
 
-        # SQL query with parameterized flight number for security
-        query = f"""
-            SELECT * FROM `{full_table_id}`
-            WHERE UPPER(flight_number) = @flight_number
-            LIMIT 1
-        """
+        metrics.incr("status_cache", result="miss")
+        return self.inflight.do(flight_number, lambda: self._load_flight(flight_number))
 
-        # Configure query parameters to prevent SQL injection
-        job_config = QueryJobConfig(
-            query_parameters=[
-                ScalarQueryParameter("flight_number", "STRING", flight_number)
-            ]
-        )
+    def _load_flight(self, flight_number: str) -> dict:
+        """Query the store and cache the answer; runs once per burst of identical misses."""
+        # A lookup that finished just before this one started may already have cached the answer
+        record = self.cache.get(flight_number)
+        if record is not MISSING:
+            return record
 
-        # Execute the query and retrieve results
-        results = client.query(query, job_config=job_config).result()
+        record = self.query_flight(flight_number)
+        self.cache.set(flight_number, record)
+        return record
 
-        # Return the first matching row as a dictionary (if any)
-        for row in results:
-            return dict(row)
+    def query_flight(self, flight_number: str) -> dict:
+        """
+        Looks up flight information for the given flight number in the configured store.
 
-        return None  # No matching record found
+        Parameters:
+        - flight_number (str): The sanitized flight number to query.
+
+        Returns:
+        - dict: Dictionary of flight details if found, else None.
+        """
+        return get_store().get_flight(flight_number)
 
     def format_response(self, record: dict) -> str:
         """
-        Formats the BigQuery record into a user-friendly response string.
+        Formats the stored flight record into a user-friendly response string.
 
         Parameters:
-        - record (dict): The flight information retrieved from BigQuery.
+        - record (dict): The flight information retrieved from the flight store.
 
         Returns:
         - str: A formatted string containing flight status details.
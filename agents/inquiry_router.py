@@ -1,26 +1,117 @@
 import re
-from agents.flight_status_agent import FlightStatusAgent
-from agents.flight_analytics_agent import FlightAnalyticsAgent
+from config.settings import ROUTER_MAX_ENTITIES, SUGGEST_LIMIT
+from services import metrics
+from services.airports import find_routes
+
+# --- Flight Number Pattern (Flexible) ---
+# Matches 2–3 alphanumeric + 1–4 digits or any mix with optional trailing letters
+FLIGHT_PATTERN = re.compile(r'\b([A-Z0-9]{2,4}\d{1,4}[A-Z]?)\b')
+
+# --- Time Window (e.g., "last 30 days", "past 2 weeks", "last month", "today") ---
+WINDOW_PATTERN = re.compile(r'\b(?:(?:IN|OVER|FOR|DURING)\s+)?(?:THE\s+)?(?:LAST|PAST)\s+(?:(\d{1,4})\s+)?'
+                            r'(DAY|WEEK|MONTH|YEAR)S?\b|\bTODAY\b')
+WINDOW_UNIT_DAYS = {"DAY": 1, "WEEK": 7, "MONTH": 30, "YEAR": 365}
+
+
+def parse_window(query_upper: str) -> tuple:
+    """
+    Find a time window in an upper-cased message.
+
+    Returns:
+    - tuple: (days, rest) where days is the window length (0 for "today", None when the message
+      has none) and rest is the message with it blanked out (same length, so positions still match
+      the original text), so "365" is not mistaken for a flight number.
+    """
+    match = WINDOW_PATTERN.search(query_upper)
+    if not match:
+        return None, query_upper
+    days = 0 if match.group(2) is None else int(match.group(1) or 1) * WINDOW_UNIT_DAYS[match.group(2)]
+    return days, query_upper[:match.start()] + " " * (match.end() - match.start()) + query_upper[match.end():]
 
 class InquiryRouter:
-    def route(self, query: str) -> str:
-        query_upper = query.strip().upper()
+    def __init__(self, max_entities: int = ROUTER_MAX_ENTITIES):
+        # Agents are built on first use and then reused; they hold no per-query state,
+        # so one instance of each serves every query (and thread)
+        self._status_agent = None
+        self._analytics_agent = None
+        self.max_entities = max_entities
 
-        # --- Flight Number Pattern (Flexible) ---
-        # Matches 2–3 alphanumeric + 1–4 digits or any mix with optional trailing letters
-        flight_pattern = re.search(r'\b([A-Z0-9]{2,4}\d{1,4}[A-Z]?)\b', query_upper)
+    @property
+    def status_agent(self):
+        if self._status_agent is None:
+            # Imported here so starting the chat does not load the agents and the store layer up front
+            from agents.flight_status_agent import FlightStatusAgent
+            self._status_agent = FlightStatusAgent()
+        return self._status_agent
 
-        if flight_pattern:
-            flight_number = flight_pattern.group(1)
-            response = FlightStatusAgent().run(flight_number)
+    @property
+    def analytics_agent(self):
+        if self._analytics_agent is None:
+            from agents.flight_analytics_agent import FlightAnalyticsAgent
+            self._analytics_agent = FlightAnalyticsAgent()
+        return self._analytics_agent
 
-            if "No information found" not in response:
-                return response
+    def route(self, query: str) -> str:
+        with metrics.span("route"):
+            return self._route(query)
 
-        # --- Flight Route (e.g., BLR to DEL) ---
-        route_pattern = re.search(r'\b([A-Z]{3})\s*to\s*([A-Z]{3})\b', query_upper)
-        if route_pattern:
-            return FlightAnalyticsAgent().run(query_upper)
+    def _route(self, query: str) -> str:
+        query = query.strip()
+        days, query_upper = parse_window(query.upper())
+        entities, skipped = self.extract_entities(query_upper, query)
 
         # --- Fallback: Nothing recognized ---
-        return "❓ Sorry, I couldn't identify a valid flight number or route in your query."
+        if not entities:
+            return "❓ Sorry, I couldn't identify a valid flight number or route in your query."
+
+        flights = [value for kind, value in entities if kind == "flight"]
+        routes = [value for kind, value in entities if kind == "route"]
+
+        # A single entity keeps the single-lookup path (and its cache/coalescing keys)
+        # A time window ("last 30 days") applies to the routes in the message
+        if len(entities) == 1:
+            if flights:
+                return self.status_agent.run(flights[0])
+            return self.analytics_agent.summarize(*routes[0], days=days)
+
+        # Several entities: one batched query per kind, answers in the order they were asked
+        answers = dict(zip(flights, self.status_agent.run_many(flights))) if flights else {}
+        answers.update(zip(routes, self.analytics_agent.run_many(routes, days=days)) if routes else {})
+        response = "\n".join(answers.get(value, "") for _, value in entities)
+
+        if skipped:
+            response += f"\n⚠️ Only the first {self.max_entities} flights/routes were looked up; please ask about the rest separately."
+        return response
+
+    def suggest(self, text: str, limit: int = SUGGEST_LIMIT) -> list:
+        """
+        Autocomplete / "did you mean" for a partial or mistyped flight number, answered locally
+        from the known-number index (no store query).
+
+        Returns:
+        - list[str]: Up to `limit` recently flown flight numbers, best match first.
+        """
+        from services.flight_index import get_flight_index
+        return get_flight_index().suggest(text, limit)
+
+    def extract_entities(self, query_upper: str, query: str = None) -> tuple:
+        """
+        Find every distinct flight number and route in the (upper-cased) message, in order of appearance.
+
+        Parameters:
+        - query_upper (str): The upper-cased message.
+        - query (str): The message as typed, so a lone IATA code only counts when written in capitals.
+
+        Returns:
+        - tuple: (entities, skipped) where entities is a list of ("flight", number) / ("route", (origin, dest))
+          capped at `max_entities`, and skipped counts the entities left out.
+        """
+        found = [(m.start(), "flight", m.group(1)) for m in FLIGHT_PATTERN.finditer(query_upper)]
+        # --- Flight Route (e.g., BLR to DEL, or Bangalore to Delhi via the airport index) ---
+        found += [(position, "route", route) for position, route in find_routes(query_upper, query=query)]
+
+        entities = []
+        for _, kind, value in sorted(found, key=lambda item: item[0]):
+            if (kind, value) not in entities:
+                entities.append((kind, value))
+        return entities[:self.max_entities], max(0, len(entities) - self.max_entities)
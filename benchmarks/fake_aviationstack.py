@@ -0,0 +1,138 @@
+import json
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# 🛰️ Local stand-in for http://api.aviationstack.com/v1/flights
+# Serves deterministic synthetic flights with Aviationstack's pagination envelope,
+# at a configurable result size and per-request latency.
+
+AIRLINES = [
+    ("Air India", "AI", "AIC"),
+    ("IndiGo", "6E", "IGO"),
+    ("Vistara", "UK", "VTI"),
+    ("SpiceJet", "SG", "SEJ"),
+    ("Akasa Air", "QP", "AKJ"),
+]
+
+AIRPORTS = [
+    ("Indira Gandhi International", "DEL", "VIDP"),
+    ("Chhatrapati Shivaji International", "BOM", "VABB"),
+    ("Kempegowda International", "BLR", "VOBL"),
+    ("Chennai International", "MAA", "VOMM"),
+    ("Netaji Subhas Chandra Bose International", "CCU", "VECC"),
+    ("Rajiv Gandhi International", "HYD", "VOHS"),
+]
+
+STATUSES = ["scheduled", "active", "landed", "cancelled", "diverted"]
+
+
+def make_flight(index: int, flight_date: str = None, seed: int = 0) -> dict:
+    """Build one synthetic flight record; the same index and seed always yield the same flight."""
+    rng = random.Random(seed * 1_000_003 + index)
+    airline, airline_iata, airline_icao = AIRLINES[index % len(AIRLINES)]
+    origin, destination = rng.sample(AIRPORTS, 2)
+    flight_date = flight_date or (date.today() - timedelta(days=rng.randint(0, 6))).isoformat()
+
+    departure = datetime.fromisoformat(flight_date).replace(tzinfo=timezone.utc) + timedelta(minutes=rng.randint(0, 1439))
+    arrival = departure + timedelta(minutes=rng.randint(55, 190))
+    number = f"{airline_iata}{100 + index % 9000}"
+
+    def endpoint(airport, scheduled):
+        return {"airport": airport[0], "iata": airport[1], "icao": airport[2],
+                "scheduled": scheduled.isoformat(), "delay": rng.choice([None, 5, 15, 40])}
+
+    return {
+        "flight_date": flight_date,
+        "flight_status": rng.choice(STATUSES),
+        "departure": endpoint(origin, departure),
+        "arrival": endpoint(destination, arrival),
+        "airline": {"name": airline, "iata": airline_iata, "icao": airline_icao},
+        "flight": {"number": number[len(airline_iata):], "iata": number, "icao": f"{airline_icao}{number[len(airline_iata):]}"},
+    }
+
+
+class FakeAviationstackHandler(BaseHTTPRequestHandler):
+    """Answers GET /v1/flights with a page of synthetic flights."""
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        server.requests += 1
+
+        if url.path.rstrip("/") != "/v1/flights":
+            return self._send(404, {"error": {"code": "not_found"}})
+        if server.fail_every and server.requests % server.fail_every == 0:
+            return self._send(429, {"error": {"code": "rate_limit_reached"}})
+
+        time.sleep(server.latency)
+        limit = min(int(query.get("limit", 100)), 100)
+        offset = int(query.get("offset", 0))
+        end = min(offset + limit, server.total)
+        data = [make_flight(i, query.get("flight_date"), server.seed) for i in range(offset, end)]
+
+        # Honour the simple equality filters the real API supports
+        for param, path in (("airline_iata", ("airline", "iata")), ("dep_iata", ("departure", "iata")),
+                            ("arr_iata", ("arrival", "iata"))):
+            if param in query:
+                data = [f for f in data if f[path[0]][path[1]] == query[param]]
+
+        self._send(200, {
+            "pagination": {"limit": limit, "offset": offset, "count": len(data), "total": server.total},
+            "data": data,
+        })
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+
+def start_fake_server(total: int = 2000, latency: float = 0.05, seed: int = 0,
+                      fail_every: int = 0, port: int = 0):
+    """
+    Start the fake API on a background thread.
+
+    Parameters:
+    - total (int): Number of flights reported by `pagination.total`.
+    - latency (float): Seconds of simulated latency per request.
+    - fail_every (int): Answer every Nth request with a 429 (0 disables).
+    - port (int): Port to bind (0 picks a free one).
+
+    Returns:
+    - (ThreadingHTTPServer, str): The server (call `.shutdown()` when done) and its flights URL.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeAviationstackHandler)
+    server.daemon_threads = True
+    server.total, server.latency, server.seed, server.fail_every = total, latency, seed, fail_every
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, name="fake-aviationstack", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/flights"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local fake Aviationstack API.")
+    parser.add_argument("--total", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server, url = start_fake_server(args.total, args.latency, port=args.port)
+    print(f"🛰️ Fake Aviationstack serving {args.total} flights at {url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
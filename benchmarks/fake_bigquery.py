@@ -0,0 +1,215 @@
+import gzip
+import json
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from storage.sqlite_store import SQLiteFlightStore
+
+# 🧪 In-process stand-in for google.cloud.bigquery.Client
+# Answers the statements issued by BigQueryFlightStore from an in-memory SQLite
+# store and records every job, so ingest and chat paths can be benchmarked offline.
+# Inject it with services.bigquery_client.set_client(FakeBigQueryClient()).
+
+
+class FakeJob:
+    """Minimal QueryJob/LoadJob look-alike."""
+
+    def __init__(self, kind: str, rows=None, dml_stats=None, bytes_processed: int = 0):
+        self.job_id = uuid.uuid4().hex
+        self.job_type = kind
+        self.rows = rows or []
+        self.dml_stats = dml_stats
+        self.num_dml_affected_rows = (dml_stats.inserted_row_count + dml_stats.updated_row_count) if dml_stats else None
+        self.total_bytes_processed = bytes_processed
+        self.slot_millis = 0
+        self.cache_hit = False
+        self.total_rows = len(self.rows)
+
+    def result(self, timeout=None):
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeBigQueryClient:
+    """
+    Fake BigQuery client backed by an in-memory SQLite flight store.
+
+    Parameters:
+    - latency (float): Seconds slept per job, to mimic BigQuery job round trips.
+    """
+
+    def __init__(self, latency: float = 0.0, store: SQLiteFlightStore = None):
+        self.latency = latency
+        self.store = store or SQLiteFlightStore(":memory:")
+        self.staging = {}   # staging table id -> rows
+        self.jobs = []      # recorded jobs: {"kind", "statement", "seconds", "rows"}
+        self.lock = threading.Lock()
+        self.project = "fake-project"
+
+        # (pattern, handler) pairs tried in order against each SQL statement
+        self.handlers = [
+            (r"^\s*MERGE", self._merge),
+            (r"IN UNNEST\(@nums\)", self._get_flights),
+            (r"IN UNNEST\(@routes\)", self._route_summaries),
+            (r"BEGIN TRANSACTION", self._refresh_rollup),
+            (r"WHERE flight_date >= @start_date\s*(AND flight_date <= @end_date\s*)?$", self._iter_flights),
+            (r"departure_iata = @origin", self._route_profile_counts),
+            (r"ORDER BY scheduled_departure DESC, flight_number DESC", self._flights_page),
+            (r"GROUP BY status", self._status_breakdown),
+            (r"COUNT\(DISTINCT airline_name\)", self._window_summary),
+            (r"origin = @origin", self._route_summary),
+            (r"flight_number = @flight_number", self._get_flight),
+            (r"ORDER BY scheduled_departure DESC", self._recent_flights),
+        ]
+
+    # 📒 Job bookkeeping
+
+    def _record(self, kind: str, statement: str, started: float, rows: int):
+        with self.lock:
+            self.jobs.append({"kind": kind, "statement": " ".join(statement.split())[:80],
+                              "seconds": time.perf_counter() - started, "rows": rows})
+
+    def job_counts(self) -> dict:
+        """Number of recorded jobs per kind."""
+        counts = {}
+        with self.lock:
+            for job in self.jobs:
+                counts[job["kind"]] = counts.get(job["kind"], 0) + 1
+        return counts
+
+    # 🛢️ Client API used by the project
+
+    def query(self, sql: str, job_config=None, **kwargs):
+        started = time.perf_counter()
+        time.sleep(self.latency)
+        params = {}
+        for param in getattr(job_config, "query_parameters", None) or []:
+            params[param.name] = param.values if hasattr(param, "values") else param.value
+
+        if getattr(job_config, "dry_run", False):
+            job = FakeJob("dry_run")
+        else:
+            for pattern, handler in self.handlers:
+                if re.search(pattern, sql):
+                    job = handler(sql, params)
+                    break
+            else:
+                job = FakeJob("query")
+
+        self._record(job.job_type, sql, started, len(job.rows))
+        return job
+
+    def create_table(self, table, exists_ok=False):
+        self.staging.setdefault(self._table_key(table), [])
+        return table
+
+    def delete_table(self, table, not_found_ok=False):
+        self.staging.pop(self._table_key(table), None)
+
+    def get_table(self, table):
+        return SimpleNamespace(table_id=self._table_key(table), schema=[], time_partitioning=None,
+                               clustering_fields=None)
+
+    def load_table_from_file(self, file_obj, destination, job_config=None, **kwargs):
+        started = time.perf_counter()
+        time.sleep(self.latency)
+        data = file_obj.read()
+        if data[:2] == b"\x1f\x8b":
+            data = gzip.decompress(data)
+        rows = [json.loads(line) for line in data.splitlines() if line.strip()]
+        self._write(destination, rows, job_config)
+        self._record("load", f"LOAD {destination}", started, len(rows))
+        return FakeJob("load", bytes_processed=len(data))
+
+    def load_table_from_json(self, rows, destination, job_config=None, **kwargs):
+        started = time.perf_counter()
+        time.sleep(self.latency)
+        self._write(destination, list(rows), job_config)
+        self._record("load", f"LOAD {destination}", started, len(rows))
+        return FakeJob("load")
+
+    def insert_rows_json(self, table, rows, **kwargs):
+        started = time.perf_counter()
+        self._write(table, list(rows), None)
+        self._record("stream", f"INSERT {table}", started, len(rows))
+        return []
+
+    # 🧰 Helpers
+
+    @staticmethod
+    def _table_key(table) -> str:
+        if isinstance(table, str):
+            return table
+        return ".".join(filter(None, [getattr(table, "project", None), getattr(table, "dataset_id", None),
+                                      getattr(table, "table_id", None)]))
+
+    def _write(self, destination, rows, job_config):
+        key = self._table_key(destination)
+        if key in self.staging:
+            truncate = getattr(job_config, "write_disposition", None) == "WRITE_TRUNCATE"
+            self.staging[key] = rows if truncate else self.staging[key] + rows
+        else:
+            self.store.append_rows(rows)
+
+    # 🔀 Statement handlers
+
+    def _merge(self, sql, params):
+        staging_id = re.search(r"USING `([^`]+)`", sql).group(1)
+        stats = self.store.upsert_rows(self.staging.get(staging_id, []))
+        dml = SimpleNamespace(inserted_row_count=stats["inserted"], updated_row_count=stats["updated"],
+                              deleted_row_count=0)
+        return FakeJob("merge", dml_stats=dml)
+
+    def _refresh_rollup(self, sql, params):
+        self.store.refresh_route_rollup(params.get("dates"))
+        return FakeJob("rollup")
+
+    def _get_flight(self, sql, params):
+        # Honour the statement's lookback ("days" is absent on the unpruned retry)
+        record = self.store.latest_flights([params["flight_number"]], params.get("days")).get(params["flight_number"])
+        return FakeJob("lookup", rows=[record] if record else [])
+
+    def _get_flights(self, sql, params):
+        return FakeJob("lookup", rows=list(self.store.latest_flights(params["nums"], params.get("days")).values()))
+
+    def _route_summaries(self, sql, params):
+        routes = [tuple(route.split("-", 1)) for route in params["routes"]]
+        summaries = self.store.route_summaries(routes, params["days"], params["limit"])
+        rows = [{"origin": origin, "destination": dest, **row}
+                for (origin, dest), airline_rows in summaries.items() for row in airline_rows]
+        return FakeJob("route", rows=rows)
+
+    def _route_summary(self, sql, params):
+        rows = self.store.route_summary(params["origin"], params["dest"], params["days"], params["limit"])
+        return FakeJob("route", rows=rows)
+
+    def _recent_flights(self, sql, params):
+        return FakeJob("scan", rows=self.store.recent_flights(params.get("limit", 300), params.get("days")))
+
+    def _iter_flights(self, sql, params):
+        columns = [col.strip() for col in re.search(r"SELECT (.+?)\s+FROM", sql, re.S).group(1).split(",")]
+        return FakeJob("scan", rows=[{col: row[col] for col in columns}
+                                     for row in self.store.iter_flights(columns, str(params["start_date"]),
+                                                                        params.get("end_date") and str(params["end_date"]))])
+
+    def _route_profile_counts(self, sql, params):
+        rows = self.store.route_profile_counts(params["origin"], params["dest"], str(params["start_date"]))
+        return FakeJob("aggregate", rows=rows)
+
+    def _status_breakdown(self, sql, params):
+        return FakeJob("aggregate", rows=self.store.status_breakdown(params["start_date"], params["end_date"]))
+
+    def _window_summary(self, sql, params):
+        return FakeJob("aggregate", rows=[self.store.window_summary(params["start_date"], params["end_date"])])
+
+    def _flights_page(self, sql, params):
+        columns = [col.strip() for col in re.search(r"SELECT (.+?)\s+FROM", sql, re.S).group(1).split(",")]
+        cursor = (params["cursor_ts"], params["cursor_number"]) if "cursor_ts" in params else None
+        rows = self.store.flights_page(columns, params["start_date"], params["end_date"],
+                                       cursor=cursor, limit=params["limit"])
+        return FakeJob("page", rows=rows)
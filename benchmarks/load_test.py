@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# 🛠️ Make the project root importable when run as `python benchmarks/load_test.py`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fake_aviationstack import make_flight
+from benchmarks.run_benchmarks import configure_env, percentiles
+
+# 🔥 Load test for chat_server.py
+# Fires a mix of flight-status and route questions at POST /chat from many concurrent
+# clients and reports requests/sec, latency percentiles and the status-code mix.
+# Without --url it starts the server in-process on top of the fake BigQuery backend.
+
+
+def build_queries(flights: int) -> list:
+    """Alternate status and route questions about the synthetic flights the fake backend holds."""
+    queries = []
+    for i in range(flights):
+        flight = make_flight(i)
+        queries.append(flight["flight"]["iata"])
+        queries.append(f"{flight['departure']['iata']} to {flight['arrival']['iata']}")
+    return queries
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(args) -> tuple:
+    """Seed the fake backend and serve chat_server's app on a background thread."""
+    configure_env("http://127.0.0.1:9/v1/flights", tempfile.mkdtemp(prefix="flight-load-"))
+    import uvicorn
+    from benchmarks.run_benchmarks import seed_fake_backend
+    from chat_server import create_app, RouterExecutor
+
+    seed_fake_backend(args.bq_latency, args.flights)
+    app = create_app(RouterExecutor(workers=args.workers, queue_size=args.queue_size, timeout=args.timeout))
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="chat-server", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def run_load(url: str, queries: list, total: int, concurrency: int) -> dict:
+    """Send `total` requests from `concurrency` clients, each with its own keep-alive session."""
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def client():
+        session = requests.Session()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            try:
+                status = session.post(f"{url}/chat", json={"query": queries[i % len(queries)]}, timeout=60).status_code
+            except requests.RequestException:
+                status = "error"
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(total / elapsed, 1),
+        "latency": percentiles(latencies),
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the chat API server.")
+    parser.add_argument("--url", default=None, help="Target server; omit to start one against the fake backend.")
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests to send.")
+    parser.add_argument("--concurrency", type=int, default=100, help="Concurrent clients.")
+    parser.add_argument("--flights", type=int, default=2000, help="Synthetic flights to query.")
+    parser.add_argument("--bq-latency", type=float, default=0.05, help="Fake BigQuery latency per job (s).")
+    parser.add_argument("--workers", type=int, default=32, help="Server worker threads (local server only).")
+    parser.add_argument("--queue-size", type=int, default=256, help="Server queue size (local server only).")
+    parser.add_argument("--timeout", type=float, default=10, help="Server request timeout (local server only).")
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    server, url = (None, args.url) if args.url else start_local_server(args)
+    try:
+        results = run_load(url, build_queries(args.flights), args.requests, args.concurrency)
+    finally:
+        if server:
+            server.should_exit = True
+
+    results["params"] = vars(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    latency = results["latency"]
+    print(f"✅ {results['requests']} requests in {results['seconds']}s → {results['requests_per_sec']} req/sec")
+    print(f"⏱️ p50 {latency['p50_ms']} ms, p90 {latency['p90_ms']} ms, p99 {latency['p99_ms']} ms")
+    print(f"📬 Status codes: {results['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
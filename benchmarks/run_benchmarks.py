@@ -0,0 +1,358 @@
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+import contextlib
+from datetime import datetime, timezone
+
+# 🛠️ Make the project root and scripts importable when run as `python benchmarks/run_benchmarks.py`
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "scripts"))
+
+from benchmarks.fake_aviationstack import start_fake_server, make_flight
+
+# 📏 Offline benchmark suite
+# Measures ingest throughput and per-stage time against a fake Aviationstack server and a
+# fake BigQuery client, plus InquiryRouter latency percentiles. Results go to a JSON file
+# so runs can be compared between commits.
+
+
+def configure_env(api_url: str, cache_dir: str):
+    """Point the project at the fakes. Must run before any project module is imported."""
+    os.environ.update({
+        "AVIATIONSTACK_API_KEY": "bench",
+        "AVIATIONSTACK_BASE_URL": api_url,
+        "AVIATIONSTACK_RATE_LIMIT": "10000",
+        "STORAGE_BACKEND": "bigquery",
+        "PROJECT_ID": "bench-project",
+        "DATASET_ID": "bench",
+        "TABLE_ID": "flights",
+        "CACHE_DIR": cache_dir,
+    })
+
+
+def percentiles(samples: list) -> dict:
+    """p50/p90/p99/max of latency samples, in milliseconds."""
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {"p50_ms": pick(0.50), "p90_ms": pick(0.90), "p99_ms": pick(0.99),
+            "max_ms": round(ordered[-1] * 1000, 3), "samples": len(ordered)}
+
+
+@contextlib.contextmanager
+def timed(results: dict, key: str):
+    started = time.perf_counter()
+    yield
+    results[key] = round(time.perf_counter() - started, 4)
+
+
+def bench_ingest(pages: int, bq_latency: float) -> dict:
+    """Per-stage timing of one fetch → format → dedupe → upload cycle, then the end-to-end script run."""
+    from config.settings import API_KEY
+    from services.aviationstack import AviationstackClient
+    from services.bigquery_client import set_client
+    from services.ingest import ingest_rows
+    from services.transform import format_row, flights_to_frame, dedupe_frame, frame_to_rows
+    from benchmarks.fake_bigquery import FakeBigQueryClient
+    import fetch_and_upload
+
+    stages = {}
+    fake = FakeBigQueryClient(latency=bq_latency)
+    set_client(fake)
+
+    with timed(stages, "fetch_s"):
+        flights = [f for page in AviationstackClient(API_KEY).iter_pages(max_pages=pages) for f in page.get("data", [])]
+    with timed(stages, "format_row_scalar_s"):
+        [format_row(f) for f in flights if f and f.get("flight", {}).get("iata")]
+    with timed(stages, "format_columnar_s"):
+        frame = flights_to_frame(flights, dedupe=False)
+    with timed(stages, "dedupe_s"):
+        rows = frame_to_rows(dedupe_frame(frame))
+    with timed(stages, "upload_s"):
+        stats = ingest_rows(rows)
+
+    # 🚀 End-to-end run of the script's fetch/upload loop (pages and uploads overlap)
+    set_client(FakeBigQueryClient(latency=bq_latency))
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = fetch_and_upload.run(pages=pages)
+
+    return {
+        "flights_fetched": len(flights),
+        "rows_uploaded": len(rows),
+        "upload_stats": stats,
+        "stages": stages,
+        "bigquery_jobs": fake.job_counts(),
+        "end_to_end": {
+            "flights": summary["fetched"],
+            "seconds": round(summary["seconds"], 4),
+            "flights_per_sec": round(summary["fetched"] / summary["seconds"], 1),
+        },
+    }
+
+
+def seed_fake_backend(bq_latency: float, flights: int) -> list:
+    """Install a fresh fake BigQuery client holding `flights` synthetic flights; returns their rows."""
+    from services.bigquery_client import set_client
+    from services.ingest import ingest_rows
+    from services.transform import rows_from_flights
+    from benchmarks.fake_bigquery import FakeBigQueryClient
+
+    set_client(FakeBigQueryClient(latency=bq_latency))
+    rows = rows_from_flights([make_flight(i) for i in range(flights)])
+    ingest_rows(rows)
+    return rows
+
+
+def bench_router(iterations: int, bq_latency: float, flights: int) -> dict:
+    """InquiryRouter.route latency percentiles for status and route questions, cold and warm cache."""
+    from agents.inquiry_router import InquiryRouter
+    from agents.flight_status_agent import FlightStatusAgent
+
+    rows = seed_fake_backend(bq_latency, flights)
+    router = InquiryRouter()
+    numbers = [row["flight_number"] for row in rows]
+    routes = sorted({(row["departure_iata"], row["arrival_iata"]) for row in rows})
+    samples = {"status_cold": [], "status_warm": [], "route": []}
+
+    for i in range(iterations):
+        number = numbers[i % len(numbers)]
+
+        FlightStatusAgent.cache.clear()
+        started = time.perf_counter()
+        router.route(number)
+        samples["status_cold"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        router.route(number)
+        samples["status_warm"].append(time.perf_counter() - started)
+
+        origin, dest = routes[i % len(routes)]
+        started = time.perf_counter()
+        router.route(f"{origin} to {dest}")
+        samples["route"].append(time.perf_counter() - started)
+
+    return {name: percentiles(values) for name, values in samples.items()}
+
+
+def bench_coalescing(concurrency: int, bq_latency: float, flights: int) -> dict:
+    """Fire `concurrency` identical cold questions at once and count the BigQuery jobs they cost."""
+    from agents.inquiry_router import InquiryRouter
+    from agents.flight_status_agent import FlightStatusAgent
+    from services.bigquery_client import get_client
+
+    rows = seed_fake_backend(bq_latency, flights)
+    router = InquiryRouter()
+    queries = {"status": rows[0]["flight_number"], "route": f"{rows[0]['departure_iata']} to {rows[0]['arrival_iata']}"}
+    job_kinds = {"status": "lookup", "route": "route"}
+    results = {}
+
+    for name, query in queries.items():
+        FlightStatusAgent.cache.clear()
+        before = get_client().job_counts().get(job_kinds[name], 0)
+        barrier = threading.Barrier(concurrency)
+
+        def ask():
+            barrier.wait()
+            router.route(query)
+
+        threads = [threading.Thread(target=ask) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        jobs = get_client().job_counts().get(job_kinds[name], 0) - before
+        results[name] = {"requests": concurrency, "bigquery_jobs": jobs, "jobs_saved": concurrency - jobs}
+    return results
+
+
+def bench_snapshot(flights: int, bq_latency: float) -> dict:
+    """
+    Memory of the in-memory flight snapshot against plain dict rows, scaled to a million flights
+    (every flight number distinct, the worst case for the string pools), plus status lookup latency
+    from the snapshot and from the fake store.
+    """
+    import tracemalloc
+    from datetime import date, timedelta
+    from services.snapshot import FlightSnapshot
+    from services.transform import rows_from_flights
+
+    synthetic = [make_flight(i) for i in range(flights)]
+    for i, flight in enumerate(synthetic):
+        flight["flight"]["iata"] = f"{flight['airline']['iata']}{i}"
+    rows = rows_from_flights(synthetic)
+    # Rows are decoded inside each measurement so neither side shares string objects with `rows`
+    lines = [json.dumps(row) for row in rows]
+
+    def traced(build):
+        tracemalloc.start()
+        built = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return built, size
+
+    def fill():
+        snapshot = FlightSnapshot(date.today() - timedelta(days=7))
+        for line in lines:
+            snapshot.add(json.loads(line))
+        return snapshot
+
+    copies, dict_bytes = traced(lambda: [json.loads(line) for line in lines])
+    del copies
+    _, snapshot_bytes = traced(fill)
+    timings = {}
+    with timed(timings, "build_seconds"):  # timed again without tracemalloc's bookkeeping
+        snapshot = fill()
+
+    store_rows = seed_fake_backend(bq_latency, min(flights, 2000))
+    from storage import get_store
+    numbers = [row["flight_number"] for row in rows]
+    samples = {"snapshot_lookup": [], "store_lookup": []}
+    for i in range(200):
+        started = time.perf_counter()
+        snapshot.get_flight(numbers[(i * 7919) % len(numbers)])
+        samples["snapshot_lookup"].append(time.perf_counter() - started)
+        started = time.perf_counter()
+        get_store().get_flight(store_rows[i % len(store_rows)]["flight_number"])
+        samples["store_lookup"].append(time.perf_counter() - started)
+
+    return {
+        "flights": len(rows),
+        "build_seconds": timings["build_seconds"],
+        "snapshot_mb_per_million": round(snapshot_bytes / len(rows), 1),
+        "dict_rows_mb_per_million": round(dict_bytes / len(rows), 1),
+        "estimated_mb_per_million": snapshot.stats()["mb_per_million_flights"],
+        **{name: percentiles(values) for name, values in samples.items()},
+    }
+
+
+def bench_analytics(flights: int, bq_latency: float) -> dict:
+    """
+    Route analytics over `flights` synthetic flights spread across 60 days: the columnar cache's
+    full load, incremental sync after a one-day ingest and memory, then profile latency for a
+    30-day window (cache) and a 45-day window (one route query to the store).
+    """
+    from datetime import date, timedelta
+    from services.analytics_engine import RouteAnalytics
+    from services.bigquery_client import set_client
+    from services.ingest import ingest_rows
+    from services.transform import rows_from_flights
+    from benchmarks.fake_bigquery import FakeBigQueryClient
+
+    def rows_for(indexes, seed=0):
+        synthetic = []
+        for i in indexes:
+            flight = make_flight(i, (date.today() - timedelta(days=i % 60)).isoformat(), seed)
+            flight["flight"]["iata"] = f"{flight['airline']['iata']}{i}"
+            synthetic.append(flight)
+        return rows_from_flights(synthetic)
+
+    set_client(FakeBigQueryClient(latency=bq_latency))
+    rows = rows_for(range(flights))
+    ingest_rows(rows)
+    engine = RouteAnalytics(cache_days=30, enabled=True)
+    timings = {}
+    with timed(timings, "full_load_seconds"):
+        engine.sync()
+    ingest_rows(rows_for(range(0, flights, 60), seed=1))   # one flight date rewritten
+    with timed(timings, "incremental_sync_seconds"):
+        engine.sync()
+
+    routes = sorted({(row["departure_iata"], row["arrival_iata"]) for row in rows})
+    samples = {"cache_profile": [], "store_profile": []}
+    for i in range(50):
+        origin, dest = routes[i % len(routes)]
+        for name, days in (("cache_profile", 30), ("store_profile", 45)):
+            started = time.perf_counter()
+            engine.profile(origin, dest, days)
+            samples[name].append(time.perf_counter() - started)
+
+    stats = engine.stats()
+    return {
+        "flights": len(rows),
+        "cached_flights": stats["flights"],
+        "memory_mb": stats["memory_mb"],
+        "days_reloaded": stats["days_reloaded"],
+        **timings,
+        **{name: percentiles(values) for name, values in samples.items()},
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--flights", type=int, default=5000, help="Flights served by the fake API.")
+    parser.add_argument("--pages", type=int, default=50, help="Max pages fetched per ingest cycle.")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="Fake API latency per request (s).")
+    parser.add_argument("--bq-latency", type=float, default=0.05, help="Fake BigQuery latency per job (s).")
+    parser.add_argument("--iterations", type=int, default=200, help="Router queries per scenario.")
+    parser.add_argument("--burst", type=int, default=50, help="Concurrent identical questions for the coalescing run.")
+    parser.add_argument("--snapshot-flights", type=int, default=200000,
+                        help="Flights loaded into the in-memory snapshot for the memory benchmark.")
+    parser.add_argument("--analytics-flights", type=int, default=20000,
+                        help="Flights spread over 60 days for the route analytics benchmark.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Enable instrumentation and include its spans/counters in the results.")
+    args = parser.parse_args()
+
+    server, url = start_fake_server(total=args.flights, latency=args.api_latency)
+    configure_env(url, tempfile.mkdtemp(prefix="flight-bench-"))
+
+    from services import metrics
+    metrics.enable(args.metrics)
+
+    try:
+        results = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "params": vars(args),
+            },
+            "ingest": bench_ingest(args.pages, args.bq_latency),
+            "router": bench_router(args.iterations, args.bq_latency, min(args.flights, 2000)),
+            "coalescing": bench_coalescing(args.burst, args.bq_latency, min(args.flights, 2000)),
+            "snapshot": bench_snapshot(args.snapshot_flights, args.bq_latency),
+            "analytics": bench_analytics(args.analytics_flights, args.bq_latency),
+        }
+    finally:
+        server.shutdown()
+    if args.metrics:
+        results["metrics"] = metrics.snapshot()
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+
+    e2e = results["ingest"]["end_to_end"]
+    print(f"✅ Ingest: {e2e['flights']} flights in {e2e['seconds']}s ({e2e['flights_per_sec']} flights/sec)")
+    for name, stats in results["router"].items():
+        print(f"✅ Router {name}: p50 {stats['p50_ms']} ms, p99 {stats['p99_ms']} ms")
+    for name, stats in results["coalescing"].items():
+        print(f"✅ Burst of {stats['requests']} identical {name} questions: {stats['bigquery_jobs']} BigQuery job(s)")
+    snap = results["snapshot"]
+    print(f"✅ Snapshot: {snap['snapshot_mb_per_million']} MB per million flights "
+          f"(dict rows: {snap['dict_rows_mb_per_million']} MB), built in {snap['build_seconds']}s; "
+          f"lookup p50 {snap['snapshot_lookup']['p50_ms']} ms vs store {snap['store_lookup']['p50_ms']} ms")
+    analytics = results["analytics"]
+    print(f"✅ Route analytics: {analytics['cached_flights']} flights cached in {analytics['memory_mb']} MB, "
+          f"loaded in {analytics['full_load_seconds']}s, resynced in {analytics['incremental_sync_seconds']}s; "
+          f"profile p50 {analytics['cache_profile']['p50_ms']} ms vs store {analytics['store_profile']['p50_ms']} ms")
+    print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+# 🛠️ Make the project root importable when run as `python benchmarks/startup.py`
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from benchmarks.run_benchmarks import git_commit
+
+# 🚀 Cold-start benchmark
+# Runs each entry point in a fresh interpreter under `python -X importtime` and reports the
+# wall time, the total import time, the most expensive top-level imports and whether heavy
+# dependencies were loaded. Interpreter startup (`site`) is excluded from the import totals.
+# The API key is blanked so the chat paths prove they start without it.
+
+# name -> (code, extra environment); "first_answer" looks a flight up in an empty local SQLite store
+SCENARIOS = {
+    "baseline": ("pass", {}),
+    "chatbot": ("import chatbot", {}),
+    "first_answer": ("import chatbot; chatbot.InquiryRouter().route('AI302')",
+                     {"STORAGE_BACKEND": "sqlite", "SQLITE_PATH": ":memory:"}),
+    "chat_server": ("import chat_server", {}),
+}
+
+# Modules the chat paths should only load once a lookup needs them
+HEAVY_MODULES = ["google.cloud.bigquery", "pandas", "requests", "asyncio", "http.server", "sqlite3"]
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Parse `-X importtime` output, leaving out the interpreter's own startup (the `site` import tree).
+
+    Returns:
+    - dict: {"total_ms": sum of self times, "modules": {name: (self_ms, cumulative_ms)},
+      "top_level": {name: cumulative_ms} for the modules the measured code imports and their direct imports}
+    """
+    modules, top_level, pending, total_us = {}, {}, [], 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entry = (name.strip(), int(self_us), int(cumulative_us), depth)
+        if depth > 0:
+            pending.append(entry)   # children are printed before the module that imported them
+            continue
+        tree, pending = pending + [entry], []
+        if entry[0] == "site":
+            continue
+        for module, self_us, cumulative_us, depth in tree:
+            modules[module] = (self_us / 1000, cumulative_us / 1000)
+            total_us += self_us
+            if depth <= 1:
+                top_level[module] = cumulative_us / 1000
+    return {"total_ms": total_us / 1000, "modules": modules, "top_level": top_level}
+
+
+def run_once(code: str, extra_env: dict = None) -> tuple:
+    """Run `code` in a fresh interpreter; returns (wall seconds, parsed importtime)."""
+    env = dict(os.environ, AVIATIONSTACK_API_KEY="", PYTHONDONTWRITEBYTECODE="1", **(extra_env or {}))
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        tail = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"{code!r} failed:\n" + "\n".join(tail[-5:]))
+    return wall, parse_importtime(proc.stderr)
+
+
+def bench_scenario(code: str, extra_env: dict, runs: int, top: int) -> dict:
+    """Median wall/import time over `runs` cold starts, plus the import profile of the last run."""
+    walls, totals = [], []
+    for _ in range(runs):
+        wall, parsed = run_once(code, extra_env)
+        walls.append(wall)
+        totals.append(parsed["total_ms"])
+
+    top_level = sorted(parsed["top_level"].items(), key=lambda item: item[1], reverse=True)
+    return {
+        "wall_ms": round(statistics.median(walls) * 1000, 1),
+        "import_ms": round(statistics.median(totals), 1),
+        "modules_loaded": len(parsed["modules"]),
+        "top_imports_ms": {name: round(ms, 1) for name, ms in top_level[:top]},
+        "heavy_loaded": [name for name in HEAVY_MODULES if name in parsed["modules"]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the entry points.")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per scenario (median is reported).")
+    parser.add_argument("--top", type=int, default=8, help="Most expensive top-level imports to list.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Only run these scenarios (repeatable).")
+    parser.add_argument("--output", default="startup_results.json", help="Where to write the JSON results.")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {"commit": git_commit(), "timestamp": datetime.now(timezone.utc).isoformat(),
+                 "python": sys.version.split()[0], "params": vars(args)},
+        "scenarios": {},
+    }
+    for name in args.scenario or SCENARIOS:
+        code, extra_env = SCENARIOS[name]
+        stats = results["scenarios"][name] = bench_scenario(code, extra_env, args.runs, args.top)
+        heavy = ", ".join(stats["heavy_loaded"]) or "none"
+        print(f"✅ {name}: {stats['wall_ms']} ms wall, {stats['import_ms']} ms importing "
+              f"{stats['modules_loaded']} modules (heavy: {heavy})")
+        for module, ms in stats["top_imports_ms"].items():
+            print(f"   {ms:>8.1f} ms  {module}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
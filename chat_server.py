@@ -0,0 +1,158 @@
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+from agents.inquiry_router import InquiryRouter
+from config.settings import (CHAT_HOST, CHAT_PORT, CHAT_WORKERS, CHAT_QUEUE_SIZE, CHAT_TIMEOUT, SNAPSHOT_ENABLED,
+                             ANALYTICS_CACHE_ENABLED)
+from services import metrics
+from services.snapshot import get_manager, get_snapshot
+
+# 🌐 Async chat API in front of InquiryRouter
+# Many sessions share one router; the blocking store lookups run on a bounded thread pool,
+# each request has a timeout, and requests beyond the pool plus its queue get a 429.
+
+
+class Overloaded(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class RouterExecutor:
+    """
+    Runs `InquiryRouter.route` on a bounded thread pool.
+
+    Parameters:
+    - router (InquiryRouter): Shared router (and agents) used by every request.
+    - workers (int): Threads running blocking lookups.
+    - queue_size (int): Requests allowed to wait for a free worker before new ones are rejected.
+    - timeout (float): Seconds a request waits for its answer.
+    """
+
+    def __init__(self, router: InquiryRouter = None, workers: int = CHAT_WORKERS,
+                 queue_size: int = CHAT_QUEUE_SIZE, timeout: float = CHAT_TIMEOUT):
+        self.router = router or InquiryRouter()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat-worker")
+        self.capacity = workers + queue_size
+        self.timeout = timeout
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def _release(self, _future):
+        with self.lock:
+            self.in_flight -= 1
+
+    async def route(self, query: str) -> str:
+        """Answer one query; raises Overloaded when at capacity and asyncio.TimeoutError when too slow."""
+        with self.lock:
+            if self.in_flight >= self.capacity:
+                metrics.incr("chat_rejected")
+                raise Overloaded()
+            self.in_flight += 1
+
+        # The slot is freed when the worker finishes, not when the caller gives up,
+        # so timed-out lookups still count against capacity while they run
+        future = self.pool.submit(self.router.route, query)
+        future.add_done_callback(self._release)
+        with metrics.span("chat_request"):
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"in_flight": self.in_flight, "capacity": self.capacity}
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_app(executor: RouterExecutor = None) -> Starlette:
+    """Build the ASGI app. Pass an executor to control pool sizes or inject a router."""
+    executor = executor or RouterExecutor()
+
+    async def answer(query) -> tuple:
+        if not isinstance(query, str) or not query.strip():
+            return 400, {"error": "Send a non-empty 'query' string."}
+        try:
+            return 200, {"response": await executor.route(query)}
+        except Overloaded:
+            return 429, {"error": "Too many requests in flight, retry shortly."}
+        except asyncio.TimeoutError:
+            metrics.incr("chat_timeouts")
+            return 504, {"error": "Timed out waiting for flight data."}
+        except Exception as e:
+            metrics.incr("chat_errors", error=type(e).__name__)
+            return 500, {"error": str(e)}
+
+    async def chat(request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return JSONResponse({"error": "Body must be JSON like {\"query\": \"AI302\"}."}, status_code=400)
+        status, payload = await answer(body.get("query") if isinstance(body, dict) else None)
+        headers = {"Retry-After": "1"} if status == 429 else None
+        return JSONResponse(payload, status_code=status, headers=headers)
+
+    async def chat_ws(websocket):
+        # One session per connection: each text frame is a query, each reply carries its status
+        await websocket.accept()
+        try:
+            while True:
+                status, payload = await answer(await websocket.receive_text())
+                await websocket.send_json({"status": status, **payload})
+        except WebSocketDisconnect:
+            pass
+
+    async def suggest(request):
+        # Autocomplete / "did you mean" for flight numbers; answered from memory, so no worker is needed
+        query = request.query_params.get("q", "")
+        return JSONResponse({"query": query, "suggestions": executor.router.suggest(query)})
+
+    async def health(request):
+        caches = {"snapshot": get_manager().stats()} if SNAPSHOT_ENABLED else {}
+        if ANALYTICS_CACHE_ENABLED:
+            from services.analytics_engine import get_route_analytics
+            caches["route_analytics"] = get_route_analytics().stats()
+        return JSONResponse({"ok": True, **executor.stats(), **caches})
+
+    async def metrics_text(request):
+        return PlainTextResponse(metrics.to_prometheus())
+
+    @asynccontextmanager
+    async def lifespan(app):
+        get_snapshot()  # starts the background snapshot build when SNAPSHOT_ENABLED is set
+        if ANALYTICS_CACHE_ENABLED:
+            from services.analytics_engine import get_route_analytics
+            get_route_analytics().refresh()  # first load of the route analytics cache, in the background
+        yield
+        executor.shutdown()
+
+    return Starlette(
+        routes=[
+            Route("/chat", chat, methods=["POST"]),
+            WebSocketRoute("/ws", chat_ws),
+            Route("/suggest", suggest),
+            Route("/healthz", health),
+            Route("/metrics", metrics_text),
+        ],
+        lifespan=lifespan,
+    )
+
+
+# 🚀 Script Entry Point
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the flight assistant over HTTP and WebSocket.")
+    parser.add_argument("--host", default=CHAT_HOST)
+    parser.add_argument("--port", type=int, default=CHAT_PORT)
+    args = parser.parse_args()
+
+    print(f"🌐 Flight Assistant API on http://{args.host}:{args.port} (POST /chat, WS /ws)")
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
@@ -1,5 +1,8 @@
 # Import the InquiryRouter which handles routing of user queries to the appropriate agent
 from agents.inquiry_router import InquiryRouter
+from config.settings import METRICS_PORT, ANALYTICS_CACHE_ENABLED
+from services import metrics
+from services.snapshot import get_snapshot
 
 def chat():
     """
@@ -11,9 +14,21 @@ def chat():
     - Exits the loop when user types 'exit' or 'quit'.
     """
     print("🤖 Welcome to Flight Assistant Chatbot! Type 'exit' to quit.")
+
+    # Optionally expose timing spans and counters for scraping
+    if METRICS_PORT:
+        metrics.serve(METRICS_PORT)
+        print(f"📈 Metrics at http://127.0.0.1:{METRICS_PORT}/metrics")
     
     # Initialize the inquiry router that decides how to handle each user query
     router = InquiryRouter()
+
+    # Start building the in-memory flight snapshot in the background (no-op unless SNAPSHOT_ENABLED)
+    get_snapshot()
+    if ANALYTICS_CACHE_ENABLED:
+        # Likewise the route analytics cache (NumPy is only imported when it is enabled)
+        from services.analytics_engine import get_route_analytics
+        get_route_analytics().refresh()
     
     while True:
         # Accept user input from the terminal
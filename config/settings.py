@@ -8,8 +8,100 @@ load_dotenv()
 PROJECT_ID = os.getenv("PROJECT_ID")               # GCP Project ID
 BQ_DATASET = os.getenv("DATASET_ID")               # BigQuery dataset name
 BQ_TABLE = os.getenv("TABLE_ID")                   # BigQuery table name
+BQ_ROLLUP_TABLE = os.getenv("ROLLUP_TABLE_ID", f"{BQ_TABLE}_route_daily")  # Daily route/airline rollup table
 API_KEY = os.getenv("AVIATIONSTACK_API_KEY")       # Aviationstack API key for fetching live flight data
 
-# Validate all required environment variables are set, otherwise raise an error
-if not all([PROJECT_ID, BQ_DATASET, BQ_TABLE, API_KEY]):
-    raise ValueError("❌ Missing one or more required environment variables.")
+# 🗄️ Storage backend: "bigquery" (default) or "sqlite" for a local embedded replica
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "bigquery").lower()
+
+# ✅ Required settings are validated per capability, when that capability is first used,
+# so the chat path (which never calls the API) starts without an Aviationstack key
+def require_api_key() -> str:
+    """Return the Aviationstack API key, raising if it is not configured (ingest/refresh only)."""
+    if not API_KEY:
+        raise ValueError("❌ Missing AVIATIONSTACK_API_KEY (needed to fetch flights from the API).")
+    return API_KEY
+
+
+def require_bigquery():
+    """Raise unless the BigQuery project, dataset and table are configured (BigQuery backend/scripts only)."""
+    if not all([PROJECT_ID, BQ_DATASET, BQ_TABLE]):
+        raise ValueError("❌ Missing PROJECT_ID, DATASET_ID or TABLE_ID (needed for BigQuery).")
+
+# 📡 Aviationstack fetch tuning (optional, with sensible defaults)
+API_BASE_URL = os.getenv("AVIATIONSTACK_BASE_URL", "http://api.aviationstack.com/v1/flights")  # Overridable for offline benchmarks
+API_RATE_LIMIT = float(os.getenv("AVIATIONSTACK_RATE_LIMIT", "5"))  # Max API requests per second
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "4"))                # Concurrent page downloads
+FETCH_MAX_PAGES = int(os.getenv("FETCH_MAX_PAGES", "20"))           # Pages of 100 flights per cycle
+
+# 🛢️ BigQuery client tuning
+BQ_POOL_SIZE = int(os.getenv("BQ_POOL_SIZE", "16"))                 # HTTP connections kept open per client
+
+# 📦 BigQuery upload tuning
+LOAD_CHUNK_ROWS = int(os.getenv("LOAD_CHUNK_ROWS", "100000"))       # Max rows per load job
+
+# 🔎 Flight status lookups only scan the most recent daily partitions
+STATUS_LOOKBACK_DAYS = int(os.getenv("STATUS_LOOKBACK_DAYS", "3"))
+
+# 🧠 Flight status answer cache
+STATUS_CACHE_SIZE = int(os.getenv("STATUS_CACHE_SIZE", "2048"))             # Max cached flight numbers
+STATUS_CACHE_TTL = float(os.getenv("STATUS_CACHE_TTL", "300"))              # Seconds a found flight stays cached
+STATUS_CACHE_NEGATIVE_TTL = float(os.getenv("STATUS_CACHE_NEGATIVE_TTL", "60"))  # Seconds a miss stays cached
+
+# 🧊 Optional in-memory snapshot of recent flights answering chat lookups without a store query
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "false").lower() in ("1", "true", "yes")
+SNAPSHOT_LOOKBACK_DAYS = int(os.getenv("SNAPSHOT_LOOKBACK_DAYS", "0"))  # Days before today kept (7 also serves route trends)
+SNAPSHOT_TTL = float(os.getenv("SNAPSHOT_TTL", "900"))              # Seconds before a rebuild even without a new ingest
+
+# 📐 Route analytics ("DEL to BOM last 30 days"): NumPy columnar cache of recent days, store for older windows
+ANALYTICS_CACHE_ENABLED = os.getenv("ANALYTICS_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+ANALYTICS_CACHE_DAYS = int(os.getenv("ANALYTICS_CACHE_DAYS", "30"))    # Days before today held in memory
+ANALYTICS_MAX_DAYS = int(os.getenv("ANALYTICS_MAX_DAYS", "365"))       # Longest window answered
+
+# 💬 Max flight numbers/routes answered from one chat message
+ROUTER_MAX_ENTITIES = int(os.getenv("ROUTER_MAX_ENTITIES", "5"))
+
+# 🔖 Ingest generation marker shared by the ingest scripts and the chat/dashboard processes
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"))
+INGEST_MARKER_PATH = os.getenv("INGEST_MARKER_PATH", os.path.join(CACHE_DIR, "ingest_generation"))
+
+# 🧬 Polling ingest: content hashes of the rows last written, and how often to poll
+CHANGE_STATE_PATH = os.getenv("CHANGE_STATE_PATH", os.path.join(CACHE_DIR, "change_state.db"))
+CHANGE_STATE_RETENTION_DAYS = int(os.getenv("CHANGE_STATE_RETENTION_DAYS", "14"))  # Older flight dates are forgotten
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "300"))            # Seconds between polls in --watch mode
+
+# 🧾 Write-ahead spool of raw API pages (replayable without spending API quota)
+SPOOL_DIR = os.getenv("SPOOL_DIR", os.path.join(CACHE_DIR, "spool"))
+SPOOL_SEGMENT_BYTES = int(os.getenv("SPOOL_SEGMENT_BYTES", str(64 * 1024 * 1024)))  # Compressed bytes per segment
+SPOOL_FSYNC = os.getenv("SPOOL_FSYNC", "true").lower() in ("1", "true", "yes")        # fsync every append/ack
+
+# 🗓️ Historical backfill
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))         # Work units (date × filters) fetched in parallel
+BACKFILL_MAX_PAGES = int(os.getenv("BACKFILL_MAX_PAGES", "100"))    # Page cap per work unit
+BACKFILL_STATE_PATH = os.getenv("BACKFILL_STATE_PATH", os.path.join(CACHE_DIR, "backfill_state.json"))
+
+# 🛫 Airport dictionary: bundled CSV plus airports learned from ingested payloads
+AIRPORTS_CSV = os.getenv("AIRPORTS_CSV", os.path.join(os.path.dirname(os.path.abspath(__file__)), "airports.csv"))
+LEARNED_AIRPORTS_PATH = os.getenv("LEARNED_AIRPORTS_PATH", os.path.join(CACHE_DIR, "learned_airports.csv"))
+
+# 🔤 Known flight numbers (written by ingest) for short-circuiting unknown numbers and "did you mean" hints
+FLIGHT_INDEX_PATH = os.getenv("FLIGHT_INDEX_PATH", os.path.join(CACHE_DIR, "flight_numbers.csv"))
+SUGGEST_MAX_EDITS = int(os.getenv("SUGGEST_MAX_EDITS", "2"))        # Max edit distance of a suggestion
+SUGGEST_LIMIT = int(os.getenv("SUGGEST_LIMIT", "3"))                # Suggestions per unknown flight number
+
+# 🗄️ Local SQLite store used when STORAGE_BACKEND=sqlite
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(CACHE_DIR, "flights.db"))
+
+# 📈 Instrumentation: collect spans/counters (near-zero overhead when off) and optionally serve them
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))                  # 0 disables the /metrics endpoint
+
+# 🌐 Chat API server (chat_server.py)
+CHAT_HOST = os.getenv("CHAT_HOST", "127.0.0.1")
+CHAT_PORT = int(os.getenv("CHAT_PORT", "8000"))
+CHAT_WORKERS = int(os.getenv("CHAT_WORKERS", "32"))                 # Threads running blocking store lookups
+CHAT_QUEUE_SIZE = int(os.getenv("CHAT_QUEUE_SIZE", "256"))          # Requests waiting for a worker before 429s
+CHAT_TIMEOUT = float(os.getenv("CHAT_TIMEOUT", "10"))               # Seconds per request before a 504
+
+# 📊 Dashboard query cache lifetime in seconds
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "300"))
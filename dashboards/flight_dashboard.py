@@ -1,22 +1,23 @@
 import os
+import sys
 import streamlit as st
-from google.cloud import bigquery
-from dotenv import load_dotenv
 import pandas as pd
-import requests
-from datetime import datetime
-import time
+from datetime import date, timedelta
 
-# 🔧 Load environment variables from .env file
-load_dotenv()
+# 🛠️ Make the project root importable when launched via `streamlit run`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# 📌 Project and table configurations
-PROJECT_ID = os.getenv("PROJECT_ID")
-BQ_DATASET = os.getenv("DATASET_ID")
-BQ_TABLE = os.getenv("TABLE_ID")
-TABLE_ID = f"{PROJECT_ID}.{BQ_DATASET}.{BQ_TABLE}"
-API_KEY = os.getenv("AVIATIONSTACK_API_KEY")
-BASE_URL = "http://api.aviationstack.com/v1/flights"
+from services.refresh import RefreshManager
+from storage import get_store
+
+# 🔧 Environment variables are loaded by config.settings (the API key is checked when a refresh starts)
+from config.settings import DASHBOARD_CACHE_TTL
+
+# 📋 Columns shown in the flight table (only these are fetched)
+TABLE_COLUMNS = [
+    "flight_date", "flight_number", "airline_name", "departure_iata", "arrival_iata",
+    "status", "scheduled_departure", "scheduled_arrival",
+]
 
 # 🎨 Streamlit UI Configuration
 st.set_page_config(layout="wide", page_title="✈️ Flight Tracker Dashboard")
@@ -47,117 +48,118 @@ set_bg()
 # 📌 Page Title
 st.markdown('<div class="title">✈️ Flight Dashboard (Live Update)</div>', unsafe_allow_html=True)
 
-# 🧩 Utility Functions
-
-def parse_ts(ts):
-    """Convert ISO timestamp to a human-readable ISO string."""
-    try:
-        dt = datetime.fromisoformat(ts.replace("Z", "+00:00")) if ts else None
-        return dt.isoformat() if dt else None
-    except:
-        return None
-
-def format_row(item):
-    """Format a single API response record to match BigQuery schema."""
-    return {
-        "flight_date": item.get("flight_date"),
-        "airline_name": item.get("airline", {}).get("name"),
-        "flight_number": item.get("flight", {}).get("iata"),
-        "departure_airport": item.get("departure", {}).get("airport"),
-        "arrival_airport": item.get("arrival", {}).get("airport"),
-        "status": item.get("flight_status"),
-        "scheduled_departure": parse_ts(item.get("departure", {}).get("scheduled")),
-        "scheduled_arrival": parse_ts(item.get("arrival", {}).get("scheduled")),
-    }
-
-def refresh_data_from_aviationstack():
-    """
-    Fetch latest flight data from the Aviationstack API,
-    format it, and push to BigQuery after removing duplicates.
-    """
-    try:
-        all_flights = []
-        # 🔁 Fetch 200 records in two batches (due to API limits)
-        for offset in [0, 100]:
-            params = {"access_key": API_KEY, "limit": 100, "offset": offset}
-            r = requests.get(BASE_URL, params=params)
-            r.raise_for_status()
-            all_flights += r.json().get("data", [])
-            time.sleep(1)  # pause to respect rate limit
-
-        # 🧹 Clean & format data
-        rows = [format_row(f) for f in all_flights if f and f.get("flight", {}).get("iata")]
-
-        # 🛢️ BigQuery client and duplicate cleanup
-        client = bigquery.Client()
-        unique_keys = {(r['flight_date'], r['flight_number']) for r in rows if r['flight_date'] and r['flight_number']}
-
-        # ❌ Delete duplicates before insertion
-        for flight_date, flight_number in unique_keys:
-            delete_sql = f"""
-                DELETE FROM `{TABLE_ID}`
-                WHERE flight_date = @flight_date AND flight_number = @flight_number
-            """
-            job_config = bigquery.QueryJobConfig(
-                query_parameters=[
-                    bigquery.ScalarQueryParameter("flight_date", "DATE", flight_date),
-                    bigquery.ScalarQueryParameter("flight_number", "STRING", flight_number),
-                ]
-            )
-            client.query(delete_sql, job_config=job_config).result()
-
-        # ⬆️ Insert new rows to BigQuery
-        errors = client.insert_rows_json(TABLE_ID, rows)
-        return len(rows), errors
-    except Exception as e:
-        return 0, str(e)
-
-# 🔄 Cache BigQuery Data
-@st.cache_data(show_spinner=False)
-def load_data_from_bigquery():
-    """Load the latest 300 flight records from BigQuery."""
-    client = bigquery.Client()
-    query = f"""
-        SELECT * FROM `{TABLE_ID}`
-        ORDER BY scheduled_departure DESC
-        LIMIT 300
-    """
-    
-    # Query to fetch all the data from the Table in Bigquery
-    # query = f"SELECT * FROM `{TABLE_ID}` ORDER BY scheduled_departure DESC"
-
-    return client.query(query).to_dataframe()
-
-# 🔘 Button to fetch latest data from Aviationstack API
+# 🧩 Background Refresh
+# One refresh manager per server process, shared by every browser session.
+
+@st.cache_resource
+def get_refresh_manager():
+    """Process-wide single-flight manager for Aviationstack refreshes."""
+    return RefreshManager()
+
+refresher = get_refresh_manager()
+
+# 🔄 Cached Store Queries
+# Every loader is keyed on the selected filters and the refresh `data_version`, and expires
+# after DASHBOARD_CACHE_TTL seconds. A finished refresh bumps the version, which swaps every
+# session over to fresh results at once while older entries simply age out.
+# Aggregates run in the store over the full window; only the visible table page is fetched.
+
+@st.cache_data(show_spinner=False, ttl=DASHBOARD_CACHE_TTL)
+def load_summary(start_date, end_date, data_version):
+    """Headline numbers for the selected window."""
+    return get_store().window_summary(start_date, end_date)
+
+@st.cache_data(show_spinner=False, ttl=DASHBOARD_CACHE_TTL)
+def load_status_breakdown(start_date, end_date, data_version):
+    """Flight counts per status over the selected window."""
+    return pd.DataFrame(get_store().status_breakdown(start_date, end_date), columns=["status", "flights"])
+
+@st.cache_data(show_spinner=False, ttl=DASHBOARD_CACHE_TTL)
+def load_flights_page(start_date, end_date, data_version, cursor, page_size):
+    """One keyset-paginated page of the flight table, projected to TABLE_COLUMNS."""
+    rows = get_store().flights_page(TABLE_COLUMNS, start_date, end_date, cursor=cursor, limit=page_size)
+    return pd.DataFrame(rows, columns=TABLE_COLUMNS)
+
+# 🔘 Button to fetch latest data from Aviationstack API (runs in the background)
 if st.button("🔁 Refresh Flight Data from Aviationstack"):
-    with st.spinner("Fetching live data from API..."):
-        inserted, errors = refresh_data_from_aviationstack()
-        st.cache_data.clear()  # clear cache to refresh UI
-        if errors == []:
-            st.success(f"✅ {inserted} rows inserted into BigQuery.")
-        else:
-            st.error(f"❌ Error uploading data: {errors}")
+    if not refresher.start():
+        st.info("ℹ️ A refresh is already running — following its progress.")
+
+@st.fragment(run_every=2)
+def refresh_progress():
+    """Poll the background refresh and rerun the page once fresh data is available."""
+    status = refresher.status()
+    if status["running"]:
+        st.info(f"⏳ Refreshing: {status['pages']} pages fetched, {status['flights']} flights, "
+                f"{status['rows_upserted']} rows upserted. Showing cached data meanwhile.")
+    elif status["error"]:
+        st.error(f"❌ Error uploading data: {status['error']}")
+    elif status["stats"]:
+        stats = status["stats"]
+        st.success(f"✅ {stats['inserted']} inserted, {stats['updated']} updated, "
+                   f"{stats['unchanged']} unchanged.")
+
+    # Swap to the new data version once, for this session, when a job completes
+    if st.session_state.setdefault("data_version", status["version"]) != status["version"]:
+        st.session_state["data_version"] = status["version"]
+        st.rerun()
+
+refresh_progress()
+data_version = st.session_state["data_version"]
+
+# 🎛️ Filters
+
+days = st.sidebar.slider("Window (days)", min_value=1, max_value=30, value=7)
+page_size = st.sidebar.selectbox("Rows per page", [50, 100, 300], index=1)
+end_date = date.today()
+start_date = end_date - timedelta(days=days - 1)
+window = (start_date.isoformat(), end_date.isoformat())
+
+# Keyset cursors: one (scheduled_departure, flight_number) per page visited; reset when filters change
+if st.session_state.get("page_filters") != (window, page_size):
+    st.session_state["page_filters"] = (window, page_size)
+    st.session_state["cursors"] = [None]
 
 # 📊 Load and Display Dashboard Data
 
 try:
-    df = load_data_from_bigquery()
+    summary = load_summary(*window, data_version)
 
-    if df.empty:
+    if not summary["flights"]:
         st.warning("No data available.")
     else:
-        # 📋 Show Raw Data Table
+        # 🔢 Headline Numbers
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Flights", f"{summary['flights']:,}")
+        col2.metric("Airlines", summary["airlines"])
+        col3.metric("Routes", summary["routes"])
+        avg_duration = summary["avg_duration"]
+        col4.metric("Avg duration", f"{int(avg_duration)} min" if avg_duration is not None else "N/A")
+
+        # 📋 Show Flight Table (one page at a time)
         st.markdown("### 📋 Flight Table")
+        cursors = st.session_state["cursors"]
+        df = load_flights_page(*window, data_version, cursors[-1], page_size)
         st.dataframe(df, use_container_width=True)
 
-        # 🥧 Display Status Breakdown
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        page_col.caption(f"Page {len(cursors)}")
+        if prev_col.button("⬅️ Previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+        if next_col.button("Next ➡️", disabled=len(df) < page_size):
+            last = df.iloc[-1]
+            cursors.append((str(last["scheduled_departure"]), last["flight_number"]))
+            st.rerun()
+
+        # 🥧 Display Status Breakdown over the whole window
         st.markdown("### 🧭 Pie Chart: Status")
-        counts = df["status"].value_counts()
+        counts = load_status_breakdown(*window, data_version)
         st.plotly_chart({
             "data": [{
                 "type": "pie",
-                "labels": counts.index.tolist(),
-                "values": counts.values.tolist()
+                "labels": counts["status"].fillna("unknown").tolist(),
+                "values": counts["flights"].tolist()
             }],
             "layout": {
                 "title": "Flight Status Overview",
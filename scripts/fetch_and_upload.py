@@ -1,129 +1,300 @@
 import os
-import requests
-from google.cloud import bigquery
-from dotenv import load_dotenv
-from datetime import datetime
+import sys
 import time
+import signal
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# 🔧 Load Environment Variables
+# 🛠️ Make the project root importable when run as `python scripts/fetch_and_upload.py`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-load_dotenv()  # Loads variables from a .env file
+# 🔧 Environment variables are loaded by config.settings and validated per command below
+from config.settings import (API_KEY, FETCH_MAX_PAGES, POLL_INTERVAL, BACKFILL_WORKERS, BACKFILL_MAX_PAGES,
+                             BACKFILL_STATE_PATH, require_api_key)
+from services import metrics
+from services.aviationstack import AviationstackClient, get_api_client
+from services.backfill import plan_units, BackfillCheckpoint, BackfillProgress
+from services.change_tracker import ChangeTracker
+from services.spool import Spool
+from services.ingest import ingest_pages, ingest_rows, UPLOAD_MODES
+from services.transform import rows_from_flights
 
-# Extract environment variables needed for API and BigQuery access
-API_KEY = os.getenv("AVIATIONSTACK_API_KEY")
-PROJECT_ID = os.getenv("PROJECT_ID")
-BQ_DATASET = os.getenv("DATASET_ID")
-BQ_TABLE = os.getenv("TABLE_ID")
-TABLE_ID = f"{PROJECT_ID}.{BQ_DATASET}.{BQ_TABLE}"
+# Default rows per upload batch, so BigQuery work overlaps with the remaining page downloads
+UPLOAD_BATCH_SIZE = 5000
 
-# Validate that all necessary environment variables are set
-if not all([API_KEY, PROJECT_ID, BQ_DATASET, BQ_TABLE]):
-    raise ValueError("❌ Missing one or more environment variables.")
+# ☁️ Upload Flight Data to BigQuery
+
+def upload_to_bigquery(flights, mode="merge", tracker=None):
+    """
+    Upload flight data to the configured store (BigQuery by default).
+    In `merge` mode the batch is upserted keyed on (flight_date, flight_number) to avoid duplication;
+    `append` bulk-loads it as-is (for backfills).
+    With a `tracker`, rows identical to the version last written are skipped before upload.
+    Refreshes the route rollup and bumps the ingest generation so cached answers elsewhere are invalidated.
+    Returns the inserted/updated/unchanged counts and bytes uploaded.
+    """
+    # 🧾 Columnar transform: drops rows without an IATA number and dedupes in memory
+    rows = rows_from_flights(flights)
+
+    if not rows:
+        print("⚠️ No valid rows to upload.")
+        return None
+
+    # 🧬 Forward only new or changed rows; skipped rows count as unchanged
+    skipped = 0
+    if tracker is not None:
+        rows, skipped = tracker.filter_changed(rows)
+        if not rows:
+            print(f"💤 All {skipped} rows unchanged since the last poll, nothing to upload.")
+            return {"inserted": 0, "updated": 0, "unchanged": skipped, "bytes": 0}
+
+    started = time.perf_counter()
+    stats = ingest_rows(rows, mode=mode)
+    elapsed = time.perf_counter() - started
 
-# Base URL for Aviationstack API
-BASE_URL = "http://api.aviationstack.com/v1/flights"
+    if tracker is not None:
+        tracker.commit(rows)
+        stats = {**stats, "unchanged": stats["unchanged"] + skipped}
 
-# 📡 Fetch Flights from Aviationstack API
+    print(f"✅ Uploaded {len(rows)} rows ({mode}): {stats['inserted']} inserted, "
+          f"{stats['updated']} updated, {stats['unchanged']} unchanged — "
+          f"{len(rows) / elapsed:,.0f} rows/sec, {stats.get('bytes', 0):,} bytes uploaded.")
+    return stats
 
-def fetch_flights(limit=100, offset=0):
+# 🧰 Command-line options
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch live flights from Aviationstack and upload them.")
+    parser.add_argument("--pages", type=int, default=FETCH_MAX_PAGES,
+                        help="Max pages of 100 flights to fetch.")
+    parser.add_argument("--upload-mode", choices=UPLOAD_MODES, default="merge",
+                        help="'merge' (default) upserts on (flight_date, flight_number), so re-fetched "
+                             "flights are updated rather than duplicated; 'append' bulk-loads compressed "
+                             "NDJSON with load jobs, without reconciling existing rows.")
+    parser.add_argument("--chunk-size", type=int, default=UPLOAD_BATCH_SIZE,
+                        help="Rows per upload batch; each batch is submitted as a single load job.")
+    parser.add_argument("--metrics-out", default=None,
+                        help="Collect timing spans and BigQuery job stats and write them to this JSON file.")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep polling and upload only new or changed rows (stop with Ctrl+C or SIGTERM).")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL,
+                        help="Seconds between polls in --watch mode.")
+
+    commands = parser.add_subparsers(dest="command")
+    replay_parser = commands.add_parser("replay", help="Re-upload spooled API pages without calling the API.")
+    replay_parser.add_argument("--all", action="store_true", dest="include_acked",
+                               help="Replay every spooled page, not just unacknowledged ones.")
+    replay_parser.add_argument("--purge", action="store_true",
+                               help="Delete segments whose pages are all acknowledged afterwards.")
+
+    backfill_parser = commands.add_parser(
+        "backfill", help="Fetch and upload historical flight dates.",
+        description="Uploads use --upload-mode (default 'merge', so re-running a partly uploaded unit "
+                    "does not duplicate its flights); both modes write with load jobs.")
+    backfill_parser.add_argument("--start", required=True, help="First flight date (YYYY-MM-DD).")
+    backfill_parser.add_argument("--end", required=True, help="Last flight date (YYYY-MM-DD).")
+    backfill_parser.add_argument("--airline", action="append", help="Airline IATA code filter (repeatable).")
+    backfill_parser.add_argument("--dep", action="append", help="Departure airport IATA filter (repeatable).")
+    backfill_parser.add_argument("--arr", action="append", help="Arrival airport IATA filter (repeatable).")
+    backfill_parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS,
+                                 help="Work units fetched in parallel (all share the API rate limit).")
+    backfill_parser.add_argument("--max-pages", type=int, default=BACKFILL_MAX_PAGES,
+                                 help="Max pages of 100 flights per work unit.")
+    backfill_parser.add_argument("--checkpoint", default=BACKFILL_STATE_PATH,
+                                 help="State file recording finished units.")
+    return parser.parse_args()
+
+# 🔁 One Fetch-and-Upload Cycle
+
+def upload_pages(pages, upload_mode="merge", chunk_size=UPLOAD_BATCH_SIZE, tracker=None, spool=None,
+                 purge=False):
     """
-    Fetch a list of flights from the Aviationstack API with pagination support.
-    `limit`: max records to fetch (API allows up to 100).
-    `offset`: offset for paginated data.
+    Upload `(record_id, raw page)` pairs in batches of `chunk_size` flights (see `ingest_pages`).
+    Once a batch is written, its pages are acknowledged in the spool; if it fails they
+    stay pending for `replay`. With `purge`, fully acknowledged segments are deleted after each ack.
+    Returns a summary with rows, changed rows, bytes uploaded and elapsed seconds.
     """
-    params = {
-        "access_key": API_KEY,
-        "limit": limit,
-        "offset": offset
-    }
-    response = requests.get(BASE_URL, params=params)
-    response.raise_for_status()
-    return response.json().get("data", [])
-
-# 🕒 Parse ISO Timestamp to Standard Format
-
-def parse_ts(ts):
+    def upload(flights):
+        print(f"📦 Uploading a batch of {len(flights)} flights...")
+        return upload_to_bigquery(flights, mode=upload_mode, tracker=tracker)
+
+    return ingest_pages(pages, upload, chunk_size, spool=spool, purge=purge)
+
+
+def run(pages=FETCH_MAX_PAGES, upload_mode="merge", chunk_size=UPLOAD_BATCH_SIZE, tracker=None, spool=None,
+        purge=False):
     """
-    Convert ISO-formatted timestamp to string.
-    Handles nulls and Zulu time.
+    Fetch up to `pages` pages and upload them in batches of `chunk_size` flights.
+    Pages stream in concurrently, so uploads start before the last page arrives.
+    Every raw page is written to the local spool before it is processed
+    (and, with `purge`, dropped from it once its whole segment is acknowledged).
     """
+    api = get_api_client()
+    own_spool = spool is None
+    spool = spool or Spool()
+
+    def fetched():
+        for page in api.iter_pages(max_pages=pages):
+            yield spool.append(page), page
+
+    print(f"📡 Fetching up to {pages} pages of flights...")
     try:
-        dt = datetime.fromisoformat(ts.replace("Z", "+00:00")) if ts else None
-        return dt.isoformat() if dt else None
-    except Exception:
-        return None
+        return upload_pages(fetched(), upload_mode=upload_mode, chunk_size=chunk_size, tracker=tracker,
+                            spool=spool, purge=purge)
+    finally:
+        if own_spool:
+            spool.close()
 
-# 🧾 Format Flight Data for BigQuery Upload
 
-def format_row(item):
+def replay(include_acked=False, upload_mode="merge", chunk_size=UPLOAD_BATCH_SIZE, purge=False, spool=None):
     """
-    Convert each flight JSON object into a dict formatted for BigQuery schema.
+    Re-upload spooled pages without calling the API: unacknowledged ones by default,
+    or the whole archive with `include_acked`. Segments are read through mmap page by page.
     """
-    return {
-        "flight_date": item.get("flight_date"),
-        "airline_name": item.get("airline", {}).get("name"),
-        "flight_number": item.get("flight", {}).get("iata"),
-        "departure_airport": item.get("departure", {}).get("airport"),
-        "arrival_airport": item.get("arrival", {}).get("airport"),
-        "status": item.get("flight_status"),
-        "scheduled_departure": parse_ts(item.get("departure", {}).get("scheduled")),
-        "scheduled_arrival": parse_ts(item.get("arrival", {}).get("scheduled")),
-    }
+    spool = spool or Spool()
+    print(f"📼 Replaying {'all' if include_acked else 'unacknowledged'} spooled pages from {spool.directory}...")
+    pages = ((record_id, record["payload"]) for record_id, record in spool.iter_records(include_acked=include_acked))
+    summary = upload_pages(pages, upload_mode=upload_mode, chunk_size=chunk_size, spool=spool)
+    if purge:
+        print(f"🧹 Removed {spool.purge_acked()} fully acknowledged segments.")
+    return summary
 
-# ☁️ Upload Flight Data to BigQuery
+# 🗓️ Historical Backfill
 
-def upload_to_bigquery(flights):
+def backfill(start, end, airlines=None, deps=None, arrs=None, workers=BACKFILL_WORKERS,
+             max_pages=BACKFILL_MAX_PAGES, upload_mode="merge", chunk_size=UPLOAD_BATCH_SIZE,
+             checkpoint_path=BACKFILL_STATE_PATH, spool=None):
     """
-    Upload flight data to BigQuery.
-    Deletes existing rows for same (flight_date, flight_number) to avoid duplication.
+    Fetch and upload every flight date in [start, end] (optionally filtered by airline/airport).
+    Work units run on a pool of `workers` and share one rate-limited API client; finished
+    units are checkpointed, so re-running the same command resumes an interrupted backfill.
+    Uploads default to `merge`: a unit that failed midway is re-fetched in full by the next run, and
+    the upsert keeps those flights from being duplicated. `append` is faster for ranges known to be
+    empty. Both modes write through load jobs, never streaming inserts.
+    Returns the completed and failed unit counts and the flights fetched by completed units.
     """
-    client = bigquery.Client()
-    rows = [format_row(item) for item in flights if item and item.get("flight", {}).get("iata")]
+    units = plan_units(start, end, airlines, deps, arrs)
+    checkpoint = BackfillCheckpoint(checkpoint_path)
+    todo = [unit for unit in units if not checkpoint.is_done(unit["key"])]
+    print(f"🗓️ Backfill {start} → {end}: {len(units)} units, {len(units) - len(todo)} already done.")
+    if not todo:
+        return {"units": 0, "failed": 0, "flights": 0}
 
-    if not rows:
-        print("⚠️ No valid rows to upload.")
-        return
-
-    # Deduplicate based on (flight_date, flight_number)
-    unique_keys = {(r['flight_date'], r['flight_number']) for r in rows if r['flight_date'] and r['flight_number']}
-    for flight_date, flight_number in unique_keys:
-        delete_sql = f"""
-        DELETE FROM `{TABLE_ID}`
-        WHERE flight_date = @flight_date AND flight_number = @flight_number
-        """
-        job_config = bigquery.QueryJobConfig(
-            query_parameters=[
-                bigquery.ScalarQueryParameter("flight_date", "DATE", flight_date),
-                bigquery.ScalarQueryParameter("flight_number", "STRING", flight_number),
-            ]
-        )
-        client.query(delete_sql, job_config=job_config).result()
-
-    # Insert fresh data
-    errors = client.insert_rows_json(TABLE_ID, rows)
-
-    if not errors:
-        print(f"✅ Inserted {len(rows)} rows successfully.")
-    else:
-        print("❌ Insert errors:", errors)
+    # One client = one token bucket for all workers; pages inside a unit are fetched one at a time
+    api = AviationstackClient(API_KEY, workers=1)
+    own_spool = spool is None
+    spool = spool or Spool()
+    progress = BackfillProgress(len(todo))
 
-# 🚀 Script Entry Point
+    def run_unit(unit):
+        def fetched():
+            for page in api.iter_pages(max_pages=max_pages, params=unit["params"]):
+                yield spool.append(page, params=unit["params"]), page
 
-if __name__ == "__main__":
+        summary = upload_pages(fetched(), upload_mode=upload_mode, chunk_size=chunk_size, spool=spool)
+        checkpoint.mark_done(unit["key"], summary["fetched"])
+        return summary
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill")
     try:
-        all_flights = []
+        futures = {pool.submit(run_unit, unit): unit for unit in todo}
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                # The unit stays unchecked and is retried by the next run
+                print(f"❌ Unit {futures[future]['key']} failed: {e}")
+                print(progress.update(failed=True))
+                continue
+            print(progress.update(summary["fetched"]))
+    except KeyboardInterrupt:
+        print("🛑 Interrupted; finished units are checkpointed. Re-run the same command to resume.")
+        raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        if own_spool:
+            spool.close()
+
+    return {"units": progress.units, "failed": progress.failed, "flights": progress.flights}
 
-        # Fetch first 100 flights
-        print("📡 Fetching first 100 flights...")
-        all_flights += fetch_flights(limit=100, offset=0)
-        time.sleep(1)  # To avoid rate limiting
+# 👀 Polling Mode
 
-        # Fetch next 100 flights
-        print("📡 Fetching next 100 flights...")
-        all_flights += fetch_flights(limit=100, offset=100)
+def watch(interval=POLL_INTERVAL, pages=FETCH_MAX_PAGES, upload_mode="merge", chunk_size=UPLOAD_BATCH_SIZE,
+          tracker=None, stop=None):
+    """
+    Poll the API every `interval` seconds and upload only rows that changed since they were last written.
+    The key → hash map survives restarts. SIGINT/SIGTERM finish the current cycle and then exit.
+    One spool segment is written across cycles; acknowledged segments are purged as the poller goes,
+    so the spool only holds pages that still await an upload.
+    """
+    tracker = tracker or ChangeTracker()
+    spool = Spool()
+    stop = stop or threading.Event()
 
-        print(f"📦 Retrieved {len(all_flights)} flights. Uploading to BigQuery...")
-        upload_to_bigquery(all_flights)
+    def request_stop(signum, frame):
+        print("🛑 Stopping after the current cycle...")
+        stop.set()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+    print(f"👀 Polling every {interval:g}s ({len(tracker):,} rows already tracked). Ctrl+C to stop.")
+    cycle = 0
+    while not stop.is_set():
+        cycle += 1
+        try:
+            summary = run(pages=pages, upload_mode=upload_mode, chunk_size=chunk_size, tracker=tracker,
+                          spool=spool, purge=True)
+            unchanged = summary["rows"] - summary["changed"]
+            ratio = summary["changed"] / summary["rows"] if summary["rows"] else 0.0
+            print(f"🔁 Cycle {cycle}: {summary['changed']} changed / {unchanged} unchanged "
+                  f"({ratio:.1%} changed), {summary['bytes']:,} bytes uploaded in {summary['seconds']:.1f}s.")
+            tracker.prune()
+        except Exception as e:
+            # Keep polling: the rows of a failed batch were not committed, so they are retried next cycle
+            print(f"❌ Cycle {cycle} failed: {e}")
+        stop.wait(interval)
+
+    tracker.close()
+    spool.close()
+    print("👋 Poller stopped.")
+
+# 🚀 Script Entry Point
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.metrics_out:
+        metrics.enable()
+    try:
+        if args.command != "replay":
+            require_api_key()  # replaying the spool needs no API access
+        if args.command == "replay":
+            summary = replay(include_acked=args.include_acked, upload_mode=args.upload_mode,
+                             chunk_size=args.chunk_size, purge=args.purge)
+            print(f"🏁 Replayed {summary['fetched']} flights: {summary['rows']} rows, "
+                  f"{summary['changed']} written in {summary['seconds']:.1f}s.")
+        elif args.command == "backfill":
+            result = backfill(args.start, args.end, args.airline, args.dep, args.arr, workers=args.workers,
+                              max_pages=args.max_pages, upload_mode=args.upload_mode,
+                              chunk_size=args.chunk_size, checkpoint_path=args.checkpoint)
+            print(f"🏁 Backfill done: {result['flights']:,} flights over {result['units']} units.")
+            if result["failed"]:
+                print(f"❌ {result['failed']} units failed; re-run the same command to retry them.")
+                sys.exit(1)
+        elif args.watch:
+            watch(interval=args.interval, pages=args.pages, upload_mode=args.upload_mode, chunk_size=args.chunk_size)
+        else:
+            summary = run(pages=args.pages, upload_mode=args.upload_mode, chunk_size=args.chunk_size)
+            print(f"🏁 Done: {summary['rows']} rows in {summary['seconds']:.1f}s "
+                  f"({summary['rows'] / summary['seconds']:,.0f} rows/sec end-to-end, "
+                  f"{summary['bytes']:,} bytes uploaded).")
 
     except Exception as e:
         print("❌ Failed:", e)
+
+    finally:
+        if args.metrics_out:
+            metrics.dump_json(args.metrics_out)
+            print(f"📈 Metrics written to {args.metrics_out}")
@@ -17,7 +17,12 @@ load_dotenv()
 
 from google.cloud import bigquery
 from google.api_core.exceptions import NotFound
-from config.settings import PROJECT_ID, BQ_DATASET, BQ_TABLE
+from config.settings import PROJECT_ID, BQ_DATASET, BQ_TABLE, BQ_ROLLUP_TABLE
+from services.airports import get_airport_index
+from services.bigquery_client import get_client
+from services.schema import (FLIGHT_SCHEMA, ROUTE_ROLLUP_SCHEMA, PARTITION_FIELD,
+                             CLUSTER_FIELDS, ROLLUP_CLUSTER_FIELDS)
+from storage.bigquery_store import BigQueryFlightStore
 
 # ✅ Validate that required environment variables are loaded
 
@@ -27,47 +32,190 @@ if not all([PROJECT_ID, BQ_DATASET, BQ_TABLE]):
 
 # 🔌 Create BigQuery client
 
-client = bigquery.Client(project=PROJECT_ID)
+client = get_client()
 table_id = f"{PROJECT_ID}.{BQ_DATASET}.{BQ_TABLE}"
+rollup_id = f"{PROJECT_ID}.{BQ_DATASET}.{BQ_ROLLUP_TABLE}"
+
+# 🧾 Define the schemas for the tables
+# The structure of flight records is shared with the ingest path via services/schema.py
+
+schema = [bigquery.SchemaField(name, field_type) for name, field_type in FLIGHT_SCHEMA]
+rollup_schema = [bigquery.SchemaField(name, field_type) for name, field_type in ROUTE_ROLLUP_SCHEMA]
+
+# 🔬 Sample point lookup used to compare bytes scanned before and after the layout change
+SAMPLE_QUERY = """
+    SELECT * FROM `{table}`
+    WHERE flight_number = 'AI302' AND flight_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 3 DAY)
+"""
+
+
+def bytes_scanned(table_id):
+    """Dry-run the sample query against `table_id` and return the bytes it would process."""
+    job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+    return client.query(SAMPLE_QUERY.format(table=table_id), job_config=job_config).total_bytes_processed
+
+
+def is_laid_out(table, cluster_fields):
+    """True when the table is partitioned by flight_date and clustered on `cluster_fields`."""
+    partitioning = table.time_partitioning
+    return (partitioning is not None and partitioning.field == PARTITION_FIELD
+            and list(table.clustering_fields or []) == cluster_fields)
+
+
+def ensure_table(table_id, schema, cluster_fields):
+    """
+    Try to get the table. If it exists, check/update schema.
+    If not, create the table from scratch, partitioned by flight_date and clustered.
+    Returns (table, created).
+    """
+    try:
+        table = client.get_table(table_id)
+        print(f"ℹ️ Table already exists: {table_id}")
+
+        # 🔍 Check if schema has changed and needs updating
+        existing_fields = {field.name for field in table.schema}
+        new_fields = [field for field in schema if field.name not in existing_fields]
+
+        if new_fields:
+            updated_schema = table.schema + new_fields
+            table.schema = updated_schema
+            table = client.update_table(table, ["schema"])
+            print("✅ Table schema updated.")
+        else:
+            print("✅ Table schema already matches.")
+        return table, False
+
+    except NotFound:
+        # 🆕 Table doesn't exist; create it
+        table = bigquery.Table(table_id, schema=schema)
+        table.time_partitioning = bigquery.TimePartitioning(field=PARTITION_FIELD)
+        table.clustering_fields = cluster_fields
+        table = client.create_table(table)
+        print(f"✅ Table created successfully: {table_id}")
+        return table, True
+
+
+# 🛫 Backfills the IATA code columns of rows written before they existed: airport names are
+# resolved through the airport index, airlines by the code other rows of the same airline carry
+# (else the flight number prefix, e.g. "AI" of "AI302")
+FILL_CODES_QUERY = """
+    CREATE OR REPLACE TABLE `{new}`
+    PARTITION BY {partition}
+    CLUSTER BY {cluster}
+    AS
+    WITH airports AS (
+        SELECT name, @codes[OFFSET(i)] AS code FROM UNNEST(@names) AS name WITH OFFSET i
+    ),
+    airlines AS (
+        SELECT airline_name, ANY_VALUE(airline_iata) AS code
+        FROM `{source}`
+        WHERE airline_iata IS NOT NULL
+        GROUP BY airline_name
+    )
+    SELECT f.* REPLACE (
+        COALESCE(f.departure_iata, dep.code) AS departure_iata,
+        COALESCE(f.arrival_iata, arr.code) AS arrival_iata,
+        COALESCE(f.airline_iata, airline.code, REGEXP_EXTRACT(f.flight_number, r'^([A-Z0-9]{{2}})[0-9]')) AS airline_iata
+    )
+    FROM `{source}` AS f
+    LEFT JOIN airports AS dep ON dep.name = f.departure_airport
+    LEFT JOIN airports AS arr ON arr.name = f.arrival_airport
+    LEFT JOIN airlines AS airline ON airline.airline_name = f.airline_name
+"""
+
+
+def table_exists(table_id):
+    try:
+        client.get_table(table_id)
+        return True
+    except NotFound:
+        return False
+
+
+def airport_codes(table_id):
+    """IATA code for every airport name in `table_id` whose row has no code yet (names the index cannot resolve are left out)."""
+    query = f"""
+        SELECT departure_airport AS name FROM `{table_id}` WHERE departure_iata IS NULL
+        UNION DISTINCT
+        SELECT arrival_airport AS name FROM `{table_id}` WHERE arrival_iata IS NULL
+    """
+    airports = get_airport_index()
+    codes = {}
+    for row in client.query(query).result():
+        code = airports.resolve_name(row["name"] or "")
+        if code:
+            codes[row["name"]] = code
+    return codes
+
+
+def finish_swap(table_id):
+    """Put the migrated copy in place of `table_id` (also completes a swap interrupted by an earlier run)."""
+    new_id = f"{table_id}_partitioned"
+    client.copy_table(new_id, table_id).result()
+    client.delete_table(new_id)
+
+
+def migrate_layout(table_id, cluster_fields):
+    """
+    Rewrite an existing flat table into a partitioned, clustered copy with its IATA code columns
+    filled in, and swap it in. BigQuery cannot re-partition in place (CREATE OR REPLACE refuses a
+    different partitioning spec), so:
+
+    1. the live table is copied to `<table>_unpartitioned` (kept as a backup),
+    2. `<table>_partitioned` is built from that backup, with the codes filled in,
+    3. the live table is dropped and the new one copied into its name in a single copy job.
+
+    Only step 3 leaves the table briefly missing; if it fails, the next run finishes it.
+    """
+    project_dataset, name = table_id.rsplit(".", 1)
+    new_id = f"{table_id}_partitioned"
+    backup_id = f"{project_dataset}.{name}_unpartitioned"
+
+    copy_config = bigquery.CopyJobConfig(write_disposition="WRITE_TRUNCATE")
+    client.copy_table(table_id, backup_id, job_config=copy_config).result()
+
+    codes = airport_codes(backup_id)
+    job_config = bigquery.QueryJobConfig(query_parameters=[
+        bigquery.ArrayQueryParameter("names", "STRING", list(codes)),
+        bigquery.ArrayQueryParameter("codes", "STRING", list(codes.values())),
+    ])
+    client.query(FILL_CODES_QUERY.format(new=new_id, source=backup_id, partition=PARTITION_FIELD,
+                                         cluster=", ".join(cluster_fields)), job_config=job_config).result()
+
+    client.delete_table(table_id)
+    finish_swap(table_id)
+    print(f"✅ Migrated {table_id} to a partitioned, clustered layout with {len(codes)} airport names "
+          f"resolved to IATA codes (old table kept as {backup_id}; drop it once verified).")
 
-# 🧾 Define the schema for the table
-# This defines the structure of flight records stored in BigQuery
-
-schema = [
-    bigquery.SchemaField("flight_date", "DATE"),
-    bigquery.SchemaField("airline_name", "STRING"),
-    bigquery.SchemaField("flight_number", "STRING"),
-    bigquery.SchemaField("departure_airport", "STRING"),
-    bigquery.SchemaField("arrival_airport", "STRING"),
-    bigquery.SchemaField("status", "STRING"),
-    bigquery.SchemaField("scheduled_departure", "TIMESTAMP"),
-    bigquery.SchemaField("scheduled_arrival", "TIMESTAMP"),
-]
-
-# 🧪 Try to get the table. If it exists, check/update schema.
-# If not, create the table from scratch.
 
 try:
-    table = client.get_table(table_id)
-    print(f"ℹ️ Table already exists: {table_id}")
-
-    # 🔍 Check if schema has changed and needs updating
-    existing_fields = {field.name for field in table.schema}
-    new_fields = [field for field in schema if field.name not in existing_fields]
-
-    if new_fields:
-        updated_schema = table.schema + new_fields
-        table.schema = updated_schema
-        client.update_table(table, ["schema"])
-        print("✅ Table schema updated.")
+    # ⏯️ A previous migration stopped after dropping the flat table: finish the swap before anything else
+    migrated = not table_exists(table_id) and table_exists(f"{table_id}_partitioned")
+    if migrated:
+        finish_swap(table_id)
+        print(f"✅ Finished an interrupted migration of {table_id}.")
+
+    table, created = ensure_table(table_id, schema, CLUSTER_FIELDS)
+
+    if not created and not is_laid_out(table, CLUSTER_FIELDS):
+        before = bytes_scanned(table_id)
+        migrate_layout(table_id, CLUSTER_FIELDS)
+        migrated = True
+        after = bytes_scanned(table_id)
+        print(f"📉 Sample lookup scans {before:,} bytes before and {after:,} bytes after "
+              f"(dry-run estimate; clustering prunes further at run time).")
     else:
-        print("✅ Table schema already matches.")
-
-except NotFound:
-    # 🆕 Table doesn't exist; create it
-    table = bigquery.Table(table_id, schema=schema)
-    client.create_table(table)
-    print(f"✅ Table created successfully: {table_id}")
+        print(f"📉 Sample lookup scans {bytes_scanned(table_id):,} bytes (dry-run estimate).")
+
+    # 📊 The route rollup is keyed on IATA codes; rebuild it when created, when its layout is outdated,
+    # or when a migration has just filled in the codes of existing rows
+    rollup, rollup_created = ensure_table(rollup_id, rollup_schema, ROLLUP_CLUSTER_FIELDS)
+    if not rollup_created and not is_laid_out(rollup, ROLLUP_CLUSTER_FIELDS):
+        client.delete_table(rollup_id)
+        rollup, rollup_created = ensure_table(rollup_id, rollup_schema, ROLLUP_CLUSTER_FIELDS)
+    if rollup_created or migrated:
+        BigQueryFlightStore(table_id, rollup_id).refresh_route_rollup()
+        print(f"✅ Route rollup built from existing flights: {rollup_id}")
 
 except Exception as e:
     # ❌ Catch-all error handling
@@ -0,0 +1,50 @@
+import os
+import sys
+import argparse
+
+# 🛠️ Make the project root importable when run as `python scripts/sync_local_store.py`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.settings import SQLITE_PATH
+from services.ingest import ingest_rows
+from storage import create_store
+from storage.sqlite_store import SQLiteFlightStore
+
+# 🔄 Sync the most recent BigQuery flights into the local SQLite replica
+# Lets latency-sensitive chat deployments serve point lookups from local disk
+# (run with STORAGE_BACKEND=sqlite on the chat host after syncing).
+
+def sync(limit: int, path: str = SQLITE_PATH, days: int = 30) -> dict:
+    """
+    Copy the `limit` most recent flights dated within the last `days` days from BigQuery into the
+    SQLite store at `path` (the date range keeps the source scan to those partitions).
+    Returns the inserted/updated/unchanged counts.
+    """
+    source = create_store("bigquery")
+    replica = SQLiteFlightStore(path)
+
+    rows = source.recent_flights(limit=limit, days=days)
+    for row in rows:
+        # SQLite keeps dates and timestamps as ISO strings
+        for key, value in row.items():
+            if hasattr(value, "isoformat"):
+                row[key] = value.isoformat()
+
+    # Upsert, rebuild the local route rollup, record the numbers in this host's known-number index
+    # (seeded from the replica, which the chat here serves from) and invalidate cached chat answers
+    return ingest_rows(rows, store=replica)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync recent flights from BigQuery into the local SQLite store.")
+    parser.add_argument("--limit", type=int, default=100000, help="Number of most recent flights to copy.")
+    parser.add_argument("--path", default=SQLITE_PATH, help="SQLite database file.")
+    parser.add_argument("--days", type=int, default=30, help="Only copy flights dated within this many days.")
+    args = parser.parse_args()
+
+    try:
+        stats = sync(args.limit, args.path, args.days)
+        print(f"✅ Synced into {args.path}: {stats['inserted']} inserted, "
+              f"{stats['updated']} updated, {stats['unchanged']} unchanged.")
+    except Exception as e:
+        print("❌ Failed:", e)
@@ -0,0 +1,206 @@
+import csv
+import os
+import re
+import threading
+import unicodedata
+
+from config.settings import AIRPORTS_CSV, LEARNED_AIRPORTS_PATH
+
+# 🛫 Airport code/name normalization
+# A compact in-memory dictionary: IATA and ICAO codes resolve by hash lookup, and
+# normalized names, cities and aliases map to IATA codes. Seeded from the bundled CSV
+# and from the iata/icao fields of ingested payloads (persisted for other processes).
+
+# Words that say nothing about which airport is meant
+GENERIC_WORDS = {"international", "intl", "airport", "domestic", "the"}
+
+# Longest place name tried when resolving free text (e.g. "netaji subhas chandra bose")
+MAX_NAME_WORDS = 5
+
+
+def normalize_name(text: str) -> str:
+    """Lower-case, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def _name_keys(text: str) -> list:
+    """The normalized name plus its form without generic words ("chennai international" → "chennai")."""
+    name = normalize_name(text or "")
+    if not name:
+        return []
+    core = " ".join(word for word in name.split() if word not in GENERIC_WORDS)
+    return [name] if not core or core == name else [name, core]
+
+
+class AirportIndex:
+    """
+    Airport dictionary keyed by IATA code.
+
+    - `airports`: IATA -> (iata, icao, name, city)
+    - `icao`: ICAO -> IATA
+    - `names`: normalized name / city / alias -> IATA (first writer wins, so curated CSV
+      entries beat names learned from payloads)
+    """
+
+    def __init__(self):
+        self.airports = {}
+        self.icao = {}
+        self.names = {}
+        self.learned = {}   # IATA -> (icao, name) seen in payloads but not in the CSV
+        self.lock = threading.Lock()
+
+    def add(self, iata: str, icao: str = None, name: str = None, city: str = None, aliases=()) -> bool:
+        """Register an airport; returns True if it was not known before."""
+        iata = (iata or "").strip().upper()
+        if not re.fullmatch(r"[A-Z]{3}", iata):
+            return False
+        icao = (icao or "").strip().upper() or None
+
+        with self.lock:
+            new = iata not in self.airports
+            if new:
+                self.airports[iata] = (iata, icao, name, city)
+            if icao:
+                self.icao.setdefault(icao, iata)
+            for text in (name, city, *aliases):
+                for key in _name_keys(text):
+                    self.names.setdefault(key, iata)
+        return new
+
+    def load_csv(self, path: str):
+        """Load `iata,icao,name,city,aliases` rows (aliases separated by ';')."""
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                aliases = [alias for alias in (row.get("aliases") or "").split(";") if alias]
+                self.add(row["iata"], row.get("icao"), row.get("name"), row.get("city"), aliases)
+
+    # 📥 Learning from payloads
+
+    def learn(self, endpoints):
+        """Register airports from raw `departure`/`arrival` payload objects."""
+        for endpoint in endpoints:
+            iata = endpoint.get("iata")
+            if iata and iata.upper() not in self.airports:
+                if self.add(iata, endpoint.get("icao"), endpoint.get("airport")):
+                    with self.lock:
+                        self.learned[iata.upper()] = (endpoint.get("icao"), endpoint.get("airport"))
+
+    def save_learned(self, path: str = LEARNED_AIRPORTS_PATH) -> int:
+        """Append airports learned since the last save to `path`; returns how many were written."""
+        with self.lock:
+            learned, self.learned = self.learned, {}
+        if not learned:
+            return 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        new_file = not os.path.exists(path)
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(["iata", "icao", "name", "city", "aliases"])
+            for iata, (icao, name) in learned.items():
+                writer.writerow([iata, icao or "", name or "", "", ""])
+        return len(learned)
+
+    # 🔎 Lookups
+
+    def code_for(self, endpoint: dict) -> str:
+        """Canonical IATA code for a payload endpoint: its iata, else its icao, else its airport name."""
+        iata = (endpoint.get("iata") or "").strip().upper()
+        if iata:
+            return iata
+        icao = (endpoint.get("icao") or "").strip().upper()
+        if icao and icao in self.icao:
+            return self.icao[icao]
+        return self.resolve_name(endpoint.get("airport") or "")
+
+    def resolve_name(self, text: str) -> str:
+        for key in _name_keys(text):
+            if key in self.names:
+                return self.names[key]
+        return None
+
+    def resolve_edge(self, words: list, from_end: bool, typed_upper: list = None) -> str:
+        """
+        Longest known place name (or code) at the end (origin side) or start (destination side)
+        of `words`, so "flights from new delhi" → DEL and "mumbai tomorrow" → BOM.
+
+        A single word only counts as an IATA code when the user typed it in capitals
+        (`typed_upper`, aligned with `words`); otherwise it must be a known name, city or alias,
+        so ordinary words that happen to be learned codes ("way to Mumbai") are not airports.
+        """
+        for size in range(min(MAX_NAME_WORDS, len(words)), 0, -1):
+            chunk = words[-size:] if from_end else words[:size]
+            code = self.resolve_name(" ".join(chunk))
+            if code is None and size == 1:
+                i = len(words) - 1 if from_end else 0
+                explicit = typed_upper is not None and typed_upper[i]
+                if explicit and re.fullmatch(r"[A-Z]{3}", chunk[0]) and chunk[0] in self.airports:
+                    code = chunk[0]
+            if code:
+                return code
+        return None
+
+    def __len__(self):
+        return len(self.airports)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_airport_index() -> AirportIndex:
+    """The process-wide index, built on first use from the bundled and learned CSVs."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = AirportIndex()
+                for path in (AIRPORTS_CSV, LEARNED_AIRPORTS_PATH):
+                    if path and os.path.exists(path):
+                        index.load_csv(path)
+                _index = index
+    return _index
+
+
+# ✈️ Routes in free text
+
+# "DEL to BOM"
+ROUTE_CODE_PATTERN = re.compile(r'\b([A-Z]{3})\s*TO\s*([A-Z]{3})\b')
+
+# Words of a message, for resolving place names on either side of "to"
+WORD_PATTERN = re.compile(r"[A-Z0-9][A-Z0-9.'-]*")
+
+
+def find_routes(query_upper: str, index: AirportIndex = None, query: str = None) -> list:
+    """
+    Every (origin, dest) IATA pair asked about in an upper-cased message, as
+    `(position, (origin, dest))`. "DEL to BOM" codes are taken as written (in capitals); place
+    names ("Delhi to Mumbai") are resolved through the airport index before anything is queried.
+
+    `query` is the message as typed (same length as `query_upper`); a code, whether in
+    "DEL to BOM" or next to a place name ("Delhi to BOM"), is only accepted when it was typed
+    in capitals there, so ordinary words ("way to see") are never taken for airports.
+    """
+    index = index or get_airport_index()
+    if query is None or len(query) != len(query_upper):
+        query = query_upper.lower()   # case unknown: no word counts as typed in capitals
+
+    codes = [m for m in ROUTE_CODE_PATTERN.finditer(query_upper)
+             if query[m.start(1):m.end(1)].isupper() and query[m.start(2):m.end(2)].isupper()]
+    routes = [(m.start(), (m.group(1), m.group(2))) for m in codes]
+    covered = [(m.start(), m.end()) for m in codes]
+
+    words = [(m.start(), m.group(0).strip(".'-")) for m in WORD_PATTERN.finditer(query_upper)]
+    typed_upper = [query[position:position + len(word)].isupper() for position, word in words]
+    for i, (position, word) in enumerate(words):
+        if word != "TO" or any(start <= position < end for start, end in covered):
+            continue
+        lo, hi = max(0, i - MAX_NAME_WORDS), i + 1 + MAX_NAME_WORDS
+        before = [w for _, w in words[lo:i]]
+        after = [w for _, w in words[i + 1:hi]]
+        origin = index.resolve_edge(before, from_end=True, typed_upper=typed_upper[lo:i]) if before else None
+        dest = index.resolve_edge(after, from_end=False, typed_upper=typed_upper[i + 1:hi]) if after else None
+        if origin and dest:
+            routes.append((words[i - 1][0], (origin, dest)))
+    return sorted(routes)
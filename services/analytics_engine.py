@@ -0,0 +1,360 @@
+import logging
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+from config.settings import ANALYTICS_CACHE_ENABLED, ANALYTICS_CACHE_DAYS, ANALYTICS_MAX_DAYS
+from services import metrics
+from services.ingest_marker import changed_dates, current_generation
+from services.singleflight import SingleFlight
+from services.snapshot import RETRY_AFTER, StringPool, _epoch, _ordinal, _today
+from storage import get_store
+
+logger = logging.getLogger(__name__)
+
+# 📐 Columnar route analytics
+# Recent flights are held as NumPy columns, one partition per flight_date, each sorted by
+# (origin, destination) so a route is a contiguous slice found with a binary search. Profiles
+# (flight counts, duration percentiles, status mix, busiest hours and weekdays) are computed
+# with vectorized reductions over those slices. After an ingest only the flight dates it wrote
+# are reloaded; windows reaching past the cache are aggregated by the store in one route query.
+# Departure hours are UTC on both paths.
+
+ANALYTICS_COLUMNS = [
+    "flight_date", "airline_name", "departure_iata", "arrival_iata", "status",
+    "scheduled_departure", "scheduled_arrival",
+]
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def _route_key(origin: int, dest: int) -> int:
+    """One sortable int64 per (origin code, destination code) pair."""
+    return (origin << 32) | dest
+
+
+class DayPartition:
+    """
+    The flights of one flight_date as parallel NumPy columns, sorted by route key.
+
+    - `routes`: int64 route keys (pool codes of origin and destination)
+    - `airlines`, `statuses`: int32 pool codes
+    - `hours`: int8 hour of the scheduled departure (-1 when unknown)
+    - `durations`: float32 scheduled minutes, truncated like the rollup (NaN when unknown)
+    """
+
+    __slots__ = ("day", "weekday", "routes", "airlines", "statuses", "hours", "durations")
+
+    def __init__(self, day: int, routes, airlines, statuses, departures, arrivals):
+        self.day = day
+        self.weekday = date.fromordinal(day).weekday()
+        routes = np.asarray(routes, dtype=np.int64)
+        order = np.argsort(routes, kind="stable")
+        departures = np.asarray(departures, dtype=np.float64)[order]
+        arrivals = np.asarray(arrivals, dtype=np.float64)[order]
+
+        self.routes = routes[order]
+        self.airlines = np.asarray(airlines, dtype=np.int32)[order]
+        self.statuses = np.asarray(statuses, dtype=np.int32)[order]
+        known = ~np.isnan(departures)
+        self.hours = np.where(known, (np.where(known, departures, 0) // 3600) % 24, -1).astype(np.int8)
+        self.durations = np.trunc((arrivals - departures) / 60).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def route(self, key: int) -> slice:
+        """Rows of one route (possibly empty)."""
+        return slice(np.searchsorted(self.routes, key, "left"), np.searchsorted(self.routes, key, "right"))
+
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in (self.routes, self.airlines, self.statuses, self.hours, self.durations))
+
+
+def build_partitions(rows, strings: StringPool) -> dict:
+    """
+    Group store rows (ANALYTICS_COLUMNS) into day partitions, coding strings through `strings`.
+    Like the route rollup, only flights with both airport codes are kept.
+
+    Returns:
+    - dict: day ordinal -> DayPartition
+    """
+    code = strings.code
+    days = {}  # day ordinal -> (route keys, airlines, statuses, departures, arrivals)
+    for row in rows:
+        if row["flight_date"] is None or row["departure_iata"] is None or row["arrival_iata"] is None:
+            continue
+        day = _ordinal(row["flight_date"])
+        columns = days.get(day)
+        if columns is None:
+            columns = days[day] = ([], [], [], [], [])
+        columns[0].append(_route_key(code(row["departure_iata"]), code(row["arrival_iata"])))
+        columns[1].append(code(row["airline_name"]))
+        columns[2].append(code(row["status"]))
+        columns[3].append(_epoch(row["scheduled_departure"]))
+        columns[4].append(_epoch(row["scheduled_arrival"]))
+    return {day: DayPartition(day, *columns) for day, columns in days.items()}
+
+
+def _top(counts, limit: int) -> list:
+    """(index, count) of the `limit` largest non-zero counts, largest first (ties by index)."""
+    order = np.argsort(-counts, kind="stable")[:limit]
+    return [(int(i), int(counts[i])) for i in order if counts[i] > 0]
+
+
+def profile_route(partitions: list, strings: StringPool, origin: str, dest: str, limit: int = 3) -> dict:
+    """
+    Aggregate one route over the given day partitions.
+
+    Returns:
+    - dict: `flights`; `airlines` as (name, flights, avg duration) for the `limit` busiest;
+      `duration_p50`/`duration_p90` in minutes (None when no durations are known); `statuses`
+      as (status, flights), most frequent first; `hours` as (UTC hour, flights) for the `limit`
+      busiest; `weekdays` as (name, flights) for the `limit` busiest.
+    """
+    origin_code, dest_code = strings.codes.get(origin), strings.codes.get(dest)
+    if origin_code is None or dest_code is None:
+        return {"flights": 0}
+    key = _route_key(origin_code, dest_code)
+
+    parts, weekdays = [], np.zeros(7, dtype=np.int64)
+    for partition in partitions:
+        rows = partition.route(key)
+        if rows.stop > rows.start:
+            parts.append((partition, rows))
+            weekdays[partition.weekday] += rows.stop - rows.start
+    if not parts:
+        return {"flights": 0}
+
+    airlines = np.concatenate([partition.airlines[rows] for partition, rows in parts])
+    statuses = np.concatenate([partition.statuses[rows] for partition, rows in parts])
+    hours = np.concatenate([partition.hours[rows] for partition, rows in parts])
+    durations = np.concatenate([partition.durations[rows] for partition, rows in parts])
+
+    timed = ~np.isnan(durations)
+    per_airline = np.bincount(airlines)
+    minutes = np.bincount(airlines[timed], weights=durations[timed], minlength=len(per_airline))
+    timed_flights = np.bincount(airlines[timed], minlength=len(per_airline))
+    p50, p90 = np.percentile(durations[timed], [50, 90]) if timed.any() else (None, None)
+
+    values = strings.values
+    busiest = [(values[airline], flights,
+                float(minutes[airline] / timed_flights[airline]) if timed_flights[airline] else None)
+               for airline, flights in _top(per_airline, limit)]
+    return {
+        "flights": len(airlines),
+        "airlines": busiest,
+        "duration_p50": None if p50 is None else float(p50),
+        "duration_p90": None if p90 is None else float(p90),
+        "statuses": [(values[status], flights) for status, flights in _top(np.bincount(statuses), len(values))],
+        "hours": _top(np.bincount(hours[hours >= 0], minlength=24), limit),
+        "weekdays": [(WEEKDAYS[day], flights) for day, flights in _top(weekdays, limit)],
+    }
+
+
+def _ranked(counts: dict, limit: int = None) -> list:
+    """(value, count) pairs, largest count first (ties by value), like `_top` over store aggregates."""
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], "" if item[0] is None else str(item[0])))
+    return ranked[:limit] if limit is not None else ranked
+
+
+def _percentiles(values, counts, quantiles) -> list:
+    """Linear-interpolated percentiles (as `np.percentile`) of `values` repeated `counts` times."""
+    order = np.argsort(values)
+    values, cumulative = values[order], np.cumsum(counts[order])
+    total = cumulative[-1]
+    result = []
+    for quantile in quantiles:
+        position = quantile / 100 * (total - 1)
+        below, above = int(np.floor(position)), int(np.ceil(position))
+        low = values[np.searchsorted(cumulative, below, "right")]
+        high = values[np.searchsorted(cumulative, above, "right")]
+        result.append(float(low + (high - low) * (position - below)))
+    return result
+
+
+def profile_from_counts(rows, limit: int = 3) -> dict:
+    """
+    Build the `profile_route` result from the per-facet aggregates of `FlightStore.route_profile_counts`.
+    """
+    facets = {"airline": {}, "status": {}, "hour": {}, "weekday": {}, "duration": {}}
+    airline_minutes = {}
+    for row in rows:
+        facets[row["facet"]][row["value"]] = row["flights"]
+        if row["facet"] == "airline":
+            airline_minutes[row["value"]] = (row["duration_sum"], row["duration_count"])
+    flights = sum(facets["airline"].values())
+    if not flights:
+        return {"flights": 0}
+
+    durations = facets["duration"]
+    p50 = p90 = None
+    if durations:
+        p50, p90 = _percentiles(np.array([float(minutes) for minutes in durations]),
+                                np.array(list(durations.values()), dtype=np.int64), [50, 90])
+
+    busiest = []
+    for name, count in _ranked(facets["airline"], limit):
+        minutes, timed = airline_minutes[name]
+        busiest.append((name, count, float(minutes / timed) if timed else None))
+    return {
+        "flights": flights,
+        "airlines": busiest,
+        "duration_p50": p50,
+        "duration_p90": p90,
+        "statuses": _ranked(facets["status"]),
+        "hours": _ranked({int(hour): count for hour, count in facets["hour"].items()}, limit),
+        "weekdays": [(WEEKDAYS[day], count)
+                     for day, count in _ranked({int(day): count for day, count in facets["weekday"].items()}, limit)],
+    }
+
+
+class RouteAnalytics:
+    """
+    Route profiles over any window, from the in-memory day partitions when they cover it and
+    from one route query to the store otherwise.
+
+    The cache holds the last `cache_days` days (plus scheduled future dates) and is synced on a
+    background thread when the ingest generation changes: only the flight dates logged for the
+    new generations are reloaded, everything when the log cannot tell. Until the first load
+    finishes, profiles come from the store; during later syncs the previous partitions keep
+    answering.
+    """
+
+    def __init__(self, cache_days: int = ANALYTICS_CACHE_DAYS, enabled: bool = ANALYTICS_CACHE_ENABLED,
+                 generation_fn=current_generation):
+        self.cache_days = cache_days
+        self.enabled = enabled
+        self.generation_fn = generation_fn
+        self.strings = StringPool()   # airports, airlines, statuses; only the sync thread adds to it
+        self.partitions = {}          # day ordinal -> DayPartition, replaced as a whole on each sync
+        self.start = None             # first day ordinal held completely (None until loaded)
+        self.generation = None
+        self.syncing = False
+        self.failed_at = None
+        self.lock = threading.Lock()
+        self.inflight = SingleFlight("route_profile")
+        self.counters = {"full_loads": 0, "incremental_syncs": 0, "days_reloaded": 0,
+                         "failures": 0, "last_sync_seconds": None}
+
+    # 🔄 Cache sync
+
+    def refresh(self):
+        """Start a background sync when the ingest generation moved (unless one is running or just failed)."""
+        generation = self.generation_fn()
+        if generation == self.generation:
+            return
+        with self.lock:
+            if self.syncing or (self.failed_at and time.monotonic() - self.failed_at < RETRY_AFTER):
+                return
+            self.syncing = True
+        threading.Thread(target=self._sync_in_background, args=(generation,),
+                         name="route-analytics", daemon=True).start()
+
+    def _sync_in_background(self, generation: int):
+        try:
+            self.sync(generation)
+            self.failed_at = None
+        except Exception:
+            logger.exception("Syncing the route analytics cache failed; profiles keep using the store")
+            self.counters["failures"] += 1
+            self.failed_at = time.monotonic()
+        finally:
+            with self.lock:
+                self.syncing = False
+
+    def sync(self, generation: int = None):
+        """
+        Bring the partitions up to `generation` (default: current): reload the flight dates
+        ingested since the last sync, or the whole window on the first load or when the
+        dates log cannot tell what changed. Days that left the window are dropped.
+        """
+        generation = self.generation_fn() if generation is None else generation
+        started = time.perf_counter()
+        start = _today().toordinal() - self.cache_days
+        dates = None
+        if self.start is not None and self.generation is not None and generation >= self.generation:
+            dates = changed_dates(self.generation, generation)
+
+        with metrics.span("analytics_sync", mode="full" if dates is None else "incremental"):
+            if dates is None:
+                rows = get_store().iter_flights(ANALYTICS_COLUMNS, date.fromordinal(start).isoformat())
+                self.partitions = build_partitions(rows, self.strings)
+                self.counters["full_loads"] += 1
+            else:
+                days = {day for day in map(_ordinal, dates) if day >= start}
+                partitions = {day: partition for day, partition in self.partitions.items()
+                              if day >= start and day not in days}
+                if days:
+                    rows = get_store().iter_flights(ANALYTICS_COLUMNS, date.fromordinal(min(days)).isoformat(),
+                                                    date.fromordinal(max(days)).isoformat())
+                    fresh = build_partitions(rows, self.strings)
+                    # A reloaded day without rows stays out (its flights were removed)
+                    partitions.update((day, partition) for day, partition in fresh.items() if day in days)
+                self.partitions = partitions
+                self.counters["incremental_syncs"] += 1
+                self.counters["days_reloaded"] += len(days)
+        self.start = start if self.start is None or dates is None else max(self.start, start)
+        self.generation = generation
+        self.counters["last_sync_seconds"] = round(time.perf_counter() - started, 3)
+
+    def covers(self, start: int) -> bool:
+        """True when every flight dated on or after day ordinal `start` is in the cache."""
+        return self.enabled and self.start is not None and self.start <= start
+
+    # 📊 Profiles
+
+    def profile(self, origin: str, dest: str, days: int, limit: int = 3) -> dict:
+        """
+        Profile of the route over flights dated within the last `days` days (capped at
+        ANALYTICS_MAX_DAYS); see `profile_route` for the fields, plus `days` and `source`.
+        """
+        days = max(0, min(days, ANALYTICS_MAX_DAYS))
+        start = _today().toordinal() - days
+        if self.enabled:
+            self.refresh()
+        if self.covers(start):
+            with metrics.span("analytics_profile", source="cache"):
+                partitions = self.partitions
+                profile = profile_route([partition for day, partition in partitions.items() if day >= start],
+                                        self.strings, origin, dest, limit)
+            return {**profile, "days": days, "source": "cache"}
+
+        with metrics.span("analytics_profile", source="store"):
+            profile = self.inflight.do((origin, dest, days, limit),
+                                       lambda: self._profile_from_store(origin, dest, start, limit))
+        return {**profile, "days": days, "source": "store"}
+
+    @staticmethod
+    def _profile_from_store(origin: str, dest: str, start: int, limit: int) -> dict:
+        # Aggregated by the store: a few rows per facet come back, not every flight of the window
+        rows = get_store().route_profile_counts(origin, dest, date.fromordinal(start).isoformat())
+        return profile_from_counts(rows, limit)
+
+    def stats(self) -> dict:
+        partitions = self.partitions
+        return {
+            **self.counters,
+            "syncing": self.syncing,
+            "generation": self.generation,
+            "start": date.fromordinal(self.start).isoformat() if self.start is not None else None,
+            "days": len(partitions),
+            "flights": sum(len(partition) for partition in partitions.values()),
+            "memory_mb": round(sum(partition.nbytes() for partition in partitions.values()) / 1e6, 2),
+        }
+
+
+# 🔒 Process-wide engine, created on first use
+_engine = None
+_lock = threading.Lock()
+
+
+def get_route_analytics() -> RouteAnalytics:
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _engine = RouteAnalytics()
+    return _engine
@@ -0,0 +1,165 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import API_KEY, API_BASE_URL, API_RATE_LIMIT, FETCH_WORKERS, FETCH_MAX_PAGES, require_api_key
+from services import metrics
+
+# Base URL for Aviationstack API
+BASE_URL = API_BASE_URL
+
+# The API returns at most 100 records per request
+PAGE_SIZE = 100
+
+# HTTP statuses worth retrying: rate limited or transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how many requests are sent per second.
+    Allows short bursts up to `capacity` while keeping the long-run rate at `rate`.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AviationstackClient:
+    """
+    Concurrent, rate-limited client for the Aviationstack flights endpoint.
+    Reuses HTTP connections through a shared `requests.Session`.
+    """
+
+    def __init__(self, api_key: str = API_KEY, base_url: str = BASE_URL,
+                 rate: float = API_RATE_LIMIT, workers: int = FETCH_WORKERS,
+                 max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 60, timeout: float = 30):
+        self.api_key = api_key or require_api_key()
+        self.base_url = base_url
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff   # Upper bound on any single retry wait, Retry-After included
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate)
+
+        # 🔌 One pooled session shared by every worker thread
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch_page(self, offset: int = 0, limit: int = PAGE_SIZE, params: dict = None) -> dict:
+        """
+        Fetch one raw page from the API, retrying 429/5xx with jittered exponential backoff.
+
+        Parameters:
+        - offset (int): Offset of the first record.
+        - limit (int): Number of records to request (API max is 100).
+        - params (dict): Extra query parameters such as filters.
+
+        Returns:
+        - dict: The raw JSON payload including `pagination` and `data`.
+        """
+        query = {"access_key": self.api_key, "limit": limit, "offset": offset, **(params or {})}
+
+        for attempt in range(self.max_retries + 1):
+            with metrics.span("api_rate_wait"):
+                self.bucket.acquire()
+            try:
+                with metrics.span("api_fetch"):
+                    response = self.session.get(self.base_url, params=query, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.incr("api_retries", reason=type(e).__name__)
+                if attempt == self.max_retries:
+                    raise
+                self._sleep_before_retry(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                metrics.incr("api_retries", reason=str(response.status_code))
+                self._sleep_before_retry(attempt, response.headers.get("Retry-After"))
+                continue
+
+            response.raise_for_status()
+            payload = response.json()
+            if "error" in payload:
+                metrics.incr("errors", span="api_fetch", error="api_error")
+                raise RuntimeError(f"Aviationstack error: {payload['error']}")
+            metrics.incr("api_pages")
+            return payload
+
+    def _sleep_before_retry(self, attempt: int, retry_after: str = None):
+        """
+        Sleep using full-jitter exponential backoff, honouring Retry-After when sent.
+        Every wait is capped at `max_backoff`; a Retry-After that is not a number of seconds is ignored.
+        """
+        try:
+            delay = float(retry_after) if retry_after else None
+        except ValueError:
+            delay = None
+        if delay is None or not 0 <= delay < float("inf"):
+            delay = random.uniform(0, self.backoff * (2 ** attempt))
+        time.sleep(min(delay, self.max_backoff))
+
+    def iter_pages(self, max_pages: int = FETCH_MAX_PAGES, page_size: int = PAGE_SIZE, params: dict = None):
+        """
+        Walk up to `max_pages` pages concurrently and yield each raw payload as soon as it arrives.
+
+        The first page is fetched on its own to learn `pagination.total`, so no
+        requests are sent past the end of the result set. Pages are yielded in
+        completion order, not offset order.
+        """
+        first = self.fetch_page(0, page_size, params)
+        yield first
+
+        total = (first.get("pagination") or {}).get("total") or 0
+        last_offset = min(max_pages * page_size, total)
+        offsets = range(page_size, last_offset, page_size)
+        if not offsets:
+            return
+
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = [pool.submit(self.fetch_page, offset, page_size, params) for offset in offsets]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Drop queued pages if the consumer stops early or a page fails
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+# 🔒 Process-wide client, so every fetch (polling cycles, dashboard refreshes) reuses one session and rate limit
+_client = None
+_lock = threading.Lock()
+
+
+def get_api_client() -> AviationstackClient:
+    """Return the shared Aviationstack client, creating it on first call."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = AviationstackClient()
+    return _client
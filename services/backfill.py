@@ -0,0 +1,97 @@
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+from config.settings import BACKFILL_STATE_PATH
+
+# 🗓️ Historical backfill planning and checkpointing
+# A backfill is split into work units of one flight date × one filter combination.
+# Completed units are recorded in a small JSON state file, so an interrupted run
+# picks up where it stopped.
+
+# CLI filter names mapped to Aviationstack query parameters
+FILTER_PARAMS = {"airline": "airline_iata", "dep": "dep_iata", "arr": "arr_iata"}
+
+
+def plan_units(start: str, end: str, airlines: list = None, deps: list = None, arrs: list = None) -> list:
+    """
+    Split [start, end] into work units, newest date first (so recent trends fill in first).
+
+    Returns:
+    - list[dict]: Units with a stable `key` and the API `params` to fetch them.
+    """
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    if last < first:
+        raise ValueError("❌ Backfill end date is before its start date.")
+
+    choices = [[(FILTER_PARAMS[name], value) for value in values] if values else [None]
+               for name, values in (("airline", airlines), ("dep", deps), ("arr", arrs))]
+
+    units = []
+    for offset in range((last - first).days + 1):
+        flight_date = (last - timedelta(days=offset)).isoformat()
+        for combo in itertools.product(*choices):
+            filters = dict(pair for pair in combo if pair)
+            params = {"flight_date": flight_date, **filters}
+            key = "|".join([flight_date] + [f"{name}={value}" for name, value in sorted(filters.items())])
+            units.append({"key": key, "params": params})
+    return units
+
+
+class BackfillCheckpoint:
+    """Completed work units, persisted atomically after each one finishes."""
+
+    def __init__(self, path: str = BACKFILL_STATE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.done = json.load(f).get("done", {})
+        except (FileNotFoundError, ValueError):
+            self.done = {}
+
+    def is_done(self, key: str) -> bool:
+        with self.lock:
+            return key in self.done
+
+    def mark_done(self, key: str, flights: int):
+        with self.lock:
+            self.done[key] = {"flights": flights, "finished_at": time.time()}
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"done": self.done}, f)
+            os.replace(tmp_path, self.path)
+
+
+class BackfillProgress:
+    """Running flights/sec and ETA over the units processed in this run; failed units are counted apart."""
+
+    def __init__(self, total_units: int):
+        self.total_units = total_units
+        self.units = 0     # completed (and checkpointed)
+        self.failed = 0    # left unchecked, retried by the next run
+        self.flights = 0
+        self.started = time.perf_counter()
+
+    def update(self, flights: int = 0, failed: bool = False) -> str:
+        if failed:
+            self.failed += 1
+        else:
+            self.units += 1
+            self.flights += flights
+        processed = self.units + self.failed
+        elapsed = time.perf_counter() - self.started
+        eta = elapsed / processed * (self.total_units - processed)
+        failures = f" ({self.failed} failed)" if self.failed else ""
+        return (f"⏳ {self.units}/{self.total_units} units done{failures}, {self.flights:,} flights "
+                f"({self.flights / elapsed:,.0f} flights/sec), ETA {format_duration(eta)}")
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
@@ -0,0 +1,71 @@
+import threading
+
+from google.cloud import bigquery
+from requests.adapters import HTTPAdapter
+
+from config.settings import PROJECT_ID, BQ_POOL_SIZE
+from services import metrics
+
+# OAuth scopes needed by the BigQuery client
+SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+# 🔒 Process-wide client, built lazily on first use
+_client = None
+_lock = threading.Lock()
+
+
+def _build_client():
+    """
+    Build a BigQuery client whose authorized session keeps up to BQ_POOL_SIZE
+    connections open, so concurrent queries reuse warm HTTP connections.
+    """
+    import google.auth
+    from google.auth.transport.requests import AuthorizedSession
+
+    credentials, default_project = google.auth.default(scopes=SCOPES)
+    session = AuthorizedSession(credentials)
+    adapter = HTTPAdapter(pool_connections=BQ_POOL_SIZE, pool_maxsize=BQ_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return bigquery.Client(project=PROJECT_ID or default_project, credentials=credentials, _http=session)
+
+
+def get_client():
+    """
+    Return the shared BigQuery client, creating it on first call.
+    Safe to call from any thread; credentials are resolved only once per process.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = _build_client()
+    return _client
+
+
+def set_client(client):
+    """Inject a client (e.g. a fake for tests or benchmarks) to be returned by `get_client`."""
+    global _client
+    with _lock:
+        _client = client
+
+
+def reset_client():
+    """Drop the shared client so the next `get_client` call builds a fresh one."""
+    set_client(None)
+
+
+def wait_for_job(job, stage: str):
+    """Wait for a submitted job, timing the wait and recording its bytes/slot/cache stats under `stage`."""
+    with metrics.span("bq_wait", stage=stage):
+        result = job.result()
+    metrics.record_job(job, stage)
+    return result
+
+
+def run_query(client, sql: str, job_config=None, stage: str = "query"):
+    """Submit a query, wait for it and return its rows, with submit and wait timed separately."""
+    with metrics.span("bq_submit", stage=stage):
+        job = client.query(sql, job_config=job_config)
+    return wait_for_job(job, stage)
@@ -0,0 +1,66 @@
+import gzip
+import io
+import json
+import time
+
+from google.cloud import bigquery
+
+from config.settings import LOAD_CHUNK_ROWS
+from services import metrics
+from services.bigquery_client import wait_for_job
+from services.schema import FLIGHT_SCHEMA
+
+# 📦 Bulk load helpers
+# Rows are written as gzip-compressed NDJSON in memory and submitted as load jobs,
+# which are free, avoid the streaming buffer and keep DML on the table unblocked. Nothing is
+# streamed with insert_rows_json: streamed rows block UPDATE/MERGE/DELETE on the table for up to
+# ~90 minutes, which would break the upserts and rollup refreshes that follow every append.
+
+
+def to_ndjson_gz(rows) -> bytes:
+    """Serialize rows as gzip-compressed newline-delimited JSON."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=6) as gz:
+        for row in rows:
+            gz.write(json.dumps(row, separators=(",", ":"), default=str).encode("utf-8"))
+            gz.write(b"\n")
+    return buffer.getvalue()
+
+
+def load_rows(client, table_id, rows, schema=None, chunk_size=LOAD_CHUNK_ROWS,
+              write_disposition=bigquery.WriteDisposition.WRITE_APPEND) -> dict:
+    """
+    Load rows into `table_id` with one load job per `chunk_size` rows (a single job for most batches).
+
+    Parameters:
+    - client (bigquery.Client): Client used to submit the load jobs.
+    - table_id (str): Fully-qualified destination table.
+    - rows (list[dict]): Rows to load.
+    - schema (list[SchemaField]): Destination schema (defaults to the flight schema).
+    - chunk_size (int): Max rows per load job.
+    - write_disposition (str): Applied to the first chunk; later chunks always append.
+
+    Returns:
+    - dict: `rows` loaded, compressed `bytes` uploaded, `jobs` submitted and elapsed `seconds`.
+    """
+    schema = schema or [bigquery.SchemaField(name, field_type) for name, field_type in FLIGHT_SCHEMA]
+    started = time.perf_counter()
+    total_bytes = 0
+    jobs = 0
+
+    for start in range(0, len(rows), chunk_size):
+        payload = to_ndjson_gz(rows[start:start + chunk_size])
+        total_bytes += len(payload)
+
+        job_config = bigquery.LoadJobConfig(
+            schema=schema,
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            write_disposition=write_disposition if start == 0 else bigquery.WriteDisposition.WRITE_APPEND,
+        )
+        with metrics.span("bq_submit", stage="load"):
+            job = client.load_table_from_file(io.BytesIO(payload), table_id, job_config=job_config)
+        wait_for_job(job, "load")
+        jobs += 1
+
+    return {"rows": len(rows), "bytes": total_bytes, "jobs": jobs, "seconds": time.perf_counter() - started}
+
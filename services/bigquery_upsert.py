@@ -0,0 +1,81 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from google.cloud import bigquery
+
+from services import metrics
+from services.bigquery_client import wait_for_job
+from services.bigquery_load import load_rows
+from services.schema import FLIGHT_SCHEMA, FLIGHT_COLUMNS, KEY_COLUMNS, VALUE_COLUMNS, dedupe_rows
+
+# ⏳ Staging tables expire on their own in case a run dies before cleanup
+STAGING_TTL = timedelta(hours=1)
+
+
+def build_merge_sql(table_id, staging_id):
+    """Build the MERGE statement reconciling the staging table into the target table."""
+    on_clause = " AND ".join(f"T.{col} = S.{col}" for col in KEY_COLUMNS)
+    changed = " OR ".join(f"T.{col} IS DISTINCT FROM S.{col}" for col in VALUE_COLUMNS)
+    set_clause = ", ".join(f"{col} = S.{col}" for col in VALUE_COLUMNS)
+    columns = ", ".join(FLIGHT_COLUMNS)
+    values = ", ".join(f"S.{col}" for col in FLIGHT_COLUMNS)
+
+    return f"""
+        MERGE `{table_id}` T
+        USING `{staging_id}` S
+        ON {on_clause}
+        WHEN MATCHED AND ({changed}) THEN
+            UPDATE SET {set_clause}
+        WHEN NOT MATCHED THEN
+            INSERT ({columns}) VALUES ({values})
+    """
+
+
+def upsert_rows(client, table_id, rows):
+    """
+    Upsert formatted flight rows into BigQuery with a single set-based MERGE.
+
+    The batch is deduplicated, loaded into a short-lived staging table as
+    gzip-compressed NDJSON load jobs, and reconciled into `table_id` keyed on (flight_date, flight_number).
+    Rows whose values did not change are left alone.
+
+    Parameters:
+    - client (bigquery.Client): Client used for the load and MERGE jobs.
+    - table_id (str): Fully-qualified target table `project.dataset.table`.
+    - rows (list[dict]): Rows already shaped by `format_row`.
+
+    Returns:
+    - dict: Counts of `inserted`, `updated` and `unchanged` rows, plus compressed `bytes` uploaded.
+    """
+    rows = dedupe_rows(rows)
+    if not rows:
+        return {"inserted": 0, "updated": 0, "unchanged": 0, "bytes": 0}
+
+    schema = [bigquery.SchemaField(name, field_type) for name, field_type in FLIGHT_SCHEMA]
+    staging_id = f"{table_id}_staging_{uuid.uuid4().hex[:12]}"
+
+    # 🧺 Stage the whole batch with load jobs (a single one unless the batch exceeds LOAD_CHUNK_ROWS)
+    staging = bigquery.Table(staging_id, schema=schema)
+    staging.expires = datetime.now(timezone.utc) + STAGING_TTL
+    client.create_table(staging)
+
+    try:
+        load = load_rows(client, staging_id, rows, schema=schema,
+                         write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE)
+
+        # 🔀 Reconcile staging into the target in one DML job
+        with metrics.span("bq_submit", stage="merge"):
+            merge_job = client.query(build_merge_sql(table_id, staging_id))
+        wait_for_job(merge_job, "merge")
+    finally:
+        client.delete_table(staging_id, not_found_ok=True)
+
+    stats = merge_job.dml_stats
+    inserted = stats.inserted_row_count if stats else 0
+    updated = stats.updated_row_count if stats else (merge_job.num_dml_affected_rows or 0)
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": len(rows) - inserted - updated,
+        "bytes": load["bytes"],
+    }
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by `TTLCache.get` when a key is not cached (a cached None is a negative hit)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe bounded LRU cache with per-entry TTL.
+
+    - `None` values are cached as negative results with their own, shorter TTL.
+    - When `generation_fn` returns a new value, every entry is dropped, so
+      answers never outlive the data they were computed from.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, negative_ttl: float = 60, generation_fn=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.generation_fn = generation_fn
+        self.generation = generation_fn() if generation_fn else None
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0,
+                         "expirations": 0, "invalidations": 0}
+
+    def _check_generation(self):
+        """Clear the cache if the data generation moved on. Caller holds the lock."""
+        if self.generation_fn is None:
+            return
+        generation = self.generation_fn()
+        if generation != self.generation:
+            self.entries.clear()
+            self.generation = generation
+            self.counters["invalidations"] += 1
+
+    def get(self, key, default=MISSING):
+        """Return the cached value for `key`, or `default` if absent or expired."""
+        with self.lock:
+            self._check_generation()
+            entry = self.entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                self.counters["expirations"] += 1
+                self.counters["misses"] += 1
+                return default
+
+            self.entries.move_to_end(key)
+            self.counters["negative_hits" if value is None else "hits"] += 1
+            return value
+
+    def set(self, key, value):
+        """Cache `value` under `key`, evicting the least recently used entry when full."""
+        ttl = self.negative_ttl if value is None else self.ttl
+        with self.lock:
+            self._check_generation()
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def clear(self):
+        """Drop every entry."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss/eviction counters and the current size."""
+        with self.lock:
+            return {**self.counters, "size": len(self.entries), "maxsize": self.maxsize}
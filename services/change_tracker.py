@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+from config.settings import CHANGE_STATE_PATH, CHANGE_STATE_RETENTION_DAYS
+from services.schema import FLIGHT_COLUMNS, KEY_COLUMNS
+
+# 🧬 Change detection for the polling ingest
+# Keeps a content hash of the last version written for each (flight_date, flight_number)
+# in a small SQLite file, so repeated polls only forward rows that are new or changed.
+
+
+def row_hash(row: dict) -> str:
+    """Stable digest of every column of a formatted row."""
+    payload = json.dumps([row.get(col) for col in FLIGHT_COLUMNS], default=str, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ChangeTracker:
+    """
+    Persistent key → content-hash map of the rows already written to the flight store.
+
+    Call `filter_changed` before uploading and `commit` once the upload succeeded,
+    so a failed upload is retried on the next poll.
+    """
+
+    def __init__(self, path: str = CHANGE_STATE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS row_hashes ("
+                "flight_date TEXT, flight_number TEXT, hash TEXT, "
+                "PRIMARY KEY (flight_date, flight_number)) WITHOUT ROWID"
+            )
+
+    def filter_changed(self, rows: list) -> tuple:
+        """
+        Split rows into those that differ from the last written version and the rest.
+        Rows without a full key are always treated as changed.
+
+        Returns:
+        - tuple: (changed rows, number of unchanged rows)
+        """
+        keyed = [row for row in rows if all(row.get(col) for col in KEY_COLUMNS)]
+        known = self._lookup({(row["flight_date"], row["flight_number"]) for row in keyed})
+
+        changed = []
+        for row in rows:
+            key = (row.get("flight_date"), row.get("flight_number"))
+            if known.get(key) != row_hash(row):
+                changed.append(row)
+        return changed, len(rows) - len(changed)
+
+    def _lookup(self, keys: set) -> dict:
+        """Stored hashes for `keys`, fetched one flight date at a time."""
+        by_date = {}
+        for flight_date, number in keys:
+            by_date.setdefault(flight_date, []).append(number)
+
+        known = {}
+        with self.lock:
+            for flight_date, numbers in by_date.items():
+                # Stay well under SQLite's bound-parameter limit
+                for start in range(0, len(numbers), 500):
+                    chunk = numbers[start:start + 500]
+                    marks = ", ".join("?" for _ in chunk)
+                    rows = self.conn.execute(
+                        f"SELECT flight_number, hash FROM row_hashes "
+                        f"WHERE flight_date = ? AND flight_number IN ({marks})",
+                        (flight_date, *chunk),
+                    )
+                    known.update(((flight_date, number), digest) for number, digest in rows)
+        return known
+
+    def commit(self, rows: list):
+        """Record rows as written."""
+        entries = [(row["flight_date"], row["flight_number"], row_hash(row))
+                   for row in rows if all(row.get(col) for col in KEY_COLUMNS)]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO row_hashes (flight_date, flight_number, hash) VALUES (?, ?, ?) "
+                "ON CONFLICT (flight_date, flight_number) DO UPDATE SET hash = excluded.hash",
+                entries,
+            )
+
+    def prune(self, retention_days: int = CHANGE_STATE_RETENTION_DAYS) -> int:
+        """Forget flight dates older than `retention_days`; returns the number of entries dropped."""
+        cutoff = (date.today() - timedelta(days=retention_days)).isoformat()
+        with self.lock, self.conn:
+            return self.conn.execute("DELETE FROM row_hashes WHERE flight_date < ?", (cutoff,)).rowcount
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM row_hashes").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
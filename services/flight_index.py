@@ -0,0 +1,309 @@
+import bisect
+import os
+import sys
+import threading
+from array import array
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+from config.settings import FLIGHT_INDEX_PATH, STATUS_LOOKBACK_DAYS, SUGGEST_MAX_EDITS, SUGGEST_LIMIT
+from services.ingest_marker import current_generation
+from storage import get_store
+
+# 🔤 Known flight numbers
+# Every flight number written by ingest, with the last date it flew, kept as a sorted list in
+# memory and as an append-only file next to the ingest marker. The sorted list doubles as an
+# implicit prefix trie: bisect finds the block of numbers sharing a prefix, which drives
+# autocomplete and a bounded edit-distance search. Numbers it does not hold were never written,
+# so they are answered without a query. Writers (the ingest script, dashboard refreshes) append
+# and compact under an flock on `<file>.lock`, so a compaction never drops another process's lines.
+
+# Sorts after every character a flight number can contain, closing a prefix range
+PREFIX_END = "\x7f"
+
+# Prefix completions scanned before ranking
+MAX_COMPLETIONS_SCANNED = 1000
+
+
+def _today_ordinal() -> int:
+    return datetime.now(timezone.utc).date().toordinal()
+
+
+def _ordinal(value) -> int:
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.toordinal()
+
+
+class FlightNumberIndex:
+    """
+    Sorted flight numbers with the date each last flew.
+
+    - `numbers`: sorted, interned flight numbers
+    - `last_seen`: day ordinal of the latest flight_date, aligned with `numbers`
+    - `authoritative`: True once the file exists (seeded from the store's whole history) and every
+      line of it parsed; until then nothing is short-circuited
+    """
+
+    # Superseded lines tolerated before the file is compacted
+    compact_slack = 10000
+
+    def __init__(self, path: str = FLIGHT_INDEX_PATH, generation_fn=current_generation):
+        self.path = path
+        self.generation_fn = generation_fn
+        self.numbers = []
+        self.last_seen = array("I")
+        self.authoritative = False
+        self.generation = None
+        self.offset = 0      # bytes of the file already merged
+        self.inode = None
+        self.lines = 0       # lines merged so far (drives compaction)
+        self.damaged = False  # a line of the current file could not be parsed
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    # 🔄 Loading and incremental updates
+
+    def _merge(self, entries: dict):
+        """Merge number -> day ordinal pairs, keeping the latest date per number."""
+        new = {}
+        for number, day in entries.items():
+            i = bisect.bisect_left(self.numbers, number)
+            if i < len(self.numbers) and self.numbers[i] == number:
+                if self.last_seen[i] < day:
+                    self.last_seen[i] = day
+            else:
+                new[sys.intern(number)] = day
+        if len(new) > 1000:
+            # Large batches (first load, backfills): one sort instead of many inserts
+            merged = dict(zip(self.numbers, self.last_seen))
+            merged.update(new)
+            self.numbers = sorted(merged)
+            self.last_seen = array("I", (merged[number] for number in self.numbers))
+        else:
+            for number, day in new.items():
+                i = bisect.bisect_left(self.numbers, number)
+                self.numbers.insert(i, number)
+                self.last_seen.insert(i, day)
+
+    def _read_file(self):
+        """Merge lines appended since the last read; start over if the file was rewritten."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.numbers, self.last_seen, self.offset, self.lines = [], array("I"), 0, 0
+            self.inode, self.damaged = stat.st_ino, False
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        # A line still being appended by another process is picked up next time
+        complete = data[:data.rfind(b"\n") + 1]
+        entries = {}
+        for line in complete.decode("ascii", "replace").splitlines():
+            number, _, day = line.partition(",")
+            try:
+                day = _ordinal(day)
+            except ValueError:
+                # Damaged line: its number may be missing, so stop short-circuiting until the next reseed
+                self.damaged = True
+                continue
+            if number and entries.get(number, 0) < day:
+                entries[number] = day
+        self._merge(entries)
+        self.offset += len(complete)
+        self.lines += complete.count(b"\n")
+        self.authoritative = not self.damaged
+
+    def refresh(self):
+        """Pick up numbers written by ingest, once per ingest generation."""
+        generation = self.generation_fn()
+        if generation == self.generation and self.authoritative:
+            return
+        with self.lock:
+            self.generation = generation
+            self._read_file()
+
+    def record(self, rows, store=None):
+        """
+        Ingest side: add the flight numbers of freshly written rows and append them to the file.
+        Call before bumping the ingest generation, so readers that see the new generation also
+        see the new numbers. The first call seeds the file from every flight the store holds
+        (`store`, the one the rows were written to; the configured store when None).
+        """
+        with self.lock, self._file_lock():
+            self._read_file()
+            if not self.authoritative:
+                self._seed(store or get_store())
+            changes = {}
+            for row in rows:
+                number, flight_date = row.get("flight_number"), row.get("flight_date")
+                if not number or not flight_date:
+                    continue
+                day = _ordinal(flight_date)
+                i = bisect.bisect_left(self.numbers, number)
+                known = i < len(self.numbers) and self.numbers[i] == number
+                if (not known or self.last_seen[i] < day) and changes.get(number, 0) < day:
+                    changes[number] = day
+            if changes:
+                with open(self.path, "a", encoding="ascii") as f:
+                    f.writelines(f"{number},{date.fromordinal(day).isoformat()}\n" for number, day in changes.items())
+                self._read_file()
+            if self.lines > 2 * len(self.numbers) + self.compact_slack:
+                self._rewrite()
+        return len(changes)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive inter-process lock held across a read-append-compact cycle of the file."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def _seed(self, store):
+        """
+        Start the file from every flight the store already holds: status lookups fall back to the
+        whole history, so a number missing here must really be unknown to the store.
+        """
+        entries = {}
+        for row in store.iter_flights(["flight_number", "flight_date"], date.min.isoformat()):
+            number, day = row["flight_number"], _ordinal(row["flight_date"])
+            if number and entries.get(number, 0) < day:
+                entries[number] = day
+        self._merge(entries)
+        self._rewrite()
+
+    def _rewrite(self):
+        """Replace the file with one line per number (drops superseded dates); call under `_file_lock`."""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="ascii") as f:
+            f.writelines(f"{number},{date.fromordinal(day).isoformat()}\n"
+                         for number, day in zip(self.numbers, self.last_seen))
+        os.replace(tmp_path, self.path)
+        stat = os.stat(self.path)
+        self.inode, self.offset, self.lines = stat.st_ino, stat.st_size, len(self.numbers)
+        self.authoritative, self.damaged = True, False
+
+    # 🔎 Lookups
+
+    def _position(self, number: str) -> int:
+        i = bisect.bisect_left(self.numbers, number)
+        return i if i < len(self.numbers) and self.numbers[i] == number else -1
+
+    def _is_recent(self, i: int, today: int) -> bool:
+        return self.last_seen[i] >= today - STATUS_LOOKBACK_DAYS
+
+    def can_exist(self, number: str) -> bool:
+        """
+        False only when the index is authoritative and ingest has never written the number,
+        i.e. a store lookup is certain to find nothing.
+        """
+        self.refresh()
+        with self.lock:
+            return not self.authoritative or self._position(number) >= 0
+
+    def complete(self, prefix: str, limit: int = SUGGEST_LIMIT) -> list:
+        """Recently flown numbers starting with `prefix`, shortest first."""
+        self.refresh()
+        with self.lock:
+            lo = bisect.bisect_left(self.numbers, prefix)
+            hi = min(bisect.bisect_left(self.numbers, prefix + PREFIX_END, lo), lo + MAX_COMPLETIONS_SCANNED)
+            today = _today_ordinal()
+            matches = [self.numbers[i] for i in range(lo, hi) if self._is_recent(i, today)]
+        return sorted(matches, key=lambda number: (len(number), number))[:limit]
+
+    def within(self, word: str, max_edits: int) -> list:
+        """
+        Numbers within `max_edits` (Levenshtein) of `word`, as (distance, number) pairs.
+        Walks the implicit trie depth-first, one edit-distance row per prefix, and prunes
+        a prefix as soon as its whole row exceeds `max_edits`.
+        """
+        numbers, matches = self.numbers, []
+        stack = [("", 0, len(numbers), list(range(len(word) + 1)))]
+        while stack:
+            prefix, lo, hi, row = stack.pop()
+            depth = len(prefix)
+            # A number equal to the prefix sorts first in its block
+            if lo < hi and len(numbers[lo]) == depth:
+                if row[-1] <= max_edits:
+                    matches.append((row[-1], numbers[lo]))
+                lo += 1
+
+            if min(row) < max_edits:
+                # Budget left: every next character may still lead to a match
+                children = []
+                while lo < hi:
+                    child = prefix + numbers[lo][depth]
+                    end = bisect.bisect_left(numbers, child + PREFIX_END, lo, hi)
+                    children.append((child, lo, end))
+                    lo = end
+            else:
+                # Budget spent: only a character matching the word where the row sits at the
+                # budget keeps a cell within it, so look those few children up directly
+                children = []
+                for char in {word[col] for col in range(len(word)) if row[col] == max_edits}:
+                    child = prefix + char
+                    start = bisect.bisect_left(numbers, child, lo, hi)
+                    end = bisect.bisect_left(numbers, child + PREFIX_END, start, hi)
+                    if start < end:
+                        children.append((child, start, end))
+
+            for child, start, end in children:
+                char = child[-1]
+                next_row = [row[0] + 1]
+                for col in range(1, len(word) + 1):
+                    next_row.append(min(next_row[col - 1] + 1, row[col] + 1,
+                                        row[col - 1] + (word[col - 1] != char)))
+                if min(next_row) <= max_edits:
+                    stack.append((child, start, end, next_row))
+        return matches
+
+    def suggest(self, text: str, limit: int = SUGGEST_LIMIT) -> list:
+        """
+        "Did you mean" candidates for a mistyped or partial flight number: recently flown numbers
+        closest by edit distance, then completions of it as a prefix.
+
+        Returns:
+        - list[str]: Up to `limit` flight numbers, best first (never `text` itself).
+        """
+        word = text.strip().upper()
+        if not word:
+            return []
+        self.refresh()
+        # One edit for typical lengths, up to SUGGEST_MAX_EDITS for long inputs: two edits on a
+        # five-character number would match a large share of all numbers (and visit most of the trie)
+        max_edits = min(SUGGEST_MAX_EDITS, max(1, (len(word) - 1) // 3))
+        with self.lock:
+            today = _today_ordinal()
+            close = [(distance, number) for distance, number in self.within(word, max_edits)
+                     if number != word and self._is_recent(self._position(number), today)]
+        ranked = [number for _, number in sorted(close, key=lambda item: (item[0], len(item[1]), item[1]))]
+        for number in self.complete(word, limit):
+            if number not in ranked and number != word:
+                ranked.append(number)
+        return ranked[:limit]
+
+
+# 🔒 Process-wide index, loaded on first use
+_index = None
+_lock = threading.Lock()
+
+
+def get_flight_index() -> FlightNumberIndex:
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = FlightNumberIndex()
+    return _index
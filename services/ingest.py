@@ -0,0 +1,107 @@
+import threading
+import time
+
+from services import metrics
+from services.airports import get_airport_index
+from services.flight_index import get_flight_index
+from services.ingest_marker import bump_generation
+from storage import get_store
+
+# 📥 Shared ingest steps used by fetch_and_upload.py and the dashboard refresh
+
+
+# Upload modes: reconcile against existing rows, or bulk-append (backfills)
+UPLOAD_MODES = ("merge", "append")
+
+# The rollup refresh is one transaction on the shared rollup table, and BigQuery aborts concurrent
+# transactions on the same table: parallel ingests (backfill workers) refresh it one at a time
+_rollup_lock = threading.Lock()
+
+
+def ingest_rows(rows, store=None, mode: str = "merge") -> dict:
+    """
+    Write formatted rows into the flight store and keep derived data in sync.
+
+    - `merge` upserts keyed on (flight_date, flight_number); `append` bulk-loads
+      without touching existing rows.
+
+    - Refreshes the daily route/airline rollup for the flight dates in the batch.
+    - Records new flight numbers in the known-number index.
+    - Bumps the ingest generation so cached chat answers are invalidated.
+
+    Returns:
+    - dict: Counts of `inserted`, `updated` and `unchanged` rows.
+    """
+    store = store or get_store()
+    with metrics.span("ingest_write", mode=mode):
+        stats = store.append_rows(rows) if mode == "append" else store.upsert_rows(rows)
+    for key in ("inserted", "updated", "unchanged"):
+        metrics.incr(f"rows_{key}", stats[key])
+
+    # Only days that actually changed need their rollup rows rebuilt
+    if stats["inserted"] or stats["updated"]:
+        flight_dates = sorted({row["flight_date"] for row in rows if row.get("flight_date")})
+        with _rollup_lock, metrics.span("rollup_refresh"):
+            store.refresh_route_rollup(flight_dates)
+        # Known flight numbers first, so readers that see the new generation also see the new numbers
+        get_flight_index().record(rows, store=store)
+        bump_generation(flight_dates=flight_dates)
+
+    # Share airports first seen in this batch with the chat processes
+    get_airport_index().save_learned()
+
+    return stats
+
+
+def ingest_pages(pages, upload, chunk_size: int, spool=None, purge: bool = False, report=None) -> dict:
+    """
+    Upload `(record_id, raw page)` pairs in batches of `chunk_size` flights.
+    Once a batch is written, its pages are acknowledged in the spool; if it fails they
+    stay pending for replay. With `purge`, fully acknowledged segments are deleted after each ack.
+
+    Parameters:
+    - upload (callable): Writes a batch of raw flights; returns its inserted/updated/unchanged
+      counts (and `bytes`), or None when nothing was written.
+    - report (callable): Called with the running summary after every page and every batch.
+
+    Returns:
+    - dict: `pages`, `fetched` flights, `rows`, `changed` rows, `inserted`/`updated`/`unchanged`
+      counts, `bytes` uploaded and elapsed `seconds`.
+    """
+    summary = {"pages": 0, "fetched": 0, "rows": 0, "changed": 0,
+               "inserted": 0, "updated": 0, "unchanged": 0, "bytes": 0}
+    pending, pending_ids = [], []
+    started = time.perf_counter()
+
+    def flush():
+        stats = upload(pending)
+        if stats:
+            for key in ("inserted", "updated", "unchanged"):
+                summary[key] += stats[key]
+            summary["rows"] += stats["inserted"] + stats["updated"] + stats["unchanged"]
+            summary["changed"] += stats["inserted"] + stats["updated"]
+            summary["bytes"] += stats.get("bytes", 0)
+        if spool is not None and pending_ids:
+            spool.ack(pending_ids)
+            if purge:
+                spool.purge_acked()
+        if report:
+            report(dict(summary))
+
+    for record_id, page in pages:
+        flights = page.get("data") or []
+        summary["pages"] += 1
+        summary["fetched"] += len(flights)
+        pending += flights
+        pending_ids.append(record_id)
+        if report:
+            report(dict(summary))
+        if len(pending) >= chunk_size:
+            flush()
+            pending, pending_ids = [], []
+
+    if pending_ids:
+        flush()
+
+    summary["seconds"] = time.perf_counter() - started
+    return summary
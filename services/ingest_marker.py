@@ -0,0 +1,118 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: bumps are only serialized within one process
+    fcntl = None
+
+from config.settings import INGEST_MARKER_PATH
+
+# 🔖 Ingest generation marker
+# A tiny counter file bumped after every successful upload. Readers in other
+# processes compare generations to know when their cached answers are stale, and
+# the dates log tells incremental readers which flight dates each generation touched.
+# Bumps from different processes (ingest script, dashboard refresh) are serialized by an
+# flock on `<marker>.lock`, so no bump, and no cache invalidation, is lost.
+
+# The flight dates of each generation are logged next to the marker; past this size the older half is dropped
+MAX_DATES_LOG_BYTES = 256 * 1024
+
+_lock = threading.Lock()
+_last_mtime = None
+_last_generation = 0
+
+
+def current_generation(path: str = INGEST_MARKER_PATH) -> int:
+    """
+    Return the current ingest generation (0 if nothing has been ingested yet).
+    The file is only re-read when its modification time changes.
+    """
+    global _last_mtime, _last_generation
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+    with _lock:
+        if mtime != _last_mtime:
+            try:
+                with open(path) as f:
+                    _last_generation = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                _last_generation = 0
+            _last_mtime = mtime
+        return _last_generation
+
+
+def bump_generation(path: str = INGEST_MARKER_PATH, flight_dates: list = None) -> int:
+    """
+    Increment the ingest generation atomically and return the new value. The read-modify-write
+    runs under an exclusive flock, so concurrent bumps from several processes each count.
+
+    Parameters:
+    - flight_dates (list): ISO flight dates the ingest wrote, logged so readers can resync just
+      those days (see `changed_dates`). Leave it out when unknown; readers then reload everything.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _lock, open(f"{path}.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            with open(path) as f:
+                generation = int(f.read().strip() or 0) + 1
+        except (OSError, ValueError):
+            generation = 1
+
+        # Logged before the marker moves, so a reader that sees the generation also sees its dates
+        _log_dates(path, generation, flight_dates)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(generation))
+        os.replace(tmp_path, path)
+    return generation
+
+
+def _log_dates(path: str, generation: int, flight_dates: list):
+    """Append "<generation> <date> <date> ..." ("*" for unknown dates), trimming the log when it grows."""
+    log_path = f"{path}.dates"
+    dates = " ".join(sorted(set(flight_dates))) if flight_dates is not None else "*"
+    with open(log_path, "a") as f:
+        f.write(f"{generation} {dates}\n")
+    if os.path.getsize(log_path) > MAX_DATES_LOG_BYTES:
+        with open(log_path) as f:
+            lines = f.readlines()
+        tmp_path = f"{log_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(lines[len(lines) // 2:])
+        os.replace(tmp_path, log_path)
+
+
+def changed_dates(since: int, until: int, path: str = INGEST_MARKER_PATH) -> set:
+    """
+    Flight dates written by the ingests after generation `since`, up to and including `until`.
+
+    Returns:
+    - set[str]: ISO flight dates, or None when the log cannot tell (an ingest without dates,
+      or generations already trimmed from the log) and the reader should reload everything.
+    """
+    try:
+        with open(f"{path}.dates") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return None
+
+    dates, logged = set(), set()
+    for line in lines:
+        generation, _, written = line.partition(" ")
+        try:
+            generation = int(generation)
+        except ValueError:
+            continue
+        if not since < generation <= until:
+            continue
+        if written.strip() == "*":
+            return None
+        logged.add(generation)
+        dates.update(written.split())
+    return dates if logged.issuperset(range(since + 1, until + 1)) else None
@@ -0,0 +1,198 @@
+import json
+import threading
+import time
+from contextlib import nullcontext
+
+from config.settings import METRICS_ENABLED
+
+# 📈 Lightweight in-process instrumentation
+# Timing spans and counters for the hot paths (API fetch, row formatting, BigQuery jobs,
+# agent routing), exported as Prometheus text or JSON. While disabled every call returns
+# immediately, so the instrumentation can stay in place on production paths.
+
+PREFIX = "flight_"
+
+_enabled = METRICS_ENABLED
+_lock = threading.Lock()
+_counters = {}   # (name, labels) -> value
+_spans = {}      # (name, labels) -> [count, sum_seconds, max_seconds]
+_NULL_SPAN = nullcontext()
+
+
+def enable(flag: bool = True):
+    """Turn collection on or off at runtime (e.g. from a script flag or a benchmark)."""
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Drop everything collected so far."""
+    with _lock:
+        _counters.clear()
+        _spans.clear()
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted(labels.items())) if labels else ()
+
+
+def incr(name: str, value: float = 1, **labels):
+    """Add `value` to a counter."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, **labels):
+    """Record one duration for a span."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        stats = _spans.get(key)
+        if stats is None:
+            _spans[key] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+
+class _Span:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.started, **self.labels)
+        if exc_type is not None:
+            incr("errors", span=self.name, error=exc_type.__name__)
+        return False
+
+
+def span(name: str, **labels):
+    """
+    Time a block: `with span("api_fetch"): ...`.
+    Exceptions are counted under `errors{span=name}` and re-raised.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, labels)
+
+
+def record_job(job, stage: str):
+    """Record bytes processed, slot time and cache use of a finished BigQuery job."""
+    if not _enabled:
+        return
+    incr("bq_jobs", stage=stage)
+    incr("bq_bytes_processed", getattr(job, "total_bytes_processed", None) or 0, stage=stage)
+    incr("bq_slot_millis", getattr(job, "slot_millis", None) or 0, stage=stage)
+    if getattr(job, "cache_hit", False):
+        incr("bq_cache_hits", stage=stage)
+
+
+# 📤 Export
+
+def snapshot() -> dict:
+    """All counters and span statistics as plain JSON-friendly data."""
+    with _lock:
+        counters = [{"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(_counters.items())]
+        spans = [{"name": name, "labels": dict(labels), "count": count, "sum_seconds": round(total, 6),
+                  "avg_ms": round(total / count * 1000, 3), "max_ms": round(peak * 1000, 3)}
+                 for (name, labels), (count, total, peak) in sorted(_spans.items())]
+    return {"enabled": _enabled, "counters": counters, "spans": spans}
+
+
+def _labels_text(labels: tuple, **extra) -> str:
+    pairs = list(labels) + sorted(extra.items())
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def to_prometheus() -> str:
+    """Render the collected metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        spans = sorted(_spans.items())
+
+    lines, typed = [], set()
+    for (name, labels), value in counters:
+        metric = f"{PREFIX}{name}_total"
+        if metric not in typed:
+            lines.append(f"# TYPE {metric} counter")
+            typed.add(metric)
+        lines.append(f"{metric}{_labels_text(labels)} {value}")
+
+    if spans:
+        lines.append(f"# TYPE {PREFIX}span_seconds summary")
+        for (name, labels), (count, total, _) in spans:
+            lines.append(f"{PREFIX}span_seconds_count{_labels_text(labels, span=name)} {count}")
+            lines.append(f"{PREFIX}span_seconds_sum{_labels_text(labels, span=name)} {total:.6f}")
+        lines.append(f"# TYPE {PREFIX}span_seconds_max gauge")
+        for (name, labels), (_, _, peak) in spans:
+            lines.append(f"{PREFIX}span_seconds_max{_labels_text(labels, span=name)} {peak:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+def dump_json(path: str):
+    """Write `snapshot()` to a JSON file."""
+    with open(path, "w") as f:
+        json.dump(snapshot(), f, indent=2)
+
+
+def _handler_class():
+    """Build the request handler; http.server is only imported once an endpoint is served."""
+    from http.server import BaseHTTPRequestHandler
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") == "/metrics":
+                body, content_type = to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path.rstrip("/") == "/metrics.json":
+                body, content_type = json.dumps(snapshot()), "application/json"
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return _MetricsHandler
+
+
+def serve(port: int, host: str = "127.0.0.1"):
+    """
+    Expose `/metrics` (Prometheus text) and `/metrics.json` on a background thread.
+    Enables collection as a side effect.
+
+    Returns:
+    - ThreadingHTTPServer: Call `.shutdown()` to stop it.
+    """
+    from http.server import ThreadingHTTPServer
+
+    enable()
+    server = ThreadingHTTPServer((host, port), _handler_class())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
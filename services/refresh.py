@@ -0,0 +1,97 @@
+import threading
+import time
+
+from config.settings import FETCH_MAX_PAGES
+from services.aviationstack import get_api_client
+from services.ingest import ingest_pages, ingest_rows
+from services.spool import Spool
+from services.transform import rows_from_flights
+
+# Flights accumulated before each upsert, so progress is visible while pages are still arriving
+REFRESH_BATCH_SIZE = 1000
+
+
+def refresh_from_api(report, max_pages: int = FETCH_MAX_PAGES, batch_size: int = REFRESH_BATCH_SIZE,
+                     spool: Spool = None) -> dict:
+    """
+    Fetch the latest flights from Aviationstack and upsert them in batches.
+    Raw pages go to the local spool first and are acknowledged once upserted
+    (the same batching as `fetch_and_upload.py`, via `ingest_pages`).
+
+    Parameters:
+    - report (callable): Called with keyword progress updates (`pages`, `flights`, `rows_upserted`).
+    - max_pages (int): Max pages of 100 flights to fetch.
+    - batch_size (int): Flights per upsert.
+    - spool (Spool): Spool to write to; by default one is opened for this refresh and closed after it.
+
+    Returns:
+    - dict: Total `inserted`, `updated` and `unchanged` counts.
+    """
+    own_spool = spool is None
+    spool = spool or Spool()
+
+    def fetched():
+        for page in get_api_client().iter_pages(max_pages=max_pages):
+            yield spool.append(page), page
+
+    def progress(summary):
+        report(pages=summary["pages"], flights=summary["fetched"], rows_upserted=summary["rows"])
+
+    try:
+        summary = ingest_pages(fetched(), lambda flights: ingest_rows(rows_from_flights(flights)),
+                               batch_size, spool=spool, report=progress)
+    finally:
+        if own_spool:
+            spool.close()
+    return {key: summary[key] for key in ("inserted", "updated", "unchanged")}
+
+
+class RefreshManager:
+    """
+    Runs API refreshes on a background thread, one at a time (single-flight).
+
+    Starting a refresh while one is running joins the running job instead of
+    launching a duplicate. `version` increases only when a job finishes
+    successfully, so readers can key their caches on it and switch to fresh
+    data in one step.
+    """
+
+    def __init__(self, job=refresh_from_api):
+        self.job = job
+        self.lock = threading.Lock()
+        self.thread = None
+        self.version = 0
+        self.state = {"running": False, "pages": 0, "flights": 0, "rows_upserted": 0,
+                      "started_at": None, "finished_at": None, "stats": None, "error": None}
+
+    def start(self) -> bool:
+        """Start a refresh unless one is already running. Returns True if a new job was started."""
+        with self.lock:
+            if self.state["running"]:
+                return False
+            self.state.update(running=True, pages=0, flights=0, rows_upserted=0,
+                              started_at=time.time(), finished_at=None, stats=None, error=None)
+            self.thread = threading.Thread(target=self._run, name="flight-refresh", daemon=True)
+            self.thread.start()
+            return True
+
+    def _report(self, **progress):
+        with self.lock:
+            self.state.update(progress)
+
+    def _run(self):
+        stats, error = None, None
+        try:
+            stats = self.job(self._report)
+        except Exception as e:
+            error = str(e)
+
+        with self.lock:
+            self.state.update(running=False, finished_at=time.time(), stats=stats, error=error)
+            if error is None:
+                self.version += 1
+
+    def status(self) -> dict:
+        """Snapshot of the current (or last) job's progress."""
+        with self.lock:
+            return {**self.state, "version": self.version}
@@ -0,0 +1,69 @@
+# 🧾 Shared flight table schema
+# Single source of truth for the column layout used by setup, ingest and the upsert path.
+
+# (column name, BigQuery type) in table order
+FLIGHT_SCHEMA = [
+    ("flight_date", "DATE"),
+    ("airline_name", "STRING"),
+    ("flight_number", "STRING"),
+    ("departure_airport", "STRING"),
+    ("arrival_airport", "STRING"),
+    ("status", "STRING"),
+    ("scheduled_departure", "TIMESTAMP"),
+    ("scheduled_arrival", "TIMESTAMP"),
+    ("departure_iata", "STRING"),
+    ("arrival_iata", "STRING"),
+    ("airline_iata", "STRING"),
+]
+
+# 🗂️ Physical layout of the flight table: daily partitions, clustered for point and route lookups
+PARTITION_FIELD = "flight_date"
+CLUSTER_FIELDS = ["flight_number", "departure_iata", "arrival_iata"]
+
+FLIGHT_COLUMNS = [name for name, _ in FLIGHT_SCHEMA]
+
+def check_columns(columns):
+    """Validate a column projection against the flight schema (guards interpolated SQL)."""
+    unknown = [col for col in columns if col not in FLIGHT_COLUMNS]
+    if unknown:
+        raise ValueError(f"❌ Unknown flight columns: {unknown}")
+    return list(columns)
+
+# A flight is uniquely identified by its date and IATA flight number
+KEY_COLUMNS = ("flight_date", "flight_number")
+
+# Columns that may change between polls for the same key
+VALUE_COLUMNS = [name for name in FLIGHT_COLUMNS if name not in KEY_COLUMNS]
+
+# 📊 Daily route/airline rollup maintained at ingest time
+# Keyed on IATA airport codes. Durations are kept as sum + count so averages can be combined across days.
+ROUTE_ROLLUP_SCHEMA = [
+    ("flight_date", "DATE"),
+    ("origin", "STRING"),
+    ("destination", "STRING"),
+    ("airline", "STRING"),
+    ("flights", "INT64"),
+    ("duration_sum_min", "INT64"),
+    ("duration_count", "INT64"),
+]
+
+ROLLUP_CLUSTER_FIELDS = ["origin", "destination"]
+
+
+def dedupe_rows(rows):
+    """
+    Collapse rows sharing the same (flight_date, flight_number), keeping the last one seen.
+    Rows with a missing key are passed through untouched.
+
+    MERGE fails if more than one source row matches a target row, so the batch
+    must be unique on the key before it is staged.
+    """
+    keyed = {}
+    unkeyed = []
+    for row in rows:
+        key = tuple(row.get(col) for col in KEY_COLUMNS)
+        if all(key):
+            keyed[key] = row
+        else:
+            unkeyed.append(row)
+    return list(keyed.values()) + unkeyed
@@ -0,0 +1,71 @@
+import threading
+
+from services import metrics
+
+# 🛬 Request coalescing for identical concurrent lookups
+# The first caller for a key runs the lookup; callers arriving while it is in flight wait
+# for it and share its result (or its exception) instead of issuing their own job.
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls that share a key.
+
+    Callers are threads (agents running on the chat server's pool). Nothing is cached:
+    once a call finishes, the next caller for that key starts a new one.
+
+    Parameters:
+    - name (str): Label used for the `singleflight_*` metrics.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.calls = {}   # key -> _Call
+        self.counters = {"calls": 0, "shared": 0}
+
+    def do(self, key, fn):
+        """Run `fn()` unless a call for `key` is already in flight, in which case wait for its result."""
+        with self.lock:
+            self.counters["calls"] += 1
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.counters["shared"] += 1
+
+        if not leader:
+            metrics.incr("singleflight_shared", group=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            metrics.incr("singleflight_leader", group=self.name)
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        """Calls seen and how many were served by another caller's job (`shared` = jobs saved)."""
+        with self.lock:
+            return {**self.counters, "in_flight": len(self.calls)}
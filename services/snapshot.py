@@ -0,0 +1,326 @@
+import logging
+import sys
+import threading
+import time
+from array import array
+from datetime import date, datetime, timedelta, timezone
+
+from config.settings import SNAPSHOT_ENABLED, SNAPSHOT_LOOKBACK_DAYS, SNAPSHOT_TTL, STATUS_LOOKBACK_DAYS
+from services import metrics
+from services.ingest_marker import current_generation
+from storage import get_store
+
+logger = logging.getLogger(__name__)
+
+# 🧊 Compact in-memory snapshot of recent flights
+# Columnar and immutable once built: strings are interned into pools and rows hold 4-byte codes,
+# dates are day ordinals and timestamps are epoch seconds in typed arrays. Hash indexes on the
+# flight number and on (origin, destination) answer the chat lookups in microseconds; anything
+# the snapshot does not hold falls back to the store. Rebuilt in the background after each ingest.
+
+SNAPSHOT_COLUMNS = [
+    "flight_date", "flight_number", "airline_name", "departure_airport", "departure_iata",
+    "arrival_airport", "arrival_iata", "status", "scheduled_departure", "scheduled_arrival",
+]
+
+# Seconds to wait before retrying a failed build
+RETRY_AFTER = 60
+
+
+def _today() -> date:
+    # Matches CURRENT_DATE() in BigQuery and date('now') in SQLite
+    return datetime.now(timezone.utc).date()
+
+
+def _ordinal(value) -> int:
+    """Day ordinal of a DATE column value (date object or ISO string)."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.toordinal()
+
+
+def _epoch(value) -> float:
+    """Epoch seconds of a TIMESTAMP column value (datetime or ISO string); NaN when unknown."""
+    if value is None or value == "":
+        return float("nan")
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _timestamp(epoch: float):
+    return None if epoch != epoch else datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+class StringPool:
+    """Interns the distinct values of a column; rows store the 4-byte code instead of the string."""
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self):
+        self.codes = {}    # value -> code (doubles as the hash index on the value)
+        self.values = []   # code -> interned value
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            if isinstance(value, str):
+                value = sys.intern(value)
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class FlightSnapshot:
+    """
+    Flights dated on or after `start`, one row per (flight_date, flight_number).
+    Fill it with `add` before sharing it; readers never take a lock.
+    """
+
+    def __init__(self, start: date, generation: int = 0):
+        self.start = start
+        self.generation = generation
+        self.built_at = time.monotonic()
+
+        self.numbers = StringPool()   # flight numbers; code -> row of the latest flight_date via `latest`
+        self.strings = StringPool()   # airlines, airport names and codes, statuses
+
+        self.dates = array("I")              # flight_date as a day ordinal
+        self.flight_numbers = array("I")
+        self.airlines = array("I")
+        self.origins = array("I")            # departure_iata
+        self.destinations = array("I")       # arrival_iata
+        self.origin_names = array("I")       # departure_airport
+        self.destination_names = array("I")  # arrival_airport
+        self.statuses = array("I")
+        self.departures = array("d")         # scheduled_departure in epoch seconds (NaN when unknown)
+        self.arrivals = array("d")           # scheduled_arrival in epoch seconds (NaN when unknown)
+
+        self.latest = array("i")  # flight-number code -> row
+        self.routes = {}          # (origin code, destination code) -> array of rows
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def add(self, row):
+        """Append one store row (anything supporting `row[column]` for SNAPSHOT_COLUMNS)."""
+        if row["flight_date"] is None or row["flight_number"] is None:
+            return
+        index = len(self.dates)
+        day = _ordinal(row["flight_date"])
+        self.dates.append(day)
+
+        number = self.numbers.code(row["flight_number"])
+        self.flight_numbers.append(number)
+        if number == len(self.latest):
+            self.latest.append(index)
+        elif self.dates[self.latest[number]] <= day:
+            self.latest[number] = index
+
+        code = self.strings.code
+        self.airlines.append(code(row["airline_name"]))
+        self.origins.append(code(row["departure_iata"]))
+        self.destinations.append(code(row["arrival_iata"]))
+        self.origin_names.append(code(row["departure_airport"]))
+        self.destination_names.append(code(row["arrival_airport"]))
+        self.statuses.append(code(row["status"]))
+        self.departures.append(_epoch(row["scheduled_departure"]))
+        self.arrivals.append(_epoch(row["scheduled_arrival"]))
+
+        # Like the route rollup, only flights with both airport codes count towards a route
+        if row["departure_iata"] is not None and row["arrival_iata"] is not None:
+            key = (self.origins[index], self.destinations[index])
+            rows = self.routes.get(key)
+            if rows is None:
+                rows = self.routes[key] = array("I")
+            rows.append(index)
+
+    def covers(self, days: int) -> bool:
+        """True when every flight dated within the last `days` days is in the snapshot."""
+        return self.start.toordinal() <= _today().toordinal() - days
+
+    def record(self, index: int) -> dict:
+        """Rebuild the flight record of one row."""
+        values = self.strings.values
+        return {
+            "flight_date": date.fromordinal(self.dates[index]).isoformat(),
+            "flight_number": self.numbers.values[self.flight_numbers[index]],
+            "airline_name": values[self.airlines[index]],
+            "departure_airport": values[self.origin_names[index]],
+            "departure_iata": values[self.origins[index]],
+            "arrival_airport": values[self.destination_names[index]],
+            "arrival_iata": values[self.destinations[index]],
+            "status": values[self.statuses[index]],
+            "scheduled_departure": _timestamp(self.departures[index]),
+            "scheduled_arrival": _timestamp(self.arrivals[index]),
+        }
+
+    def get_flight(self, flight_number: str) -> dict:
+        """
+        Latest record of a flight number within the status lookback window.
+
+        Returns:
+        - dict: Flight record, or None when the snapshot does not hold it (ask the store).
+        """
+        number = self.numbers.codes.get(flight_number)
+        if number is None:
+            return None
+        index = self.latest[number]
+        if self.dates[index] < _today().toordinal() - STATUS_LOOKBACK_DAYS:
+            return None
+        return self.record(index)
+
+    def get_flights(self, flight_numbers: list) -> dict:
+        """Batched `get_flight`; numbers the snapshot does not hold are left out."""
+        records = {number: self.get_flight(number) for number in flight_numbers}
+        return {number: record for number, record in records.items() if record}
+
+    def route_summary(self, origin: str, dest: str, days: int = 7, limit: int = 3) -> list:
+        """
+        Same rows as `FlightStore.route_summary`, aggregated from the route index.
+        Only meaningful when `covers(days)`.
+        """
+        key = (self.strings.codes.get(origin), self.strings.codes.get(dest))
+        since = _today().toordinal() - days
+        per_airline = {}  # airline code -> [flights, duration minutes, flights with a duration]
+        for index in self.routes.get(key, ()):
+            if self.dates[index] < since:
+                continue
+            totals = per_airline.get(self.airlines[index])
+            if totals is None:
+                totals = per_airline[self.airlines[index]] = [0, 0, 0]
+            totals[0] += 1
+            seconds = self.arrivals[index] - self.departures[index]
+            if seconds == seconds:  # NaN when either timestamp is unknown
+                totals[1] += int(seconds / 60)
+                totals[2] += 1
+
+        busiest = sorted(per_airline.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return [
+            {"airline_name": self.strings.values[airline], "flights": flights,
+             "avg_duration": minutes / counted if counted else None}
+            for airline, (flights, minutes, counted) in busiest
+        ]
+
+    def route_summaries(self, routes: list, days: int = 7, limit: int = 3) -> dict:
+        return {(origin, dest): self.route_summary(origin, dest, days, limit) for origin, dest in routes}
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the snapshot: arrays, pools (with their strings) and indexes."""
+        columns = [self.dates, self.flight_numbers, self.airlines, self.origins, self.destinations,
+                   self.origin_names, self.destination_names, self.statuses, self.departures,
+                   self.arrivals, self.latest]
+        total = sum(sys.getsizeof(column) for column in columns)
+        for pool in (self.numbers, self.strings):
+            total += sys.getsizeof(pool.codes) + sys.getsizeof(pool.values)
+            total += sum(sys.getsizeof(value) for value in pool.values)
+            total += sum(sys.getsizeof(code) for code in range(256, len(pool.values)))  # boxed codes
+        total += sys.getsizeof(self.routes) + sum(sys.getsizeof(rows) + 64 for rows in self.routes.values())
+        return total
+
+    def stats(self) -> dict:
+        flights = len(self)
+        size = self.memory_bytes()
+        return {
+            "flights": flights,
+            "flight_numbers": len(self.numbers.values),
+            "routes": len(self.routes),
+            "start": self.start.isoformat(),
+            "generation": self.generation,
+            "memory_mb": round(size / 1e6, 2),
+            "mb_per_million_flights": round(size / flights, 1) if flights else None,
+        }
+
+
+class SnapshotManager:
+    """
+    Keeps the current `FlightSnapshot` and rebuilds it on a background thread when the
+    ingest generation changes or it is older than `ttl`. Until a snapshot matching the
+    current generation exists, `get` returns None and callers use the store.
+    """
+
+    def __init__(self, lookback_days: int = SNAPSHOT_LOOKBACK_DAYS, ttl: float = SNAPSHOT_TTL,
+                 generation_fn=current_generation):
+        self.lookback_days = lookback_days
+        self.ttl = ttl
+        self.generation_fn = generation_fn
+        self.snapshot = None
+        self.building = False
+        self.failed_at = None
+        self.lock = threading.Lock()
+        self.counters = {"builds": 0, "failures": 0, "last_build_seconds": None}
+
+    def get(self) -> FlightSnapshot:
+        generation = self.generation_fn()
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.generation == generation:
+            if time.monotonic() - snapshot.built_at > self.ttl:
+                self.refresh(generation)   # keep serving it while the replacement is built
+            return snapshot
+        self.refresh(generation)
+        return None
+
+    def refresh(self, generation: int = None):
+        """Start a background rebuild unless one is already running (or the last one just failed)."""
+        with self.lock:
+            if self.building or (self.failed_at and time.monotonic() - self.failed_at < RETRY_AFTER):
+                return
+            self.building = True
+        generation = self.generation_fn() if generation is None else generation
+        threading.Thread(target=self._rebuild, args=(generation,), name="flight-snapshot", daemon=True).start()
+
+    def _rebuild(self, generation: int):
+        try:
+            self.snapshot = self.build(generation)
+            self.failed_at = None
+        except Exception:
+            logger.exception("Building the flight snapshot failed; lookups keep using the store")
+            self.counters["failures"] += 1
+            self.failed_at = time.monotonic()
+        finally:
+            with self.lock:
+                self.building = False
+
+    def build(self, generation: int = 0) -> FlightSnapshot:
+        """Load the flights of the lookback window from the store into a new snapshot."""
+        started = time.perf_counter()
+        snapshot = FlightSnapshot(_today() - timedelta(days=self.lookback_days), generation)
+        with metrics.span("snapshot_build"):
+            for row in get_store().iter_flights(SNAPSHOT_COLUMNS, snapshot.start.isoformat()):
+                snapshot.add(row)
+
+        self.counters["builds"] += 1
+        self.counters["last_build_seconds"] = round(time.perf_counter() - started, 3)
+        stats = snapshot.stats()
+        logger.info("Flight snapshot built: %s flights, %s MB (%s bytes per flight) in %ss",
+                    stats["flights"], stats["memory_mb"], stats["mb_per_million_flights"],
+                    self.counters["last_build_seconds"])
+        return snapshot
+
+    def stats(self) -> dict:
+        snapshot = self.snapshot
+        return {**self.counters, "building": self.building,
+                "snapshot": snapshot.stats() if snapshot is not None else None}
+
+
+# 🔒 Process-wide manager, created on first use when SNAPSHOT_ENABLED is set
+_manager = None
+_lock = threading.Lock()
+
+
+def get_manager() -> SnapshotManager:
+    global _manager
+    if _manager is None:
+        with _lock:
+            if _manager is None:
+                _manager = SnapshotManager()
+    return _manager
+
+
+def get_snapshot() -> FlightSnapshot:
+    """Return the current flight snapshot, or None when disabled, still building or stale."""
+    if not SNAPSHOT_ENABLED:
+        return None
+    return get_manager().get()
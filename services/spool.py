@@ -0,0 +1,218 @@
+import glob
+import gzip
+import itertools
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+
+from config.settings import SPOOL_DIR, SPOOL_SEGMENT_BYTES, SPOOL_FSYNC
+
+try:
+    import fcntl
+except ImportError:  # Windows: an open segment cannot be deleted there anyway
+    fcntl = None
+
+# 🧾 Write-ahead spool of raw Aviationstack pages
+# Every fetched page is appended to a local, gzip-compressed NDJSON segment before it is
+# transformed or uploaded, and acknowledged once its rows are durably in the flight store.
+# Unacknowledged pages can be replayed later without spending API quota again.
+#
+# Layout: <SPOOL_DIR>/<millis>-<pid>-<n>.ndjson.gz segments (one gzip member per page, so a
+# torn write only loses its own page) with an <segment>.ack sidecar listing acked line numbers.
+# A writer holds an exclusive flock on its open segment, so purges in other processes leave it alone.
+
+READ_CHUNK_BYTES = 1 << 20
+
+# Distinguishes segments started by different Spool instances of one process in the same millisecond
+_segment_numbers = itertools.count()
+
+
+class Spool:
+    """
+    Append-only, segment-rotated spool of raw API payloads.
+
+    Parameters:
+    - directory (str): Where segments live.
+    - segment_bytes (int): Compressed size after which a new segment is started.
+    - fsync (bool): fsync every append and ack, so a crash never loses an acknowledged write.
+    """
+
+    def __init__(self, directory: str = SPOOL_DIR, segment_bytes: int = SPOOL_SEGMENT_BYTES,
+                 fsync: bool = SPOOL_FSYNC):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.file = None
+        self.segment = None
+        self.records = 0
+
+    # ✍️ Writing
+
+    def _rotate(self):
+        """Close the current segment and open a fresh one named after this writer."""
+        if self.file:
+            self.file.close()
+        # Names sort chronologically, and the pid keeps concurrent writers out of each other's files
+        self.segment = f"{int(time.time() * 1000):013d}-{os.getpid()}-{next(_segment_numbers)}.ndjson.gz"
+        path = os.path.join(self.directory, self.segment)
+        if fcntl is None:
+            self.file = open(path, "ab")
+        else:
+            # Locked before it appears under its segment name, so a purge never sees it unlocked;
+            # the lock is held until the segment is closed
+            self.file = open(path + ".new", "ab")
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+            os.rename(path + ".new", path)
+        self.records = 0
+
+    def append(self, payload: dict, params: dict = None) -> tuple:
+        """
+        Durably append one raw page.
+
+        Returns:
+        - tuple: Record id `(segment, line)` to pass to `ack` once the page is uploaded.
+        """
+        line = json.dumps({"fetched_at": time.time(), "params": params or {}, "payload": payload},
+                          separators=(",", ":")).encode("utf-8") + b"\n"
+        member = gzip.compress(line, compresslevel=6)
+
+        with self.lock:
+            if self.file is None or self.file.tell() >= self.segment_bytes:
+                self._rotate()
+            self.file.write(member)
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+            record_id = (self.segment, self.records)
+            self.records += 1
+        return record_id
+
+    def ack(self, record_ids):
+        """Mark records as durably uploaded."""
+        by_segment = {}
+        for segment, line in record_ids:
+            by_segment.setdefault(segment, []).append(line)
+
+        with self.lock:
+            for segment, lines in by_segment.items():
+                with open(os.path.join(self.directory, segment + ".ack"), "a") as f:
+                    f.write("".join(f"{line}\n" for line in lines))
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    # 📖 Reading
+
+    def segments(self) -> list:
+        """Segment names, oldest first."""
+        return sorted(os.path.basename(path) for path in glob.glob(os.path.join(self.directory, "*.ndjson.gz")))
+
+    def acked(self, segment: str) -> set:
+        """Line numbers of `segment` that have been acknowledged."""
+        try:
+            with open(os.path.join(self.directory, segment + ".ack")) as f:
+                return {int(line) for line in f if line.strip()}
+        except FileNotFoundError:
+            return set()
+
+    def iter_segment(self, segment: str):
+        """
+        Yield `(line, record)` for every complete record in a segment.
+
+        The file is memory-mapped and inflated one gzip member at a time, so only the
+        current page is held in memory. A torn member at the tail (crash mid-append) is skipped.
+        """
+        path = os.path.join(self.directory, segment)
+        if os.path.getsize(path) == 0:
+            return
+
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset, line_no, buffer = 0, 0, b""
+            inflater = zlib.decompressobj(wbits=31)
+            while offset < len(data) or inflater.unused_data:
+                if inflater.eof:
+                    # Next gzip member starts in the bytes left over from the previous one
+                    leftover = inflater.unused_data
+                    inflater = zlib.decompressobj(wbits=31)
+                    chunk = leftover
+                else:
+                    chunk = data[offset:offset + READ_CHUNK_BYTES]
+                    offset += len(chunk)
+                try:
+                    buffer += inflater.decompress(chunk)
+                except zlib.error:
+                    return
+
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    yield line_no, json.loads(line)
+                    line_no += 1
+
+    def iter_records(self, include_acked: bool = False):
+        """
+        Yield `((segment, line), record)` across all segments, oldest first.
+        Acknowledged records are skipped unless `include_acked` (full historical replay).
+        """
+        for segment in self.segments():
+            acked = set() if include_acked else self.acked(segment)
+            for line, record in self.iter_segment(segment):
+                if line not in acked:
+                    yield (segment, line), record
+
+    def stats(self) -> dict:
+        """Segments, records and how many are still waiting to be acknowledged."""
+        segments = self.segments()
+        total = pending = 0
+        for segment in segments:
+            acked = self.acked(segment)
+            for line, _ in self.iter_segment(segment):
+                total += 1
+                pending += line not in acked
+        size = sum(os.path.getsize(os.path.join(self.directory, s)) for s in segments)
+        return {"segments": len(segments), "records": total, "pending": pending, "bytes": size}
+
+    def purge_acked(self) -> int:
+        """
+        Delete segments whose every record is acknowledged; returns how many were removed.
+        The newest segment and any segment a writer (in this or another process) still has
+        open are kept, so no writer is left appending to an unlinked file.
+        """
+        removed = 0
+        for segment in self.segments()[:-1]:
+            if segment == self.segment:
+                continue
+            path = os.path.join(self.directory, segment)
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue  # purged by another process meanwhile
+            with f:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # still open for appending
+                acked = self.acked(segment)
+                if not all(line in acked for line, _ in self.iter_segment(segment)):
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue  # Windows refuses to delete a segment that is still open
+            try:
+                os.remove(path + ".ack")
+            except FileNotFoundError:
+                pass
+            removed += 1
+        return removed
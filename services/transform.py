@@ -0,0 +1,154 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from services import metrics
+from services.airports import get_airport_index
+from services.schema import FLIGHT_COLUMNS, KEY_COLUMNS
+
+# 🧾 Shared transform from raw Aviationstack payloads to flight table rows
+# `format_row` is the scalar reference; `flights_to_frame` is the columnar fast path
+# used for whole pages and produces exactly the same values.
+
+# Timestamps shaped like "2024-05-01T10:30:00+00:00" (or with "Z") are converted without
+# per-row datetime objects; anything else goes through the scalar `parse_ts`.
+FAST_TS_PATTERN = r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\+00:00|Z)$"
+
+
+def parse_ts(ts):
+    """
+    Convert ISO-formatted timestamp to string.
+    Handles nulls and Zulu time.
+    """
+    try:
+        dt = datetime.fromisoformat(ts.replace("Z", "+00:00")) if ts else None
+        return dt.isoformat() if dt else None
+    except Exception:
+        return None
+
+
+def format_row(item):
+    """
+    Convert each flight JSON object into a dict formatted for the flight table schema.
+    Airport codes are canonical IATA codes (falling back to the ICAO code or airport name).
+    """
+    airports = get_airport_index()
+    return {
+        "flight_date": item.get("flight_date"),
+        "airline_name": item.get("airline", {}).get("name"),
+        "flight_number": item.get("flight", {}).get("iata"),
+        "departure_airport": item.get("departure", {}).get("airport"),
+        "arrival_airport": item.get("arrival", {}).get("airport"),
+        "status": item.get("flight_status"),
+        "scheduled_departure": parse_ts(item.get("departure", {}).get("scheduled")),
+        "scheduled_arrival": parse_ts(item.get("arrival", {}).get("scheduled")),
+        "departure_iata": airports.code_for(item.get("departure", {})),
+        "arrival_iata": airports.code_for(item.get("arrival", {})),
+        "airline_iata": item.get("airline", {}).get("iata"),
+    }
+
+
+def parse_ts_column(values: pd.Series) -> pd.Series:
+    """
+    Vectorized `parse_ts` over a column of raw timestamp strings.
+    UTC timestamps are validated in one `to_datetime` call and re-emitted as
+    `YYYY-MM-DDTHH:MM:SS+00:00`; other shapes fall back to the scalar parser.
+    """
+    out = pd.Series(None, index=values.index, dtype=object)
+    text = values.astype("string")
+
+    fast = text.str.match(FAST_TS_PATTERN, na=False).to_numpy(dtype=bool)
+    if fast.any():
+        head = text[fast].str.slice(0, 19)
+        valid = pd.to_datetime(head, format="%Y-%m-%dT%H:%M:%S", errors="coerce").notna().to_numpy()
+        out.iloc[np.flatnonzero(fast)[valid]] = (head[valid] + "+00:00").astype(object).to_numpy()
+
+    slow = ~fast & values.notna().to_numpy(dtype=bool)
+    if slow.any():
+        out.iloc[np.flatnonzero(slow)] = [parse_ts(ts) for ts in values[slow]]
+    return out
+
+
+def flights_to_frame(flights, dedupe: bool = True) -> pd.DataFrame:
+    """
+    Turn a page (or several) of raw flight JSON into a columnar DataFrame of table rows.
+
+    - Rows without an IATA flight number are dropped with a single mask.
+    - Timestamps are parsed column-at-a-time.
+    - With `dedupe`, rows sharing (flight_date, flight_number) collapse to the last one seen.
+
+    Parameters:
+    - flights (list[dict]): Raw `data` items from the Aviationstack API.
+
+    Returns:
+    - pd.DataFrame: One column per entry in FLIGHT_COLUMNS, missing values as None.
+    """
+    with metrics.span("format_rows"):
+        frame = _build_frame(flights)
+    metrics.incr("rows_formatted", len(frame))
+
+    if dedupe:
+        with metrics.span("dedupe_rows"):
+            frame = dedupe_frame(frame)
+    return frame
+
+
+def _build_frame(flights) -> pd.DataFrame:
+    """Columnar extraction and timestamp parsing behind `flights_to_frame` (no dedupe)."""
+    flights = [item for item in flights if item]
+    flight = [item.get("flight", {}) for item in flights]
+    departure = [item.get("departure", {}) for item in flights]
+    arrival = [item.get("arrival", {}) for item in flights]
+    airline = [item.get("airline", {}) for item in flights]
+
+    # 🛫 Learn airports from the payload, then write canonical codes
+    airports = get_airport_index()
+    airports.learn(departure)
+    airports.learn(arrival)
+
+    frame = pd.DataFrame({
+        "flight_date": [item.get("flight_date") for item in flights],
+        "airline_name": [a.get("name") for a in airline],
+        "flight_number": [f.get("iata") for f in flight],
+        "departure_airport": [d.get("airport") for d in departure],
+        "arrival_airport": [a.get("airport") for a in arrival],
+        "status": [item.get("flight_status") for item in flights],
+        "scheduled_departure": [d.get("scheduled") for d in departure],
+        "scheduled_arrival": [a.get("scheduled") for a in arrival],
+        "departure_iata": [airports.code_for(d) for d in departure],
+        "arrival_iata": [airports.code_for(a) for a in arrival],
+        "airline_iata": [a.get("iata") for a in airline],
+    }, columns=FLIGHT_COLUMNS, dtype=object)
+
+    # 🧹 Drop rows without an IATA flight number in one pass (empty strings count as missing)
+    has_number = frame["flight_number"].notna() & (frame["flight_number"] != "")
+    frame = frame[has_number.to_numpy(dtype=bool)].reset_index(drop=True)
+
+    frame["scheduled_departure"] = parse_ts_column(frame["scheduled_departure"])
+    frame["scheduled_arrival"] = parse_ts_column(frame["scheduled_arrival"])
+    return frame
+
+
+def dedupe_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Keep the last row per (flight_date, flight_number); rows missing a key pass through."""
+    keyed = frame[list(KEY_COLUMNS)].notna().all(axis=1) & (frame["flight_date"] != "")
+    deduped = frame[keyed].drop_duplicates(subset=list(KEY_COLUMNS), keep="last")
+    return pd.concat([deduped, frame[~keyed]], ignore_index=True)
+
+
+def frame_to_rows(frame: pd.DataFrame) -> list:
+    """Convert a transformed frame back into row dicts with None for missing values."""
+    columns = list(frame.columns)
+    values = []
+    for col in columns:
+        series = frame[col]
+        if series.isna().any():
+            series = series.astype(object).where(series.notna(), None)
+        values.append(series.tolist())
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def rows_from_flights(flights, dedupe: bool = True) -> list:
+    """Shortcut: raw flight JSON → deduplicated row dicts ready for upload."""
+    return frame_to_rows(flights_to_frame(flights, dedupe=dedupe))
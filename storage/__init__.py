@@ -0,0 +1,38 @@
+import threading
+
+from config.settings import STORAGE_BACKEND
+
+# 🔒 Process-wide store, selected by STORAGE_BACKEND and built on first use
+_store = None
+_lock = threading.Lock()
+
+
+def create_store(backend: str = STORAGE_BACKEND):
+    """
+    Build a flight store for the given backend name.
+    Backends are imported lazily so the SQLite path never loads the BigQuery SDK.
+    """
+    if backend == "bigquery":
+        from storage.bigquery_store import BigQueryFlightStore
+        return BigQueryFlightStore()
+    if backend == "sqlite":
+        from storage.sqlite_store import SQLiteFlightStore
+        return SQLiteFlightStore()
+    raise ValueError(f"❌ Unknown STORAGE_BACKEND: {backend!r} (expected 'bigquery' or 'sqlite')")
+
+
+def get_store():
+    """Return the shared flight store, creating it on first call."""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = create_store()
+    return _store
+
+
+def set_store(store):
+    """Inject a store (e.g. an in-memory SQLite store for tests) to be returned by `get_store`."""
+    global _store
+    with _lock:
+        _store = store
@@ -0,0 +1,149 @@
+from abc import ABC, abstractmethod
+
+
+class FlightStore(ABC):
+    """
+    Storage backend interface for flight records.
+    Rows use the column layout from services/schema.py.
+    """
+
+    @abstractmethod
+    def upsert_rows(self, rows: list) -> dict:
+        """
+        Insert or update a batch of formatted rows keyed on (flight_date, flight_number).
+
+        Returns:
+        - dict: Counts of `inserted`, `updated` and `unchanged` rows.
+        """
+
+    def append_rows(self, rows: list) -> dict:
+        """
+        Bulk-append a batch without reconciling against existing rows (e.g. backfills
+        into empty date ranges). Stores without a faster append path upsert instead.
+
+        Returns:
+        - dict: Counts of `inserted`, `updated` and `unchanged` rows.
+        """
+        return self.upsert_rows(rows)
+
+    @abstractmethod
+    def refresh_route_rollup(self, flight_dates: list = None):
+        """
+        Recompute the daily route/airline rollup for the given flight dates
+        (or for every date when `flight_dates` is None) from the flight table.
+        """
+
+    @abstractmethod
+    def get_flight(self, flight_number: str) -> dict:
+        """
+        Point lookup of the latest record for an (upper-case) flight number.
+
+        Returns:
+        - dict: Flight record if found, else None.
+        """
+
+    def get_flights(self, flight_numbers: list) -> dict:
+        """
+        Batched `get_flight`: the latest record for each of several flight numbers.
+        Stores without a single-query path fall back to one lookup per number.
+
+        Returns:
+        - dict: Flight number -> record, for the numbers that were found.
+        """
+        records = {number: self.get_flight(number) for number in flight_numbers}
+        return {number: record for number, record in records.items() if record}
+
+    @abstractmethod
+    def route_summary(self, origin: str, dest: str, days: int = 7, limit: int = 3) -> list:
+        """
+        Aggregate flights between two airports over the last `days` days,
+        read from the daily route/airline rollup.
+
+        Returns:
+        - list[dict]: Up to `limit` rows of `airline_name`, `flights`, `avg_duration`
+          (minutes), busiest airline first.
+        """
+
+    def route_summaries(self, routes: list, days: int = 7, limit: int = 3) -> dict:
+        """
+        Batched `route_summary` for several (origin, dest) pairs.
+        Stores without a single-query path fall back to one query per route.
+
+        Returns:
+        - dict: (origin, dest) -> list of up to `limit` airline rows (empty if no flights).
+        """
+        return {(origin, dest): self.route_summary(origin, dest, days, limit) for origin, dest in routes}
+
+    @abstractmethod
+    def recent_flights(self, limit: int = 300, days: int = None) -> list:
+        """
+        Scan the most recent flights by scheduled departure.
+        With `days`, only flights dated within the last `days` days are read (partition pruning).
+
+        Returns:
+        - list[dict]: Up to `limit` flight records, newest first.
+        """
+
+    @abstractmethod
+    def status_breakdown(self, start_date: str, end_date: str) -> list:
+        """
+        Count flights per status for flight dates in [start_date, end_date].
+
+        Returns:
+        - list[dict]: Rows of `status` and `flights`, largest first.
+        """
+
+    @abstractmethod
+    def window_summary(self, start_date: str, end_date: str) -> dict:
+        """
+        Headline numbers for flight dates in [start_date, end_date].
+
+        Returns:
+        - dict: `flights`, `airlines`, `routes` and `avg_duration` (minutes).
+        """
+
+    @abstractmethod
+    def flights_page(self, columns: list, start_date: str, end_date: str,
+                     cursor: tuple = None, limit: int = 100) -> list:
+        """
+        One page of flights ordered by scheduled departure (newest first), projected to `columns`.
+
+        Keyset pagination: pass the (scheduled_departure, flight_number) of the last row
+        of the previous page as `cursor` to get the next page.
+
+        Returns:
+        - list[dict]: Up to `limit` rows with the requested columns.
+        """
+
+    def iter_flights(self, columns: list, start_date: str, end_date: str = None):
+        """
+        Stream the given columns of every flight dated on or after `start_date` (and up to
+        `end_date` when given), in no particular order (used to build the in-memory caches).
+        Stores without a streaming path page through `flights_page`, which skips flights
+        that have no scheduled departure.
+
+        Yields:
+        - Mapping-like rows supporting `row[column]`.
+        """
+        paged = list(dict.fromkeys(list(columns) + ["scheduled_departure", "flight_number"]))
+        cursor = None
+        while True:
+            page = self.flights_page(paged, start_date, end_date or "9999-12-31", cursor=cursor, limit=10000)
+            yield from page
+            if len(page) < 10000:
+                return
+            cursor = (page[-1]["scheduled_departure"], page[-1]["flight_number"])
+
+    @abstractmethod
+    def route_profile_counts(self, origin: str, dest: str, start_date: str) -> list:
+        """
+        Aggregates of every flight from `origin` to `dest` (IATA codes) dated on or after
+        `start_date`, for route profiles over windows the local analytics cache does not hold.
+        Computed by the store, so only a few rows per facet come back however long the window.
+
+        Returns:
+        - list[dict]: Rows of `facet`, `value` (as a string), `flights`, `duration_sum` and
+          `duration_count` (minutes; airline rows only), one per value of each facet:
+          `airline` (airline_name), `status`, `hour` (UTC hour of the scheduled departure),
+          `weekday` (of flight_date, 0 = Monday) and `duration` (whole scheduled minutes).
+        """
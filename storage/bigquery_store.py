@@ -0,0 +1,294 @@
+from google.cloud.bigquery import ArrayQueryParameter, ScalarQueryParameter, QueryJobConfig
+
+from config.settings import (PROJECT_ID, BQ_DATASET, BQ_TABLE, BQ_ROLLUP_TABLE, STATUS_LOOKBACK_DAYS,
+                             require_bigquery)
+from services.bigquery_client import get_client, run_query
+from services.bigquery_load import load_rows
+from services.schema import check_columns, dedupe_rows
+from services.bigquery_upsert import upsert_rows
+from storage.base import FlightStore
+
+
+class BigQueryFlightStore(FlightStore):
+    """Flight store backed by the BigQuery table configured in settings."""
+
+    def __init__(self, table_id: str = None, rollup_id: str = None):
+        if table_id is None:
+            require_bigquery()
+        # Fully-qualified table references: project.dataset.table
+        self.table_id = table_id or f"{PROJECT_ID}.{BQ_DATASET}.{BQ_TABLE}"
+        self.rollup_id = rollup_id or f"{PROJECT_ID}.{BQ_DATASET}.{BQ_ROLLUP_TABLE}"
+
+    def upsert_rows(self, rows: list) -> dict:
+        return upsert_rows(get_client(), self.table_id, rows)
+
+    def append_rows(self, rows: list) -> dict:
+        # Always a load job, however small the batch: streamed rows would block the MERGE/DML that follows
+        rows = dedupe_rows(rows)
+        result = load_rows(get_client(), self.table_id, rows)
+        return {"inserted": result["rows"], "updated": 0, "unchanged": 0, "bytes": result["bytes"]}
+
+    def get_flight(self, flight_number: str) -> dict:
+        # Recent partitions first; only a number not flown within the lookback costs a full scan
+        record = self._latest_flight(flight_number, STATUS_LOOKBACK_DAYS)
+        return record if record is not None else self._latest_flight(flight_number, None)
+
+    def _latest_flight(self, flight_number: str, days: int = None) -> dict:
+        # Equality on the clustering column plus, when `days` is set, a date range so only recent partitions are scanned
+        date_filter = "AND flight_date >= DATE_SUB(CURRENT_DATE(), INTERVAL @days DAY)" if days is not None else ""
+        query = f"""
+            SELECT * FROM `{self.table_id}`
+            WHERE flight_number = @flight_number
+                {date_filter}
+            ORDER BY flight_date DESC
+            LIMIT 1
+        """
+        params = [ScalarQueryParameter("flight_number", "STRING", flight_number)]
+        if days is not None:
+            params.append(ScalarQueryParameter("days", "INT64", days))
+        stage = "get_flight" if days is not None else "get_flight_history"
+        results = run_query(get_client(), query, QueryJobConfig(query_parameters=params), stage=stage)
+
+        # Return the first matching row as a dictionary (if any)
+        for row in results:
+            return dict(row)
+        return None
+
+    def get_flights(self, flight_numbers: list) -> dict:
+        # Same fallback as get_flight: one pruned job for every number, one full job for the ones it missed
+        flight_numbers = list(flight_numbers)
+        records = self._latest_flights(flight_numbers, STATUS_LOOKBACK_DAYS)
+        older = [number for number in flight_numbers if number not in records]
+        if older:
+            records.update(self._latest_flights(older, None))
+        return records
+
+    def _latest_flights(self, flight_numbers: list, days: int = None) -> dict:
+        # QUALIFY keeps the latest row per number
+        date_filter = "AND flight_date >= DATE_SUB(CURRENT_DATE(), INTERVAL @days DAY)" if days is not None else ""
+        query = f"""
+            SELECT * FROM `{self.table_id}`
+            WHERE flight_number IN UNNEST(@nums)
+                {date_filter}
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY flight_number ORDER BY flight_date DESC) = 1
+        """
+        params = [ArrayQueryParameter("nums", "STRING", list(flight_numbers))]
+        if days is not None:
+            params.append(ScalarQueryParameter("days", "INT64", days))
+        stage = "get_flights" if days is not None else "get_flights_history"
+        rows = run_query(get_client(), query, QueryJobConfig(query_parameters=params), stage=stage)
+        return {row["flight_number"]: dict(row) for row in rows}
+
+    def refresh_route_rollup(self, flight_dates: list = None):
+        # Rebuild only the touched days, so each ingest scans just those dates of the flight table
+        date_filter = "flight_date IN UNNEST(@dates)" if flight_dates is not None else "TRUE"
+        script = f"""
+            BEGIN TRANSACTION;
+            DELETE FROM `{self.rollup_id}` WHERE {date_filter};
+            INSERT INTO `{self.rollup_id}`
+                (flight_date, origin, destination, airline, flights, duration_sum_min, duration_count)
+            SELECT
+                flight_date,
+                departure_iata,
+                arrival_iata,
+                airline_name,
+                COUNT(*),
+                SUM(TIMESTAMP_DIFF(scheduled_arrival, scheduled_departure, MINUTE)),
+                COUNT(TIMESTAMP_DIFF(scheduled_arrival, scheduled_departure, MINUTE))
+            FROM `{self.table_id}`
+            WHERE {date_filter}
+                AND flight_date IS NOT NULL
+                AND departure_iata IS NOT NULL
+                AND arrival_iata IS NOT NULL
+            GROUP BY 1, 2, 3, 4;
+            COMMIT TRANSACTION;
+        """
+        params = [ArrayQueryParameter("dates", "DATE", list(flight_dates))] if flight_dates is not None else []
+        run_query(get_client(), script, QueryJobConfig(query_parameters=params), stage="rollup")
+
+    def route_summary(self, origin: str, dest: str, days: int = 7, limit: int = 3) -> list:
+        # Combine the daily rollup rows for the route, busiest airline first
+        query = f"""
+            SELECT
+                airline AS airline_name,
+                SUM(flights) AS flights,
+                SAFE_DIVIDE(SUM(duration_sum_min), SUM(duration_count)) AS avg_duration
+            FROM `{self.rollup_id}`
+            WHERE
+                origin = @origin AND
+                destination = @dest AND
+                flight_date >= DATE_SUB(CURRENT_DATE(), INTERVAL @days DAY)
+            GROUP BY airline
+            ORDER BY flights DESC
+            LIMIT @limit
+        """
+        job_config = QueryJobConfig(
+            query_parameters=[
+                ScalarQueryParameter("origin", "STRING", origin),
+                ScalarQueryParameter("dest", "STRING", dest),
+                ScalarQueryParameter("days", "INT64", days),
+                ScalarQueryParameter("limit", "INT64", limit),
+            ]
+        )
+        return [dict(row) for row in run_query(get_client(), query, job_config, stage="route_summary")]
+
+    def route_summaries(self, routes: list, days: int = 7, limit: int = 3) -> dict:
+        # One grouped job for every route; the origin/destination lists prune clustered blocks,
+        # the "ORIGIN-DEST" key keeps only the requested pairs
+        routes = [tuple(route) for route in routes]
+        query = f"""
+            SELECT
+                origin,
+                destination,
+                airline AS airline_name,
+                SUM(flights) AS flights,
+                SAFE_DIVIDE(SUM(duration_sum_min), SUM(duration_count)) AS avg_duration
+            FROM `{self.rollup_id}`
+            WHERE
+                origin IN UNNEST(@origins) AND
+                destination IN UNNEST(@dests) AND
+                CONCAT(origin, '-', destination) IN UNNEST(@routes) AND
+                flight_date >= DATE_SUB(CURRENT_DATE(), INTERVAL @days DAY)
+            GROUP BY origin, destination, airline
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY origin, destination ORDER BY flights DESC) <= @limit
+            ORDER BY origin, destination, flights DESC
+        """
+        job_config = QueryJobConfig(
+            query_parameters=[
+                ArrayQueryParameter("origins", "STRING", sorted({origin for origin, _ in routes})),
+                ArrayQueryParameter("dests", "STRING", sorted({dest for _, dest in routes})),
+                ArrayQueryParameter("routes", "STRING", [f"{origin}-{dest}" for origin, dest in routes]),
+                ScalarQueryParameter("days", "INT64", days),
+                ScalarQueryParameter("limit", "INT64", limit),
+            ]
+        )
+        summaries = {route: [] for route in routes}
+        for row in run_query(get_client(), query, job_config, stage="route_summaries"):
+            summaries[(row["origin"], row["destination"])].append(
+                {"airline_name": row["airline_name"], "flights": row["flights"], "avg_duration": row["avg_duration"]})
+        return summaries
+
+    def recent_flights(self, limit: int = 300, days: int = None) -> list:
+        # With `days`, the date range prunes the scan to the most recent partitions
+        date_filter = "WHERE flight_date >= DATE_SUB(CURRENT_DATE(), INTERVAL @days DAY)" if days is not None else ""
+        query = f"""
+            SELECT * FROM `{self.table_id}`
+            {date_filter}
+            ORDER BY scheduled_departure DESC
+            LIMIT @limit
+        """
+        params = [ScalarQueryParameter("limit", "INT64", limit)]
+        if days is not None:
+            params.append(ScalarQueryParameter("days", "INT64", days))
+        job_config = QueryJobConfig(query_parameters=params)
+        return [dict(row) for row in run_query(get_client(), query, job_config, stage="recent_flights")]
+
+    def status_breakdown(self, start_date: str, end_date: str) -> list:
+        query = f"""
+            SELECT status, COUNT(*) AS flights
+            FROM `{self.table_id}`
+            WHERE flight_date BETWEEN @start_date AND @end_date
+            GROUP BY status
+            ORDER BY flights DESC
+        """
+        return [dict(row) for row in self._query(query, self._window_params(start_date, end_date), "status_breakdown")]
+
+    def window_summary(self, start_date: str, end_date: str) -> dict:
+        query = f"""
+            SELECT
+                COUNT(*) AS flights,
+                COUNT(DISTINCT airline_name) AS airlines,
+                COUNT(DISTINCT CONCAT(departure_iata, '-', arrival_iata)) AS routes,
+                AVG(TIMESTAMP_DIFF(scheduled_arrival, scheduled_departure, MINUTE)) AS avg_duration
+            FROM `{self.table_id}`
+            WHERE flight_date BETWEEN @start_date AND @end_date
+        """
+        for row in self._query(query, self._window_params(start_date, end_date), "window_summary"):
+            return dict(row)
+        return {"flights": 0, "airlines": 0, "routes": 0, "avg_duration": None}
+
+    def flights_page(self, columns: list, start_date: str, end_date: str,
+                     cursor: tuple = None, limit: int = 100) -> list:
+        # Project only the requested columns; seek past the cursor instead of using OFFSET
+        projection = ", ".join(check_columns(columns))
+        seek = ""
+        params = self._window_params(start_date, end_date) + [ScalarQueryParameter("limit", "INT64", limit)]
+        if cursor:
+            seek = """AND (scheduled_departure < @cursor_ts
+                       OR (scheduled_departure = @cursor_ts AND flight_number < @cursor_number))"""
+            params += [
+                ScalarQueryParameter("cursor_ts", "TIMESTAMP", cursor[0]),
+                ScalarQueryParameter("cursor_number", "STRING", cursor[1]),
+            ]
+
+        query = f"""
+            SELECT {projection}
+            FROM `{self.table_id}`
+            WHERE flight_date BETWEEN @start_date AND @end_date
+                AND scheduled_departure IS NOT NULL
+                {seek}
+            ORDER BY scheduled_departure DESC, flight_number DESC
+            LIMIT @limit
+        """
+        return [dict(row) for row in self._query(query, params, "flights_page")]
+
+    def iter_flights(self, columns: list, start_date: str, end_date: str = None):
+        # One job over the recent partitions; result pages are streamed rather than materialized
+        query = f"""
+            SELECT {", ".join(check_columns(columns))}
+            FROM `{self.table_id}`
+            WHERE flight_date >= @start_date
+        """
+        params = [ScalarQueryParameter("start_date", "DATE", start_date)]
+        if end_date:
+            query += "  AND flight_date <= @end_date\n"
+            params.append(ScalarQueryParameter("end_date", "DATE", end_date))
+        yield from self._query(query, params, "iter_flights")
+
+    def route_profile_counts(self, origin: str, dest: str, start_date: str) -> list:
+        # Partition pruning on flight_date; clustering on the airport codes keeps the scan to the route's blocks.
+        # Every facet is aggregated here, so a year-long window returns a few hundred rows, not every flight
+        query = f"""
+            WITH route AS (
+                SELECT
+                    airline_name,
+                    status,
+                    EXTRACT(HOUR FROM scheduled_departure) AS hour,
+                    MOD(EXTRACT(DAYOFWEEK FROM flight_date) + 5, 7) AS weekday,
+                    TIMESTAMP_DIFF(scheduled_arrival, scheduled_departure, MINUTE) AS duration
+                FROM `{self.table_id}`
+                WHERE
+                    departure_iata = @origin AND
+                    arrival_iata = @dest AND
+                    flight_date >= @start_date
+            )
+            SELECT 'airline' AS facet, airline_name AS value, COUNT(*) AS flights,
+                   SUM(duration) AS duration_sum, COUNT(duration) AS duration_count
+            FROM route GROUP BY airline_name
+            UNION ALL
+            SELECT 'status', status, COUNT(*), NULL, NULL FROM route GROUP BY status
+            UNION ALL
+            SELECT 'hour', CAST(hour AS STRING), COUNT(*), NULL, NULL FROM route WHERE hour IS NOT NULL GROUP BY hour
+            UNION ALL
+            SELECT 'weekday', CAST(weekday AS STRING), COUNT(*), NULL, NULL FROM route GROUP BY weekday
+            UNION ALL
+            SELECT 'duration', CAST(duration AS STRING), COUNT(*), NULL, NULL
+            FROM route WHERE duration IS NOT NULL GROUP BY duration
+        """
+        params = [
+            ScalarQueryParameter("origin", "STRING", origin),
+            ScalarQueryParameter("dest", "STRING", dest),
+            ScalarQueryParameter("start_date", "DATE", start_date),
+        ]
+        return [dict(row) for row in self._query(query, params, "route_profile_counts")]
+
+    @staticmethod
+    def _window_params(start_date: str, end_date: str) -> list:
+        return [
+            ScalarQueryParameter("start_date", "DATE", start_date),
+            ScalarQueryParameter("end_date", "DATE", end_date),
+        ]
+
+    @staticmethod
+    def _query(query: str, params: list, stage: str):
+        return run_query(get_client(), query, QueryJobConfig(query_parameters=params), stage=stage)
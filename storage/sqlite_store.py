@@ -0,0 +1,333 @@
+import os
+import sqlite3
+import threading
+
+from config.settings import SQLITE_PATH, STATUS_LOOKBACK_DAYS
+from services.schema import (FLIGHT_SCHEMA, FLIGHT_COLUMNS, KEY_COLUMNS, VALUE_COLUMNS,
+                             ROUTE_ROLLUP_SCHEMA, check_columns, dedupe_rows)
+from storage.base import FlightStore
+
+# BigQuery column types mapped onto SQLite storage classes (dates and timestamps stay ISO strings)
+SQLITE_TYPES = {"STRING": "TEXT", "DATE": "TEXT", "TIMESTAMP": "TEXT", "INT64": "INTEGER", "FLOAT64": "REAL"}
+
+# Whole minutes between scheduled departure and arrival (truncated like BigQuery's TIMESTAMP_DIFF)
+DURATION_MINUTES = ("(CAST(strftime('%s', scheduled_arrival) AS INTEGER) - "
+                    "CAST(strftime('%s', scheduled_departure) AS INTEGER)) / 60")
+
+# 🗂️ Indexes backing the point lookup, the upsert key, the recent scan and the route rollup
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_flights_key ON flights (flight_date, flight_number)",
+    "CREATE INDEX IF NOT EXISTS idx_flights_number ON flights (flight_number)",
+    "CREATE INDEX IF NOT EXISTS idx_flights_route_iata ON flights (departure_iata, arrival_iata, flight_date)",
+    "CREATE INDEX IF NOT EXISTS idx_flights_departure ON flights (scheduled_departure)",
+    "CREATE INDEX IF NOT EXISTS idx_flights_date_departure ON flights (flight_date, scheduled_departure)",
+    "CREATE INDEX IF NOT EXISTS idx_route_daily_key ON route_daily (origin, destination, flight_date)",
+    "CREATE INDEX IF NOT EXISTS idx_route_daily_date ON route_daily (flight_date)",
+]
+
+
+class SQLiteFlightStore(FlightStore):
+    """
+    Embedded flight store on a local SQLite file.
+    Used for offline runs and as a low-latency replica for chat deployments.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.local = threading.local()
+        # SQLite allows one writer at a time; queue writers here instead of failing with "locked"
+        self.write_lock = threading.Lock()
+        if path == ":memory:":
+            # A named shared-cache database, so every thread sees the same in-memory data
+            path = f"file:flights_{id(self)}?mode=memory&cache=shared"
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._create_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, uri=self.path.startswith("file:"))
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        columns = ", ".join(f"{name} {SQLITE_TYPES[field_type]}" for name, field_type in FLIGHT_SCHEMA)
+        rollup_columns = ", ".join(f"{name} {SQLITE_TYPES[field_type]}" for name, field_type in ROUTE_ROLLUP_SCHEMA)
+        conn = self._connect()
+        with conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS flights ({columns})")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS route_daily ({rollup_columns})")
+
+            # 🔍 Add columns introduced after the database file was created
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(flights)")}
+            for name, field_type in FLIGHT_SCHEMA:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE flights ADD COLUMN {name} {SQLITE_TYPES[field_type]}")
+
+            # Route lookups moved from free-text airport names to IATA codes
+            conn.execute("DROP INDEX IF EXISTS idx_flights_route")
+            for statement in INDEXES:
+                conn.execute(statement)
+
+    def upsert_rows(self, rows: list) -> dict:
+        rows = dedupe_rows(rows)
+        if not rows:
+            return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        columns = ", ".join(FLIGHT_COLUMNS)
+        placeholders = ", ".join("?" for _ in FLIGHT_COLUMNS)
+        on_clause = " AND ".join(f"f.{col} = s.{col}" for col in KEY_COLUMNS)
+        changed = " OR ".join(f"f.{col} IS NOT s.{col}" for col in VALUE_COLUMNS)
+        excluded_changed = " OR ".join(f"{col} IS NOT excluded.{col}" for col in VALUE_COLUMNS)
+        set_clause = ", ".join(f"{col} = excluded.{col}" for col in VALUE_COLUMNS)
+
+        conn = self._connect()
+        with self.write_lock, conn:
+            # 🧺 Stage the batch, then reconcile it set-based like the BigQuery MERGE
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS staging AS SELECT * FROM flights WHERE 0")
+            conn.execute("DELETE FROM staging")
+            conn.executemany(
+                f"INSERT INTO staging ({columns}) VALUES ({placeholders})",
+                [tuple(row.get(col) for col in FLIGHT_COLUMNS) for row in rows],
+            )
+
+            existing = conn.execute(
+                f"SELECT COUNT(*), SUM(CASE WHEN {changed} THEN 1 ELSE 0 END) "
+                f"FROM staging s JOIN flights f ON {on_clause}"
+            ).fetchone()
+            matched, updated = existing[0], existing[1] or 0
+
+            conn.execute(f"""
+                INSERT INTO flights ({columns})
+                SELECT {columns} FROM staging WHERE true
+                ON CONFLICT (flight_date, flight_number) DO UPDATE SET {set_clause}
+                WHERE {excluded_changed}
+            """)
+            conn.execute("DELETE FROM staging")
+
+        return {"inserted": len(rows) - matched, "updated": updated, "unchanged": matched - updated}
+
+    def get_flight(self, flight_number: str) -> dict:
+        return self.get_flights([flight_number]).get(flight_number)
+
+    def get_flights(self, flight_numbers: list) -> dict:
+        # Recent dates first (like the partition-pruned BigQuery lookup), then the rest of the history
+        flight_numbers = list(flight_numbers)
+        records = self.latest_flights(flight_numbers, STATUS_LOOKBACK_DAYS)
+        older = [number for number in flight_numbers if number not in records]
+        if older:
+            records.update(self.latest_flights(older, None))
+        return records
+
+    def latest_flights(self, flight_numbers: list, days: int = None) -> dict:
+        """Latest record per flight number dated within the last `days` days (any date when None)."""
+        flight_numbers = list(flight_numbers)
+        if not flight_numbers:
+            return {}
+        marks = ", ".join("?" for _ in flight_numbers)
+        date_filter, params = "", []
+        if days is not None:
+            date_filter, params = "AND flight_date >= date('now', ?)", [f"-{int(days)} days"]
+        rows = self._connect().execute(
+            f"""
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY flight_number ORDER BY flight_date DESC) AS rn
+                FROM flights
+                WHERE flight_number IN ({marks}) {date_filter}
+            )
+            WHERE rn = 1
+            """,
+            (*flight_numbers, *params),
+        ).fetchall()
+        records = {}
+        for row in rows:
+            record = dict(row)
+            record.pop("rn")
+            records[record["flight_number"]] = record
+        return records
+
+    def refresh_route_rollup(self, flight_dates: list = None):
+        # Rebuild only the touched days from the indexed flight table
+        if flight_dates is not None:
+            flight_dates = list(flight_dates)
+            if not flight_dates:
+                return
+            marks = ", ".join("?" for _ in flight_dates)
+            date_filter, params = f"flight_date IN ({marks})", flight_dates
+        else:
+            date_filter, params = "1", []
+
+        conn = self._connect()
+        with self.write_lock, conn:
+            conn.execute(f"DELETE FROM route_daily WHERE {date_filter}", params)
+            conn.execute(f"""
+                INSERT INTO route_daily
+                    (flight_date, origin, destination, airline, flights, duration_sum_min, duration_count)
+                SELECT
+                    flight_date, departure_iata, arrival_iata, airline_name,
+                    COUNT(*), SUM({DURATION_MINUTES}), COUNT({DURATION_MINUTES})
+                FROM flights
+                WHERE {date_filter}
+                    AND flight_date IS NOT NULL
+                    AND departure_iata IS NOT NULL
+                    AND arrival_iata IS NOT NULL
+                GROUP BY 1, 2, 3, 4
+            """, params)
+
+    def route_summary(self, origin: str, dest: str, days: int = 7, limit: int = 3) -> list:
+        # Combine the daily rollup rows for the route, busiest airline first
+        rows = self._connect().execute(
+            """
+            SELECT
+                airline AS airline_name,
+                SUM(flights) AS flights,
+                CAST(SUM(duration_sum_min) AS REAL) / NULLIF(SUM(duration_count), 0) AS avg_duration
+            FROM route_daily
+            WHERE
+                origin = ? AND
+                destination = ? AND
+                flight_date >= date('now', ?)
+            GROUP BY airline
+            ORDER BY flights DESC
+            LIMIT ?
+            """,
+            (origin, dest, f"-{int(days)} days", limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def route_summaries(self, routes: list, days: int = 7, limit: int = 3) -> dict:
+        routes = list(routes)
+        if not routes:
+            return {}
+        pairs = " OR ".join("(origin = ? AND destination = ?)" for _ in routes)
+        rows = self._connect().execute(
+            f"""
+            SELECT origin, destination, airline_name, flights, avg_duration FROM (
+                SELECT
+                    origin,
+                    destination,
+                    airline AS airline_name,
+                    SUM(flights) AS flights,
+                    CAST(SUM(duration_sum_min) AS REAL) / NULLIF(SUM(duration_count), 0) AS avg_duration,
+                    ROW_NUMBER() OVER (PARTITION BY origin, destination ORDER BY SUM(flights) DESC) AS rn
+                FROM route_daily
+                WHERE ({pairs}) AND flight_date >= date('now', ?)
+                GROUP BY origin, destination, airline
+            )
+            WHERE rn <= ?
+            ORDER BY origin, destination, flights DESC
+            """,
+            (*[code for route in routes for code in route], f"-{int(days)} days", limit),
+        ).fetchall()
+
+        summaries = {tuple(route): [] for route in routes}
+        for row in rows:
+            summaries[(row["origin"], row["destination"])].append(
+                {"airline_name": row["airline_name"], "flights": row["flights"], "avg_duration": row["avg_duration"]})
+        return summaries
+
+    def recent_flights(self, limit: int = 300, days: int = None) -> list:
+        date_filter, params = "", []
+        if days is not None:
+            date_filter, params = "WHERE flight_date >= date('now', ?)", [f"-{int(days)} days"]
+        rows = self._connect().execute(
+            f"SELECT * FROM flights {date_filter} ORDER BY scheduled_departure DESC LIMIT ?", (*params, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def status_breakdown(self, start_date: str, end_date: str) -> list:
+        rows = self._connect().execute(
+            """
+            SELECT status, COUNT(*) AS flights
+            FROM flights
+            WHERE flight_date BETWEEN ? AND ?
+            GROUP BY status
+            ORDER BY flights DESC
+            """,
+            (start_date, end_date),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def window_summary(self, start_date: str, end_date: str) -> dict:
+        row = self._connect().execute(
+            f"""
+            SELECT
+                COUNT(*) AS flights,
+                COUNT(DISTINCT airline_name) AS airlines,
+                COUNT(DISTINCT departure_iata || '-' || arrival_iata) AS routes,
+                AVG({DURATION_MINUTES}) AS avg_duration
+            FROM flights
+            WHERE flight_date BETWEEN ? AND ?
+            """,
+            (start_date, end_date),
+        ).fetchone()
+        return dict(row)
+
+    def flights_page(self, columns: list, start_date: str, end_date: str,
+                     cursor: tuple = None, limit: int = 100) -> list:
+        # Project only the requested columns; seek past the cursor instead of using OFFSET
+        projection = ", ".join(check_columns(columns))
+        seek, params = "", [start_date, end_date]
+        if cursor:
+            seek = "AND (scheduled_departure < ? OR (scheduled_departure = ? AND flight_number < ?))"
+            params += [cursor[0], cursor[0], cursor[1]]
+
+        rows = self._connect().execute(
+            f"""
+            SELECT {projection}
+            FROM flights
+            WHERE flight_date BETWEEN ? AND ?
+                AND scheduled_departure IS NOT NULL
+                {seek}
+            ORDER BY scheduled_departure DESC, flight_number DESC
+            LIMIT ?
+            """,
+            params + [limit],
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def iter_flights(self, columns: list, start_date: str, end_date: str = None):
+        projection = ", ".join(check_columns(columns))
+        cursor = self._connect().execute(f"SELECT {projection} FROM flights WHERE flight_date BETWEEN ? AND ?",
+                                         (start_date, end_date or "9999-12-31"))
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                return
+            yield from rows
+
+    def route_profile_counts(self, origin: str, dest: str, start_date: str) -> list:
+        # The route's rows are found through idx_flights_route_iata; each facet is one GROUP BY over them
+        rows = self._connect().execute(
+            f"""
+            WITH route AS (
+                SELECT
+                    airline_name,
+                    status,
+                    CAST(strftime('%H', scheduled_departure) AS INTEGER) AS hour,
+                    (CAST(strftime('%w', flight_date) AS INTEGER) + 6) % 7 AS weekday,
+                    {DURATION_MINUTES} AS duration
+                FROM flights
+                WHERE departure_iata = ? AND arrival_iata = ? AND flight_date >= ?
+            )
+            SELECT 'airline' AS facet, airline_name AS value, COUNT(*) AS flights,
+                   SUM(duration) AS duration_sum, COUNT(duration) AS duration_count
+            FROM route GROUP BY airline_name
+            UNION ALL
+            SELECT 'status', status, COUNT(*), NULL, NULL FROM route GROUP BY status
+            UNION ALL
+            SELECT 'hour', CAST(hour AS TEXT), COUNT(*), NULL, NULL FROM route WHERE hour IS NOT NULL GROUP BY hour
+            UNION ALL
+            SELECT 'weekday', CAST(weekday AS TEXT), COUNT(*), NULL, NULL FROM route GROUP BY weekday
+            UNION ALL
+            SELECT 'duration', CAST(duration AS TEXT), COUNT(*), NULL, NULL
+            FROM route WHERE duration IS NOT NULL GROUP BY duration
+            """,
+            (origin, dest, start_date),
+        ).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 🛠️ Run against a throwaway cache dir, a local SQLite store and the fake Aviationstack API;
+# settings are read at import time, so this happens before any project module is imported
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_aviationstack import start_fake_server  # noqa: E402
+
+FAKE_API_TOTAL = 250
+fake_api_server, fake_api_url = start_fake_server(total=FAKE_API_TOTAL, latency=0)
+
+os.environ.update({
+    "CACHE_DIR": tempfile.mkdtemp(prefix="flight-tests-"),
+    "STORAGE_BACKEND": "sqlite",
+    "SQLITE_PATH": ":memory:",
+    "AVIATIONSTACK_API_KEY": "test",
+    "AVIATIONSTACK_BASE_URL": fake_api_url,
+    "AVIATIONSTACK_RATE_LIMIT": "10000",
+    "SPOOL_FSYNC": "false",
+})
+
+
+@pytest.fixture
+def store():
+    """A fresh in-memory SQLite store installed as the process-wide store."""
+    from storage import set_store
+    from storage.sqlite_store import SQLiteFlightStore
+
+    store = SQLiteFlightStore(":memory:")
+    set_store(store)
+    yield store
+    set_store(None)
+
+
+@pytest.fixture
+def number_index(tmp_path, monkeypatch):
+    """A fresh known-number index in `tmp_path`, installed as the process-wide index."""
+    from services import flight_index
+    from services.flight_index import FlightNumberIndex
+
+    index = FlightNumberIndex(str(tmp_path / "flight_numbers.csv"))
+    monkeypatch.setattr(flight_index, "_index", index)
+    return index
@@ -0,0 +1,29 @@
+from services.airports import AirportIndex, find_routes
+
+
+def make_index():
+    index = AirportIndex()
+    index.add("BOM", name="Chhatrapati Shivaji International", city="Mumbai")
+    index.add("DEL", name="Indira Gandhi International", city="Delhi")
+    # Learned from an API page; "way" is also an ordinary word
+    index.learn([{"iata": "WAY", "airport": "Waynesburg"}])
+    return index
+
+
+def test_lone_word_is_not_taken_for_a_learned_code():
+    index = make_index()
+    assert find_routes("WAY TO MUMBAI", index, query="way to Mumbai") == []
+    assert find_routes("WAY TO MUMBAI", index) == []
+
+
+def test_lone_code_typed_in_capitals_or_place_name_resolves():
+    index = make_index()
+    assert find_routes("WAY TO MUMBAI", index, query="WAY to Mumbai") == [(0, ("WAY", "BOM"))]
+    assert find_routes("DELHI TO MUMBAI", index, query="Delhi to Mumbai") == [(0, ("DEL", "BOM"))]
+
+
+def test_code_pattern_needs_codes_typed_in_capitals():
+    index = make_index()
+    assert find_routes("WAY TO SEE AI302", index, query="way to see AI302") == []
+    assert find_routes("DEL TO BOM", index, query="del to BOM") == []
+    assert find_routes("DEL TO BOM", index, query="DEL to BOM") == [(0, ("DEL", "BOM"))]
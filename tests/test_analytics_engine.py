@@ -0,0 +1,55 @@
+from collections import Counter
+
+import pytest
+
+from agents.flight_analytics_agent import FlightAnalyticsAgent
+from benchmarks.fake_aviationstack import make_flight
+from services.analytics_engine import RouteAnalytics
+from services.transform import rows_from_flights
+
+
+@pytest.fixture
+def route(store):
+    rows = rows_from_flights([make_flight(i) for i in range(600)])
+    rows[0]["scheduled_arrival"] = None   # a flight without a known duration
+    store.upsert_rows(rows)
+    return Counter((row["departure_iata"], row["arrival_iata"]) for row in rows).most_common(1)[0][0]
+
+
+def as_maps(profile: dict) -> dict:
+    """Profile with its ranked lists as mappings, so ties in either order compare equal."""
+    return {**profile, **{key: dict((item[0], item[1:]) for item in profile[key])
+                          for key in ("airlines", "statuses", "hours", "weekdays")}}
+
+
+def test_store_profile_matches_the_columnar_cache(route):
+    cached = RouteAnalytics(cache_days=30, enabled=True, generation_fn=lambda: 0)
+    cached.sync()
+    from_cache = cached.profile(*route, days=10, limit=30)
+    from_store = RouteAnalytics(enabled=False).profile(*route, days=10, limit=30)
+
+    assert from_cache["source"] == "cache" and from_store["source"] == "store"
+    assert from_store["flights"] > 0
+    assert as_maps({**from_store, "source": None}) == as_maps({**from_cache, "source": None})
+
+
+def test_profile_labels_departure_hours_as_utc(route):
+    message = FlightAnalyticsAgent().format_profile(*route, RouteAnalytics(enabled=False).profile(*route, days=10))
+    assert "Busiest departure hours (UTC)" in message
+
+
+def test_bigquery_store_profile_is_one_aggregate_job(store, route):
+    from benchmarks.fake_bigquery import FakeBigQueryClient
+    from services.bigquery_client import reset_client, set_client
+    from storage import set_store
+    from storage.bigquery_store import BigQueryFlightStore
+
+    fake = FakeBigQueryClient(store=store)
+    set_client(fake)
+    set_store(BigQueryFlightStore("p.d.flights", "p.d.flights_route_daily"))
+    try:
+        profile = RouteAnalytics(enabled=False).profile(*route, days=10)
+    finally:
+        reset_client()
+    assert profile["flights"] > 0
+    assert [job["kind"] for job in fake.jobs] == ["aggregate"]
@@ -0,0 +1,39 @@
+from benchmarks.fake_aviationstack import start_fake_server
+from conftest import FAKE_API_TOTAL, fake_api_url
+from services import aviationstack
+from services.aviationstack import AviationstackClient, get_api_client
+
+
+def test_iter_pages_walks_every_page_once():
+    pages = list(AviationstackClient("test", base_url=fake_api_url).iter_pages(max_pages=10))
+    offsets = sorted(page["pagination"]["offset"] for page in pages)
+    assert offsets == [0, 100, 200]
+    assert sum(len(page["data"]) for page in pages) == FAKE_API_TOTAL
+
+
+def test_rate_limited_pages_are_retried():
+    server, url = start_fake_server(total=500, latency=0, fail_every=3)
+    try:
+        client = AviationstackClient("test", base_url=url, backoff=0.001)
+        pages = list(client.iter_pages(max_pages=5))
+    finally:
+        server.shutdown()
+    assert len(pages) == 5 and server.requests > 5
+
+
+def test_retry_after_is_capped_and_garbage_is_ignored(monkeypatch):
+    slept = []
+    monkeypatch.setattr(aviationstack.time, "sleep", slept.append)
+    client = AviationstackClient("test", base_url=fake_api_url, backoff=0.5, max_backoff=10)
+
+    client._sleep_before_retry(0, "3600")
+    client._sleep_before_retry(0, "2")
+    for garbage in ("soon", "nan", "-5", "inf", "Wed, 21 Oct 2015 07:28:00 GMT"):
+        client._sleep_before_retry(0, garbage)
+
+    assert slept[:2] == [10, 2]
+    assert all(0 <= delay <= 0.5 for delay in slept[2:])   # jittered backoff instead
+
+
+def test_fetches_share_one_client():
+    assert get_api_client() is get_api_client()
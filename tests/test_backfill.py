@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.fake_bigquery import FakeBigQueryClient
+from scripts import fetch_and_upload
+from services.bigquery_client import reset_client, set_client
+from services.spool import Spool
+from storage import set_store
+from storage.bigquery_store import BigQueryFlightStore
+
+
+@pytest.fixture
+def fake_bigquery():
+    fake = FakeBigQueryClient()
+    set_client(fake)
+    set_store(BigQueryFlightStore("p.d.flights", "p.d.flights_route_daily"))
+    yield fake
+    set_store(None)
+    reset_client()
+
+
+@pytest.mark.parametrize("upload_mode", ["merge", "append"])
+def test_backfill_writes_through_load_jobs_only(fake_bigquery, number_index, tmp_path, upload_mode):
+    end = date.today() - timedelta(days=1)
+    start = end - timedelta(days=1)
+    result = fetch_and_upload.backfill(start.isoformat(), end.isoformat(), airlines=["AI"], workers=2,
+                                       upload_mode=upload_mode, chunk_size=20,
+                                       checkpoint_path=str(tmp_path / "backfill.json"),
+                                       spool=Spool(str(tmp_path / "spool"), fsync=False))
+
+    assert result["units"] == 2 and result["failed"] == 0
+    assert fake_bigquery.store.window_summary(start.isoformat(), end.isoformat())["flights"] == result["flights"]
+    kinds = {job["kind"] for job in fake_bigquery.jobs}
+    assert "load" in kinds and "stream" not in kinds
+
+
+def test_backfill_resumes_from_its_checkpoint(fake_bigquery, number_index, tmp_path):
+    day = (date.today() - timedelta(days=3)).isoformat()
+    kwargs = dict(airlines=["AI", "6E"], checkpoint_path=str(tmp_path / "backfill.json"),
+                  spool=Spool(str(tmp_path / "spool"), fsync=False))
+    assert fetch_and_upload.backfill(day, day, **kwargs)["units"] == 2
+    assert fetch_and_upload.backfill(day, day, **kwargs) == {"units": 0, "failed": 0, "flights": 0}
+
+
+def test_small_append_is_a_load_job(fake_bigquery):
+    BigQueryFlightStore("p.d.flights", "p.d.flights_route_daily").append_rows(
+        [{"flight_date": "2026-01-01", "flight_number": "AI1"}])
+    assert [job["kind"] for job in fake_bigquery.jobs] == ["load"]
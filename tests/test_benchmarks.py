@@ -0,0 +1,24 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_benchmark_harness_runs_offline_and_writes_results(tmp_path):
+    output = tmp_path / "bench.json"
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "run_benchmarks.py"),
+         "--flights", "200", "--pages", "2", "--api-latency", "0", "--bq-latency", "0.02",
+         "--iterations", "3", "--burst", "5", "--snapshot-flights", "500", "--analytics-flights", "500",
+         "--metrics", "--output", str(output)],
+        check=True, capture_output=True, timeout=120,
+    )
+    results = json.loads(output.read_text())
+
+    assert results["ingest"]["end_to_end"]["flights"] == 200
+    assert set(results["router"]) == {"status_cold", "status_warm", "route"}
+    # A burst of identical cold questions costs one store query, not one per asker
+    assert all(stats["bigquery_jobs"] == 1 for stats in results["coalescing"].values())
+    assert results["metrics"]["spans"]
@@ -0,0 +1,31 @@
+import threading
+import time
+
+from services import bigquery_client
+from services.bigquery_client import get_client, reset_client, set_client
+
+
+def test_concurrent_callers_share_one_lazily_built_client(monkeypatch):
+    built = []
+
+    def build():
+        time.sleep(0.01)   # widen the race window
+        built.append(object())
+        return built[-1]
+
+    monkeypatch.setattr(bigquery_client, "_build_client", build)
+    reset_client()
+    try:
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(get_client())) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(built) == 1 and all(client is built[0] for client in clients)
+
+        fake = object()
+        set_client(fake)
+        assert get_client() is fake
+    finally:
+        reset_client()
@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks.fake_aviationstack import make_flight
+from benchmarks.fake_bigquery import FakeBigQueryClient
+from services.bigquery_upsert import build_merge_sql, upsert_rows
+from services.transform import rows_from_flights
+
+TABLE = "p.d.flights"
+
+
+def test_merge_sql_is_keyed_and_skips_unchanged_rows():
+    sql = build_merge_sql(TABLE, "p.d.flights_staging_x")
+    assert "ON T.flight_date = S.flight_date AND T.flight_number = S.flight_number" in sql
+    assert "T.status IS DISTINCT FROM S.status" in sql
+    assert "DELETE" not in sql
+
+
+def test_upsert_counts_inserted_updated_and_unchanged_rows():
+    client = FakeBigQueryClient()
+    rows = rows_from_flights([make_flight(i, flight_date="2026-03-01") for i in range(10)])
+    assert upsert_rows(client, TABLE, rows)["inserted"] == 10
+
+    changed = [{**row, "status": "diverted" if row["status"] != "diverted" else "landed"} for row in rows[:3]]
+    new = rows_from_flights([make_flight(i, flight_date="2026-03-02") for i in range(2)])
+    stats = upsert_rows(client, TABLE, rows[3:] + changed + new + new)   # duplicate keys collapse first
+
+    assert {key: stats[key] for key in ("inserted", "updated", "unchanged")} == \
+        {"inserted": 2, "updated": 3, "unchanged": 7}
+    assert [job["kind"] for job in client.jobs].count("merge") == 2
+    assert client.staging == {}   # staging tables are dropped
+
+
+def test_staging_table_is_dropped_when_the_merge_fails():
+    class FailingMerge(FakeBigQueryClient):
+        def _merge(self, sql, params):
+            raise RuntimeError("merge failed")
+
+    client = FailingMerge()
+    with pytest.raises(RuntimeError):
+        upsert_rows(client, TABLE, rows_from_flights([make_flight(1)]))
+    assert client.staging == {}
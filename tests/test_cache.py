@@ -0,0 +1,54 @@
+from agents.flight_status_agent import FlightStatusAgent
+from services import cache
+from services.cache import MISSING, TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_entries_expire_and_misses_use_the_shorter_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    answers = TTLCache(maxsize=10, ttl=300, negative_ttl=60)
+    answers.set("AI302", {"status": "landed"})
+    answers.set("XX1", None)
+
+    clock.now += 61
+    assert answers.get("XX1") is MISSING                  # negative entry expired
+    assert answers.get("AI302") == {"status": "landed"}
+    clock.now += 240
+    assert answers.get("AI302") is MISSING
+    assert answers.stats()["expirations"] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    answers = TTLCache(maxsize=2)
+    answers.set("a", 1)
+    answers.set("b", 2)
+    answers.get("a")
+    answers.set("c", 3)
+    assert answers.get("b") is MISSING and answers.get("a") == 1 and answers.get("c") == 3
+    assert answers.stats()["evictions"] == 1
+
+
+def test_a_new_ingest_generation_drops_every_answer():
+    generation = [1]
+    answers = TTLCache(generation_fn=lambda: generation[0])
+    answers.set("AI302", {"status": "scheduled"})
+    generation[0] = 2
+    assert answers.get("AI302") is MISSING
+    assert answers.stats()["invalidations"] == 1
+
+
+def test_status_agent_answers_repeats_from_the_cache(store, number_index, monkeypatch):
+    lookups = []
+    monkeypatch.setattr(FlightStatusAgent, "cache", TTLCache(generation_fn=lambda: 0))
+    monkeypatch.setattr(type(store), "get_flight", lambda self, number: lookups.append(number))
+    agent = FlightStatusAgent()
+    assert agent.run("ZZ9") == agent.run("ZZ9")
+    assert lookups == ["ZZ9"]
@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.fake_aviationstack import make_flight
+from scripts import fetch_and_upload
+from services.change_tracker import ChangeTracker
+from services.transform import rows_from_flights
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Rows each upload forwards to the store."""
+    batches = []
+    ingest_rows = fetch_and_upload.ingest_rows
+
+    def recording(rows, **kwargs):
+        batches.append([row["flight_number"] for row in rows])
+        return ingest_rows(rows, **kwargs)
+
+    monkeypatch.setattr(fetch_and_upload, "ingest_rows", recording)
+    return batches
+
+
+def test_repeated_polls_only_forward_new_or_changed_rows(store, number_index, written, tmp_path):
+    tracker = ChangeTracker(str(tmp_path / "changes.sqlite"))
+    flights = [make_flight(i) for i in range(30)]
+    assert fetch_and_upload.upload_to_bigquery(flights, tracker=tracker)["inserted"] == 30
+
+    flights[4] = {**flights[4], "flight_status": "diverted"}
+    stats = fetch_and_upload.upload_to_bigquery(flights + [make_flight(30)], tracker=tracker)
+    assert sorted(written[-1]) == sorted([flights[4]["flight"]["iata"], make_flight(30)["flight"]["iata"]])
+    assert stats["inserted"] == 1 and stats["updated"] == 1 and stats["unchanged"] == 29
+
+    # State survives a restart of the daemon
+    assert fetch_and_upload.upload_to_bigquery(flights, tracker=ChangeTracker(tracker.path)) \
+        == {"inserted": 0, "updated": 0, "unchanged": 30, "bytes": 0}
+    assert len(written) == 2
+
+
+def test_rows_of_a_failed_upload_are_retried(store, number_index, monkeypatch, tmp_path):
+    tracker = ChangeTracker(str(tmp_path / "changes.sqlite"))
+    flights = [make_flight(i) for i in range(5)]
+
+    def failing(rows, **kwargs):
+        raise RuntimeError("store unavailable")
+
+    monkeypatch.setattr(fetch_and_upload, "ingest_rows", failing)
+    with pytest.raises(RuntimeError):
+        fetch_and_upload.upload_to_bigquery(flights, tracker=tracker)
+    assert len(tracker) == 0
+    assert tracker.filter_changed(rows_from_flights(flights))[1] == 0
+
+
+def test_prune_forgets_dates_past_retention():
+    tracker = ChangeTracker(":memory:")
+    old_day = (date.today() - timedelta(days=40)).isoformat()
+    tracker.commit(rows_from_flights([make_flight(1, flight_date=old_day), make_flight(2)]))
+    assert tracker.prune(retention_days=30) == 1 and len(tracker) == 1
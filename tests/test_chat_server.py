@@ -0,0 +1,98 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from chat_server import Overloaded, RouterExecutor, create_app
+
+
+class SlowRouter:
+    """Stands in for InquiryRouter: answers once `release` is set."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def route(self, query):
+        self.release.wait(5)
+        return f"answer to {query}"
+
+
+async def post_chat(app, body: bytes) -> tuple:
+    """Drive one POST /chat through the ASGI app; returns (status, headers, JSON body)."""
+    sent, messages = [], [{"type": "http.request", "body": body, "more_body": False}]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/chat", "headers": [(b"content-type", b"application/json")],
+             "query_string": b"", "http_version": "1.1", "scheme": "http", "root_path": "",
+             "server": ("test", 80), "client": ("test", 1)}
+    await app(scope, receive, send)
+    start = next(message for message in sent if message["type"] == "http.response.start")
+    payload = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    return start["status"], dict(start["headers"]), json.loads(payload)
+
+
+def test_requests_beyond_workers_plus_queue_are_rejected():
+    router = SlowRouter()
+    executor = RouterExecutor(router, workers=1, queue_size=1, timeout=5)
+
+    async def scenario():
+        first = asyncio.ensure_future(executor.route("AI302"))
+        second = asyncio.ensure_future(executor.route("AI303"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(Overloaded):
+            await executor.route("AI304")
+        router.release.set()
+        return await first, await second
+
+    try:
+        assert asyncio.run(scenario()) == ("answer to AI302", "answer to AI303")
+        assert executor.stats() == {"in_flight": 0, "capacity": 2}
+    finally:
+        executor.shutdown()
+
+
+def test_timed_out_lookups_keep_their_slot_until_the_worker_finishes():
+    router = SlowRouter()
+    executor = RouterExecutor(router, workers=1, queue_size=0, timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.route("AI302")
+        assert executor.stats()["in_flight"] == 1
+        router.release.set()
+        await asyncio.sleep(0.05)
+        return executor.stats()["in_flight"]
+
+    try:
+        assert asyncio.run(scenario()) == 0
+    finally:
+        executor.shutdown()
+
+
+def test_chat_endpoint_maps_outcomes_to_status_codes():
+    router = SlowRouter()
+    router.release.set()
+    executor = RouterExecutor(router, workers=1, queue_size=0, timeout=5)
+    app = create_app(executor)
+
+    async def scenario():
+        ok = await post_chat(app, b'{"query": "AI302"}')
+        empty = await post_chat(app, b'{"query": "  "}')
+        not_json = await post_chat(app, b"AI302")
+        executor.in_flight = executor.capacity   # every slot taken
+        busy = await post_chat(app, b'{"query": "AI302"}')
+        return ok, empty, not_json, busy
+
+    try:
+        ok, empty, not_json, busy = asyncio.run(scenario())
+        assert ok[0] == 200 and ok[2] == {"response": "answer to AI302"}
+        assert empty[0] == 400 and not_json[0] == 400
+        assert busy[0] == 429 and busy[1][b"retry-after"] == b"1"
+    finally:
+        executor.shutdown()
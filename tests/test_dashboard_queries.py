@@ -0,0 +1,47 @@
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.fake_aviationstack import make_flight
+from services.transform import rows_from_flights
+
+WINDOW = ((date.today() - timedelta(days=6)).isoformat(), date.today().isoformat())
+
+
+@pytest.fixture
+def rows(store):
+    rows = rows_from_flights([make_flight(i) for i in range(230)])
+    store.upsert_rows(rows)
+    return rows
+
+
+def test_keyset_pages_cover_the_window_once_in_departure_order(store, rows):
+    seen, cursor = [], None
+    while True:
+        page = store.flights_page(["flight_number", "scheduled_departure", "status"], *WINDOW, cursor=cursor, limit=50)
+        assert all(set(row) == {"flight_number", "scheduled_departure", "status"} for row in page)
+        seen += page
+        if len(page) < 50:
+            break
+        cursor = (page[-1]["scheduled_departure"], page[-1]["flight_number"])
+
+    order = [(row["scheduled_departure"], row["flight_number"]) for row in seen]
+    assert order == sorted(order, reverse=True)
+    assert sorted(row["flight_number"] for row in seen) == sorted(row["flight_number"] for row in rows)
+
+
+def test_unknown_projection_columns_are_rejected(store):
+    with pytest.raises(ValueError):
+        store.flights_page(["flight_number", "1; DROP TABLE flights"], *WINDOW)
+
+
+def test_window_aggregates_match_the_raw_rows(store, rows):
+    summary = store.window_summary(*WINDOW)
+    assert summary["flights"] == len(rows)
+    assert summary["airlines"] == len({row["airline_name"] for row in rows})
+    assert summary["routes"] == len({(row["departure_iata"], row["arrival_iata"]) for row in rows})
+
+    breakdown = store.status_breakdown(*WINDOW)
+    assert {item["status"]: item["flights"] for item in breakdown} == Counter(row["status"] for row in rows)
+    assert [item["flights"] for item in breakdown] == sorted((item["flights"] for item in breakdown), reverse=True)
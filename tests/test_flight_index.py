@@ -0,0 +1,46 @@
+import multiprocessing
+
+from agents.flight_status_agent import FlightStatusAgent
+from services import flight_index
+from services.flight_index import FlightNumberIndex
+
+
+def _write(path, prefix):
+    index = FlightNumberIndex(path, generation_fn=lambda: 0)
+    index.compact_slack = 0   # compact as often as possible
+    for n in range(40):
+        for day in ("2026-01-01", "2026-01-02"):
+            index.record([{"flight_number": f"{prefix}{n}", "flight_date": day}])
+
+
+def test_concurrent_writers_never_lose_numbers(tmp_path):
+    path = str(tmp_path / "flight_numbers.csv")
+    FlightNumberIndex(path, generation_fn=lambda: 0).record([{"flight_number": "AI1", "flight_date": "2026-01-01"}])
+
+    context = multiprocessing.get_context("fork")
+    writers = [context.Process(target=_write, args=(path, prefix)) for prefix in ("6E", "UK", "SG", "QP")]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    index = FlightNumberIndex(path, generation_fn=lambda: 0)
+    index.refresh()
+    assert len(index) == 1 + 4 * 40
+    assert all(index.can_exist(f"{prefix}{n}") for prefix in ("6E", "UK", "SG", "QP") for n in range(40))
+
+
+def test_damaged_index_falls_back_to_the_store(tmp_path, monkeypatch):
+    path = tmp_path / "flight_numbers.csv"
+    path.write_text("AI1,2026-01-01\nAI2,not-a-date\n")
+    index = FlightNumberIndex(str(path), generation_fn=lambda: 0)
+    monkeypatch.setattr(flight_index, "_index", index)
+    assert index.can_exist("AI2") and index.can_exist("XX999")   # no short-circuit while a line is damaged
+
+    def broken(number):
+        raise OSError("index unreadable")
+    monkeypatch.setattr(index, "can_exist", broken)
+    monkeypatch.setattr(index, "suggest", broken)
+    monkeypatch.setattr(FlightStatusAgent, "fetch_flight_from_bigquery", lambda self, number: None)
+    assert FlightStatusAgent().run("AI2") == "❌ No flight data found for flight number AI2."
+    assert FlightStatusAgent().run_many(["AI2"]) == ["❌ No flight data found for flight number AI2."]
@@ -0,0 +1,29 @@
+import multiprocessing
+
+from services.ingest_marker import bump_generation, changed_dates, current_generation
+
+
+def _bump(path):
+    for _ in range(25):
+        bump_generation(path, ["2026-01-01"])
+
+
+def test_concurrent_bumps_from_several_processes_all_count(tmp_path):
+    path = str(tmp_path / "ingest_generation")
+    context = multiprocessing.get_context("fork")
+    bumpers = [context.Process(target=_bump, args=(path,)) for _ in range(4)]
+    for bumper in bumpers:
+        bumper.start()
+    for bumper in bumpers:
+        bumper.join()
+
+    assert current_generation(path) == 100
+    assert changed_dates(0, 100, path) == {"2026-01-01"}
+
+
+def test_unknown_dates_force_a_full_reload(tmp_path):
+    path = str(tmp_path / "ingest_generation")
+    bump_generation(path, ["2026-01-01"])
+    bump_generation(path)
+    assert changed_dates(0, 1, path) == {"2026-01-01"}
+    assert changed_dates(0, 2, path) is None
@@ -0,0 +1,23 @@
+from agents.inquiry_router import InquiryRouter
+from storage import set_store
+from storage.sqlite_store import SQLiteFlightStore
+
+
+class FailingStore(SQLiteFlightStore):
+    """In-memory store whose flight lookups fail, as when the backend is unreachable."""
+
+    def get_flights(self, flight_numbers):
+        raise RuntimeError("backend unavailable")
+
+
+def test_store_failure_answers_every_flight_in_the_message():
+    set_store(FailingStore(":memory:"))
+    try:
+        lines = InquiryRouter().route("AI302 and 6E204 and UK817 and DEL to BOM").splitlines()
+    finally:
+        set_store(None)
+
+    errors = [line for line in lines if line.startswith("❌ Error while accessing flight data")]
+    assert len(errors) == 3
+    assert lines[:3] == errors            # one error per flight, in the order asked, no blank lines
+    assert "DEL" in lines[3] and "BOM" in lines[3]
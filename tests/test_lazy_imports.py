@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = ["google.cloud.bigquery", "pandas", "numpy", "pyarrow", "requests", "asyncio", "http.server"]
+
+
+def loaded_after(code: str) -> list:
+    """Heavy modules present after running `code` in a fresh interpreter without an API key."""
+    probe = f"import json, sys\n{code}\nprint(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    env = {**os.environ, "AVIATIONSTACK_API_KEY": "", "STORAGE_BACKEND": "sqlite", "SQLITE_PATH": ":memory:"}
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True, timeout=60)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_chatbot_imports_without_heavy_dependencies():
+    assert loaded_after("import chatbot") == []
+
+
+def test_first_local_answer_needs_no_heavy_dependencies():
+    assert loaded_after("import chatbot; chatbot.InquiryRouter().route('AI302')") == []
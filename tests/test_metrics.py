@@ -0,0 +1,58 @@
+import json
+from urllib.request import urlopen
+
+import pytest
+
+from services import metrics
+
+
+@pytest.fixture
+def collecting():
+    was_enabled = metrics.is_enabled()
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.enable(was_enabled)
+    metrics.reset()
+
+
+def test_disabled_collection_records_nothing():
+    was_enabled = metrics.is_enabled()
+    metrics.reset()
+    metrics.enable(False)
+    try:
+        with metrics.span("api_fetch"):
+            metrics.incr("pages")
+        assert metrics.snapshot()["counters"] == [] and metrics.snapshot()["spans"] == []
+    finally:
+        metrics.enable(was_enabled)
+
+
+def test_spans_count_failures_and_reraise(collecting):
+    with metrics.span("bq_wait", stage="merge"):
+        pass
+    with pytest.raises(KeyError):
+        with metrics.span("bq_wait", stage="merge"):
+            raise KeyError("boom")
+
+    snap = metrics.snapshot()
+    assert [(s["name"], s["labels"], s["count"]) for s in snap["spans"]] == [("bq_wait", {"stage": "merge"}, 2)]
+    assert {"name": "errors", "labels": {"error": "KeyError", "span": "bq_wait"}, "value": 1} in snap["counters"]
+
+
+def test_prometheus_text_and_http_endpoint(collecting):
+    metrics.incr("agent_errors", agent="status", error='Bad"Quote')
+    metrics.observe("agent", 0.25, agent="route")
+    text = metrics.to_prometheus()
+    assert '# TYPE flight_agent_errors_total counter' in text
+    assert 'flight_agent_errors_total{agent="status",error="Bad\\"Quote"} 1' in text
+    assert 'flight_span_seconds_count{agent="route",span="agent"} 1' in text
+    assert 'flight_span_seconds_max{agent="route",span="agent"} 0.250000' in text
+
+    server = metrics.serve(0)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        assert urlopen(f"{base}/metrics").read().decode() == text
+        assert json.loads(urlopen(f"{base}/metrics.json").read())["counters"][0]["name"] == "agent_errors"
+    finally:
+        server.shutdown()
@@ -0,0 +1,46 @@
+import os
+import threading
+
+from conftest import FAKE_API_TOTAL
+from services.refresh import RefreshManager, refresh_from_api
+from services.spool import Spool
+
+
+def open_files_under(directory: str) -> list:
+    fds = "/proc/self/fd"
+    paths = []
+    for fd in os.listdir(fds):
+        try:
+            paths.append(os.readlink(os.path.join(fds, fd)))
+        except OSError:
+            pass
+    return [path for path in paths if path.startswith(directory)]
+
+
+def test_refresh_upserts_every_page_and_closes_its_spool(store, number_index, tmp_path, monkeypatch):
+    monkeypatch.setattr("services.refresh.Spool", lambda: Spool(str(tmp_path / "spool"), fsync=False))
+    progress = []
+
+    stats = refresh_from_api(lambda **update: progress.append(update), max_pages=5, batch_size=100)
+
+    assert stats == {"inserted": FAKE_API_TOTAL, "updated": 0, "unchanged": 0}
+    assert store.window_summary("2000-01-01", "2100-01-01")["flights"] == FAKE_API_TOTAL
+    assert progress[-1] == {"pages": 3, "flights": FAKE_API_TOTAL, "rows_upserted": FAKE_API_TOTAL}
+    assert open_files_under(str(tmp_path / "spool")) == []
+    assert list(Spool(str(tmp_path / "spool")).iter_records()) == []   # every page acknowledged
+
+
+def test_refresh_manager_runs_one_job_at_a_time():
+    release = threading.Event()
+
+    def job(report):
+        release.wait(5)
+        return {"inserted": 1, "updated": 0, "unchanged": 0}
+
+    manager = RefreshManager(job)
+    assert manager.start()
+    assert not manager.start()          # joins the running job
+    release.set()
+    manager.thread.join(5)
+    status = manager.status()
+    assert status["version"] == 1 and not status["running"] and status["stats"]["inserted"] == 1
@@ -0,0 +1,45 @@
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks.fake_aviationstack import make_flight
+from services.ingest import ingest_rows
+from services.transform import rows_from_flights
+
+
+def raw_summary(rows: list, origin: str, dest: str) -> dict:
+    """Per-airline flight counts and average durations computed straight from the rows."""
+    durations, counts = defaultdict(list), defaultdict(int)
+    for row in rows:
+        if (row["departure_iata"], row["arrival_iata"]) != (origin, dest):
+            continue
+        counts[row["airline_name"]] += 1
+        if row["scheduled_departure"] and row["scheduled_arrival"]:
+            minutes = (datetime.fromisoformat(row["scheduled_arrival"])
+                       - datetime.fromisoformat(row["scheduled_departure"])).total_seconds() // 60
+            durations[row["airline_name"]].append(minutes)
+    return {airline: (count, sum(durations[airline]) / len(durations[airline]))
+            for airline, count in counts.items()}
+
+
+def test_rollup_kept_at_ingest_matches_the_raw_rows(store, number_index):
+    rows = rows_from_flights([make_flight(i) for i in range(400)])
+    ingest_rows(rows[:250], store=store)
+    ingest_rows(rows[200:], store=store)   # overlapping batch: the touched days are rebuilt, not double counted
+
+    origin, dest = rows[0]["departure_iata"], rows[0]["arrival_iata"]
+    summary = store.route_summary(origin, dest, days=30, limit=100)
+    assert {item["airline_name"]: (item["flights"], item["avg_duration"]) for item in summary} \
+        == raw_summary(rows, origin, dest)
+    assert [item["flights"] for item in summary] == sorted((item["flights"] for item in summary), reverse=True)
+
+
+def test_batched_summaries_match_single_route_summaries(store, number_index):
+    rows = rows_from_flights([make_flight(i) for i in range(300)])
+    ingest_rows(rows, store=store)
+
+    routes = list({(row["departure_iata"], row["arrival_iata"]) for row in rows})[:5] + [("XXX", "YYY")]
+    summaries = store.route_summaries(routes, days=30, limit=3)
+    assert summaries[("XXX", "YYY")] == []
+    for route in routes[:-1]:
+        assert [item["flights"] for item in summaries[route]] \
+            == [item["flights"] for item in store.route_summary(*route, days=30, limit=3)]
@@ -0,0 +1,118 @@
+import os
+import runpy
+from types import SimpleNamespace
+
+import pytest
+from google.api_core.exceptions import NotFound
+
+from config import settings
+from services.bigquery_client import reset_client, set_client
+from services.schema import CLUSTER_FIELDS, PARTITION_FIELD, ROLLUP_CLUSTER_FIELDS
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "scripts", "setup_bigquery.py")
+TABLE, ROLLUP = "p.d.flights", "p.d.flights_route_daily"
+
+
+class TableClient:
+    """
+    BigQuery client modelling which tables exist and how they are laid out, recording every
+    table operation and whether the live flight table existed after it.
+    """
+
+    def __init__(self, tables: dict):
+        self.tables = tables   # table id -> (partition field, cluster fields)
+        self.ops = []
+        self.params = {}
+
+    def _op(self, *op):
+        self.ops.append((*op, TABLE in self.tables))
+
+    def _job(self, rows=()):
+        return SimpleNamespace(result=lambda: list(rows), total_bytes_processed=0, slot_millis=0, cache_hit=False)
+
+    def get_table(self, table_id):
+        if table_id not in self.tables:
+            raise NotFound(table_id)
+        field, cluster = self.tables[table_id]
+        return SimpleNamespace(schema=[], time_partitioning=field and SimpleNamespace(field=field),
+                               clustering_fields=cluster)
+
+    def update_table(self, table, fields):
+        return table
+
+    def create_table(self, table):
+        table_id = f"{table.project}.{table.dataset_id}.{table.table_id}"
+        self.tables[table_id] = (table.time_partitioning.field, table.clustering_fields)
+        self._op("create", table_id)
+        return table
+
+    def copy_table(self, source, destination, job_config=None):
+        self.tables[destination] = self.tables[source]
+        self._op("copy", source, destination)
+        return self._job()
+
+    def delete_table(self, table_id):
+        del self.tables[table_id]
+        self._op("delete", table_id)
+
+    def query(self, sql, job_config=None):
+        if getattr(job_config, "dry_run", False):
+            return self._job()
+        if "UNION DISTINCT" in sql:   # airport names still missing their code
+            return self._job([{"name": "Chennai International"}, {"name": "Nowhere Field"}])
+        if "CREATE OR REPLACE" in sql:
+            self.params = {param.name: param.values for param in job_config.query_parameters}
+            self.tables[f"{TABLE}_partitioned"] = (PARTITION_FIELD, CLUSTER_FIELDS)
+            self._op("build", f"{TABLE}_partitioned")
+        elif "BEGIN TRANSACTION" in sql:
+            self._op("rollup", ROLLUP)
+        return self._job()
+
+
+@pytest.fixture
+def run_setup(monkeypatch, capsys):
+    monkeypatch.setattr(settings, "PROJECT_ID", "p")
+    monkeypatch.setattr(settings, "BQ_DATASET", "d")
+    monkeypatch.setattr(settings, "BQ_TABLE", "flights")
+    monkeypatch.setattr(settings, "BQ_ROLLUP_TABLE", "flights_route_daily")
+
+    def run(tables: dict) -> TableClient:
+        client = TableClient(tables)
+        set_client(client)
+        runpy.run_path(SCRIPT)
+        assert "❌" not in capsys.readouterr().out
+        return client
+
+    yield run
+    reset_client()
+
+
+def test_flat_table_is_migrated_with_codes_filled_and_the_rollup_rebuilt(run_setup):
+    client = run_setup({TABLE: (None, None), ROLLUP: (PARTITION_FIELD, ROLLUP_CLUSTER_FIELDS)})
+
+    assert [op[:-1] for op in client.ops] == [
+        ("copy", TABLE, f"{TABLE}_unpartitioned"),
+        ("build", f"{TABLE}_partitioned"),
+        ("delete", TABLE),
+        ("copy", f"{TABLE}_partitioned", TABLE),
+        ("delete", f"{TABLE}_partitioned"),
+        ("rollup", ROLLUP),
+    ]
+    # The live table is only missing between the drop and the copy that replaces it
+    assert [op[0] for op in client.ops if not op[-1]] == ["delete"]
+    assert client.params == {"names": ["Chennai International"], "codes": ["MAA"]}
+    assert client.tables[TABLE] == (PARTITION_FIELD, CLUSTER_FIELDS)
+    assert f"{TABLE}_unpartitioned" in client.tables and f"{TABLE}_partitioned" not in client.tables
+
+
+def test_rerun_finishes_a_swap_interrupted_after_the_drop(run_setup):
+    client = run_setup({f"{TABLE}_unpartitioned": (None, None),
+                        f"{TABLE}_partitioned": (PARTITION_FIELD, CLUSTER_FIELDS),
+                        ROLLUP: (PARTITION_FIELD, ROLLUP_CLUSTER_FIELDS)})
+
+    assert [op[:-1] for op in client.ops] == [
+        ("copy", f"{TABLE}_partitioned", TABLE),
+        ("delete", f"{TABLE}_partitioned"),
+        ("rollup", ROLLUP),
+    ]
+    assert client.tables[TABLE] == (PARTITION_FIELD, CLUSTER_FIELDS)
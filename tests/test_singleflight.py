@@ -0,0 +1,58 @@
+import threading
+
+from services.singleflight import SingleFlight
+
+
+def burst(group: SingleFlight, key, fn, callers: int = 8) -> list:
+    """Call `group.do(key, fn)` from several threads at once; returns results or raised exceptions."""
+    outcomes, started = [], threading.Barrier(callers)
+
+    def call():
+        started.wait()
+        try:
+            outcomes.append(group.do(key, fn))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def gated(result=None, error=None):
+    """A lookup that counts its runs and blocks until every caller has had time to join it."""
+    runs = []
+
+    def lookup():
+        runs.append(1)
+        threading.Event().wait(0.1)
+        if error is not None:
+            raise error
+        return result
+
+    return lookup, runs
+
+
+def test_concurrent_callers_share_one_lookup():
+    group = SingleFlight("test")
+    lookup, runs = gated(result={"flight_number": "AI302"})
+    outcomes = burst(group, "AI302", lookup)
+    assert len(runs) == 1 and outcomes == [{"flight_number": "AI302"}] * 8
+    assert group.stats() == {"calls": 8, "shared": 7, "in_flight": 0}
+
+    # Nothing is cached: the next call runs the lookup again
+    group.do("AI302", lookup)
+    assert len(runs) == 2
+
+
+def test_waiters_receive_the_leaders_exception():
+    group = SingleFlight("test")
+    lookup, runs = gated(error=TimeoutError("slow store"))
+    outcomes = burst(group, "AI302", lookup)
+    assert len(runs) == 1 and all(isinstance(outcome, TimeoutError) for outcome in outcomes)
+
+    # The failure is not remembered either
+    assert group.do("AI302", lambda: "recovered") == "recovered"
@@ -0,0 +1,57 @@
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.fake_aviationstack import make_flight
+from services.snapshot import SNAPSHOT_COLUMNS, SnapshotManager
+from services.transform import rows_from_flights
+
+
+@pytest.fixture
+def rows(store):
+    rows = rows_from_flights([make_flight(i) for i in range(300)])
+    old_day = (date.today() - timedelta(days=20)).isoformat()
+    rows += rows_from_flights([make_flight(i, flight_date=old_day) for i in range(5)])   # outside the window
+    rows[1]["scheduled_arrival"] = None
+    store.upsert_rows(rows)
+    store.refresh_route_rollup()
+    return rows
+
+
+def by_airline(summaries: dict) -> dict:
+    """Route summaries keyed by airline, so ties in either order compare equal."""
+    return {route: {item["airline_name"]: item for item in items} for route, items in summaries.items()}
+
+
+def test_snapshot_answers_like_the_store(store, rows):
+    snapshot = SnapshotManager(lookback_days=7, generation_fn=lambda: 0).build()
+    assert len(snapshot) == 300
+
+    numbers = [row["flight_number"] for row in rows[:40]] + ["ZZ1"]
+    lookback_start = (date.today() - timedelta(days=3)).isoformat()
+    expected = {number: {col: record[col] for col in SNAPSHOT_COLUMNS}
+                for number, record in store.get_flights(numbers).items() if record["flight_date"] >= lookback_start}
+    assert snapshot.get_flights(numbers) == expected
+
+    routes = list({(row["departure_iata"], row["arrival_iata"]) for row in rows})
+    # Limit high enough that airlines tied on flights cannot be cut differently
+    assert by_airline(snapshot.route_summaries(routes, days=7, limit=50)) \
+        == by_airline(store.route_summaries(routes, days=7, limit=50))
+
+
+def test_manager_serves_a_snapshot_only_for_the_current_generation(store, rows):
+    generation = [1]
+    manager = SnapshotManager(lookback_days=7, generation_fn=lambda: generation[0])
+
+    def settled():
+        deadline = time.monotonic() + 5
+        while manager.building and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return manager.get()
+
+    assert manager.get() is None   # first call starts the background build
+    assert settled().generation == 1
+    generation[0] = 2
+    assert manager.get() is None   # stale after an ingest: callers go to the store meanwhile
+    assert settled().generation == 2 and manager.stats()["builds"] == 2
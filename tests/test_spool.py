@@ -0,0 +1,29 @@
+from services.spool import Spool
+
+
+def test_purge_keeps_segments_other_writers_still_have_open(tmp_path):
+    # Two writers sharing a spool directory, like the --watch poller and a dashboard refresh
+    poller, dashboard = Spool(str(tmp_path), fsync=False), Spool(str(tmp_path), fsync=False)
+    poller.ack([poller.append({"data": []})])
+    dashboard.ack([dashboard.append({"data": []})])
+    newest = Spool(str(tmp_path), fsync=False)
+    newest.append({"data": []})
+    old_segments = poller.segments()[:2]
+
+    # Fully acknowledged, but both are still open for appending
+    assert Spool(str(tmp_path), fsync=False).purge_acked() == 0
+
+    poller.close()
+    dashboard.close()
+    newest.close()
+    assert Spool(str(tmp_path), fsync=False).purge_acked() == 2
+    remaining = poller.segments()
+    assert len(remaining) == 1 and remaining[0] not in old_segments   # the newest segment is never purged
+
+
+def test_purge_keeps_unacknowledged_records(tmp_path):
+    spool = Spool(str(tmp_path), fsync=False)
+    spool.append({"data": []})
+    spool.close()
+    Spool(str(tmp_path), fsync=False).append({"data": []})
+    assert spool.purge_acked() == 0
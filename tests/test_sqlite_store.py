@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+
+from benchmarks.fake_aviationstack import make_flight
+from services.transform import rows_from_flights
+
+
+def test_upsert_reports_inserted_updated_and_unchanged_rows(store):
+    rows = rows_from_flights([make_flight(i) for i in range(10)])
+    assert store.upsert_rows(rows) == {"inserted": 10, "updated": 0, "unchanged": 0}
+
+    rows[0] = {**rows[0], "status": "cancelled" if rows[0]["status"] != "cancelled" else "landed"}
+    duplicate = dict(rows[1])
+    counts = store.upsert_rows(rows + [duplicate] + rows_from_flights([make_flight(10)]))
+    assert counts == {"inserted": 1, "updated": 1, "unchanged": 9}
+    assert store.get_flight(rows[0]["flight_number"])["status"] == rows[0]["status"]
+
+
+def test_point_lookup_returns_the_latest_date_of_a_flight_number(store):
+    today = date.today()
+    days = [(today - timedelta(days=offset)).isoformat() for offset in (400, 3, 1)]
+    store.upsert_rows(rows_from_flights([make_flight(7, flight_date=day) for day in days]))
+
+    number = rows_from_flights([make_flight(7)])[0]["flight_number"]
+    assert store.get_flight(number)["flight_date"] == days[-1]
+    assert store.get_flights([number, "ZZ1"]) == {number: store.get_flight(number)}
+
+
+def test_point_lookup_falls_back_to_history_beyond_the_lookback(store):
+    old_day = (date.today() - timedelta(days=400)).isoformat()
+    row = rows_from_flights([make_flight(3, flight_date=old_day)])[0]
+    store.upsert_rows([row])
+    assert store.get_flight(row["flight_number"])["flight_date"] == old_day
@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+from benchmarks.fake_aviationstack import make_flight
+from benchmarks.fake_bigquery import FakeBigQueryClient
+from scripts import sync_local_store
+from services import flight_index
+from services.bigquery_client import reset_client, set_client
+from services.flight_index import FlightNumberIndex
+from services.transform import rows_from_flights
+from storage import set_store
+from storage.bigquery_store import BigQueryFlightStore
+from storage.sqlite_store import SQLiteFlightStore
+
+
+def test_replica_sync_copies_recent_days_and_seeds_the_index_from_the_replica(tmp_path, monkeypatch):
+    old_day = (date.today() - timedelta(days=60)).isoformat()
+    recent = rows_from_flights([make_flight(i) for i in range(20)])
+    old = rows_from_flights([make_flight(100, flight_date=old_day)])
+    fake = FakeBigQueryClient()
+    fake.store.upsert_rows(recent + old)
+    set_client(fake)
+    monkeypatch.setattr(sync_local_store, "create_store",
+                        lambda backend: BigQueryFlightStore("p.d.flights", "p.d.flights_route_daily"))
+
+    # The configured store knows a number the replica never gets
+    primary = SQLiteFlightStore(":memory:")
+    primary.upsert_rows(rows_from_flights([make_flight(200)]))
+    set_store(primary)
+    index = FlightNumberIndex(str(tmp_path / "flight_numbers.csv"), generation_fn=lambda: 0)
+    monkeypatch.setattr(flight_index, "_index", index)
+    try:
+        stats = sync_local_store.sync(1000, str(tmp_path / "replica.db"), days=7)
+    finally:
+        set_store(None)
+        reset_client()
+
+    assert stats["inserted"] == len(recent)
+    assert not SQLiteFlightStore(str(tmp_path / "replica.db")).get_flight(old[0]["flight_number"])
+    assert all(index.can_exist(row["flight_number"]) for row in recent)
+    assert not index.can_exist(old[0]["flight_number"])
+    assert len(index) == len({row["flight_number"] for row in recent})
@@ -0,0 +1,29 @@
+from benchmarks.fake_aviationstack import make_flight
+from services.transform import flights_to_frame, format_row, frame_to_rows, rows_from_flights
+
+
+def edge_case_flights():
+    """Payload shapes the columnar timestamp path must hand to the scalar parser (or reject like it)."""
+    flights = [make_flight(i, seed=7) for i in range(5)]
+    flights[0]["departure"]["scheduled"] = "2026-03-01T10:30:00Z"                 # Zulu suffix
+    flights[1]["departure"]["scheduled"] = "2026-03-01T10:30:00+05:30"            # non-UTC offset
+    flights[2]["arrival"]["scheduled"] = None                                      # missing
+    flights[3]["arrival"]["scheduled"] = "2026-02-30T10:30:00+00:00"              # impossible date
+    flights[4]["departure"] = {"airport": "Indira Gandhi International", "icao": "VIDP"}   # no IATA code
+    return flights + [
+        {"flight_date": "2026-03-01", "flight": {"iata": ""}, "departure": {}, "arrival": {}},   # no number: dropped
+        {"flight_date": "2026-03-01", "flight": {"iata": "AI999"}},                             # sparse payload
+    ]
+
+
+def test_columnar_transform_matches_format_row():
+    flights = [make_flight(i) for i in range(200)] + edge_case_flights()
+    expected = [format_row(item) for item in flights if item.get("flight", {}).get("iata")]
+    assert frame_to_rows(flights_to_frame(flights, dedupe=False)) == expected
+
+
+def test_rows_from_flights_keeps_the_last_row_per_key():
+    first, second = make_flight(1, flight_date="2026-03-01"), make_flight(1, flight_date="2026-03-01", seed=1)
+    rows = rows_from_flights([first, make_flight(2, flight_date="2026-03-01"), second])
+    assert len(rows) == 2
+    assert [row for row in rows if row["flight_number"] == "6E101"] == [format_row(second)]